@@ -0,0 +1,299 @@
+"""
+Framework-independent handling of /api/check_mpin requests.
+
+check_mpin_request turns a decoded JSON body into the response body and an
+HTTP status, serving repeated inputs from result_cache; create_profile_request
+does the same for /api/profile. The Flask routes
+(routes.py) and the ASGI app (asgi.py) both call it, so the two serve
+exactly the same contract. Every verdict and the time spent in each stage
+are recorded in metrics.
+
+A request may list "modes" (common, strength, detailed) to get just those
+results from one evaluation. The test form on the index page uses this
+instead of one request per checkbox.
+"""
+import time
+
+from app import DATE_INPUT_NAMES, MODE_STRENGTH, SUPPORTED_DIGIT_LENGTHS, get_checker
+from date_index import DEFAULT_END_YEAR, DEFAULT_START_YEAR, get_date_index
+from guess_rank import strength_score
+from metrics import record_outcome, stage
+from profiles import profile_store
+from result_cache import result_cache
+
+_checker_lookup_metric = stage('checker_lookup')
+_check_strength_metric = stage('check_strength')
+_detailed_analysis_metric = stage('detailed_analysis')
+
+
+# How the detailed analysis words each date field and pattern family
+DATE_MATCH_LABELS = {
+    'birth_date': 'your birth date',
+    'spouse_birth_date': "spouse's birth date",
+    'wedding_date': 'wedding date',
+}
+PATTERN_DESCRIPTIONS = {
+    'REPEATED': 'All digits are the same',
+    'ASCENDING': 'Sequential digits pattern',
+    'DESCENDING': 'Descending sequential digits pattern',
+    'PAIRED': 'Paired digits pattern',
+}
+
+
+# Check modes a request can ask for with "modes", and the response fields each returns
+MODE_FIELDS = {
+    'common': ('is_common',),
+    'strength': ('strength',),
+    'detailed': ('strength', 'reasons', 'analysis'),
+}
+
+
+def parse_modes(value):
+    """The requested check modes as a tuple, or None for the full response; raises ValueError"""
+    if value is None:
+        return None
+    if (not isinstance(value, list) or not value
+            or not all(isinstance(mode, str) and mode in MODE_FIELDS for mode in value)):
+        raise ValueError(f"modes must be a non-empty list of: {', '.join(MODE_FIELDS)}")
+    return tuple(dict.fromkeys(value))
+
+
+def select_modes(body, modes, pin):
+    """The fields of body that modes asked for, plus success, modes and pin"""
+    selected = {'success': True, 'modes': list(modes)}
+    for mode in modes:
+        for field in MODE_FIELDS[mode]:
+            selected[field] = body[field]
+    selected['pin'] = pin
+    return selected
+
+
+def error_body(message, **extra):
+    return dict({'success': False, 'error': message}, **extra)
+
+
+def request_dates(data):
+    """(birth_date, spouse_birth_date, wedding_date) from a request body; missing, null or blank fields are None"""
+    dates = []
+    for field in DATE_INPUT_NAMES:
+        value = data.get(field) or ''
+        if not isinstance(value, str):
+            raise ValueError(f'"{field}" must be a string')
+        dates.append(value.strip() or None)
+    return tuple(dates)
+
+
+def create_profile_request(data):
+    """Validate one /api/profile body and register its dates; returns (response dict, HTTP status for errors)"""
+    if not isinstance(data, dict):
+        return error_body('No data received. Please send JSON data.'), 400
+    try:
+        dates = request_dates(data)
+    except ValueError as e:
+        return error_body(str(e)), 400
+    profile = profile_store.create(*dates)
+    return {'success': True, 'profile_id': profile.profile_id, 'expires_in': profile_store.ttl_seconds}, 200
+
+
+def check_mpin_request(data):
+    """Validate and check one request body; returns (response dict, HTTP status for errors)"""
+    body, status = _check_mpin_request(data)
+    record_outcome(body)
+    return body, status
+
+
+def _check_mpin_request(data):
+    if not data or not isinstance(data, dict):
+        return error_body('No data received. Please send JSON data.'), 400
+
+    # Extract data from request
+    pin = data.get('pin') or ''
+    if not isinstance(pin, str):
+        return error_body('PIN must be sent as a string'), 400
+    pin = pin.strip()
+    try:
+        birth_date, spouse_birth_date, wedding_date = request_dates(data)
+    except ValueError as e:
+        return error_body(str(e)), 400
+
+    # Validate PIN
+    if not pin:
+        return error_body('Please enter a PIN'), 400
+
+    if not pin.isdigit():
+        return error_body('PIN must contain only digits'), 400
+
+    if len(pin) not in SUPPORTED_DIGIT_LENGTHS:
+        return error_body('PIN must be 4, 5, 6 or 8 digits long'), 400
+
+    # Several checks in one round trip; without modes the full body is returned
+    try:
+        modes = parse_modes(data.get('modes'))
+    except ValueError as e:
+        return error_body(str(e)), 400
+
+    # A profile id stands in for the dates with the server-side precomputed profile.
+    # Profiles live in one worker's memory, so a request that also sends its dates
+    # is checked with those dates when this worker does not know the id.
+    profile = None
+    profile_id = (data.get('profile_id') or '').strip()
+    if profile_id:
+        profile = profile_store.get(profile_id)
+        if profile is not None:
+            birth_date = profile.birth_date
+            spouse_birth_date = profile.spouse_birth_date
+            wedding_date = profile.wedding_date
+        elif not (birth_date or spouse_birth_date or wedding_date):
+            return error_body('Profile expired or not found. Please submit your dates again.',
+                              profile_expired=True), 404
+
+    # Identical inputs give identical bodies; the cached copy leaves the PIN and
+    # the dates out, and they are filled back in from this request on a hit
+    cache_key = None
+    if result_cache.enabled:
+        cache_key = result_cache.key(pin, birth_date, spouse_birth_date, wedding_date)
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            cached = with_dates(cached, {'birth_date': birth_date, 'spouse_birth_date': spouse_birth_date,
+                                         'wedding_date': wedding_date})
+            if modes is not None:
+                return select_modes(cached, modes, pin), 200
+            return dict(cached, pin=pin), 200
+
+    if modes is not None and 'detailed' not in modes:
+        # Only the cheap checks: no reasons list and no detailed analysis
+        return check_modes_only(pin, modes, profile, birth_date, spouse_birth_date, wedding_date), 200
+
+    # Look up the shared checker and analyze PIN
+    clock = time.perf_counter
+    started = clock()
+    checker = get_checker(len(pin))
+    looked_up = clock()
+    _checker_lookup_metric.observe(looked_up - started)
+    # One pass also reports what matched, so the analysis below only formats it
+    if profile is not None:
+        strength, reasons, provenance = profile.check_strength(checker, pin, provenance=True)
+    else:
+        strength, reasons, provenance = checker.check_strength(pin, birth_date, spouse_birth_date, wedding_date,
+                                                               provenance=True)
+    is_common = bool(provenance['patterns'])
+    checked = clock()
+    _check_strength_metric.observe(checked - looked_up)
+
+    # Get detailed analysis
+    analysis = get_detailed_analysis(pin, strength, reasons, provenance,
+                                     bool(birth_date or spouse_birth_date or wedding_date))
+    _detailed_analysis_metric.observe(clock() - checked)
+
+    body = {
+        'success': True,
+        'strength': strength,
+        'reasons': reasons,
+        'is_common': is_common,
+        'analysis': analysis
+    }
+    if cache_key is not None:
+        result_cache.put(cache_key, without_dates(body))
+    if modes is not None:
+        return select_modes(body, modes, pin), 200
+    return dict(body, pin=pin), 200
+
+
+def check_modes_only(pin, modes, profile, birth_date, spouse_birth_date, wedding_date):
+    """Response for the common and strength modes, stopping at the first rule that makes the PIN weak"""
+    checker = get_checker(len(pin))
+    body = {}
+    if 'common' in modes:
+        body['is_common'] = checker.is_common(pin)
+    if 'strength' in modes:
+        if profile is not None:
+            body['strength'] = profile.check_strength(checker, pin)[0]
+        else:
+            body['strength'] = checker.check_strength(pin, birth_date, spouse_birth_date, wedding_date,
+                                                      mode=MODE_STRENGTH)[0]
+    return select_modes(body, modes, pin)
+
+
+def get_detailed_analysis(pin, strength, reasons, provenance, has_dates):
+    """Get detailed analysis of the PIN from check_strength's provenance"""
+    analysis = {
+        'length_analysis': f"Your PIN is {len(pin)} digits long.",
+        'strength_score': get_strength_score(pin, strength, reasons),
+        'recommendations': get_recommendations(strength, reasons),
+        'demographic_matches': demographic_matches(provenance),
+        'common_patterns': [PATTERN_DESCRIPTIONS[family] for family in provenance['patterns']],
+        'provenance': provenance
+    }
+
+    # Reverse calendar lookup flags date-like PINs even when no dates were given;
+    # lengths the index does not cover leave the field out rather than report 0
+    date_index = get_date_index()
+    if date_index.covers(len(pin)):
+        date_encoding_days = date_index.count(pin)
+        analysis['date_encoding_days'] = date_encoding_days
+        if date_encoding_days and not has_dates:
+            analysis['common_patterns'].append(
+                f"Valid date encoding for {date_encoding_days} calendar days "
+                f"({DEFAULT_START_YEAR}-{DEFAULT_END_YEAR})")
+
+    return analysis
+
+
+def demographic_matches(provenance):
+    """One line per matching date, e.g. Matches your date of birth (02-01-1998) as DD+MM"""
+    return [f"Matches {DATE_MATCH_LABELS[match['field']]} ({match['date']}) as {', '.join(match['orderings'])}"
+            for match in provenance['dates']]
+
+
+def without_dates(body):
+    """Copy of a full body with the date values masked as None, for result_cache"""
+    analysis = body['analysis']
+    provenance = analysis['provenance']
+    provenance = dict(provenance, dates=[dict(match, date=None) for match in provenance['dates']])
+    return dict(body, analysis=dict(analysis, demographic_matches=None, provenance=provenance))
+
+
+def with_dates(body, dates):
+    """Inverse of without_dates, given the request's dates by field name"""
+    analysis = body['analysis']
+    provenance = analysis['provenance']
+    provenance = dict(provenance, dates=[dict(match, date=dates[match['field']]) for match in provenance['dates']])
+    return dict(body, analysis=dict(analysis, demographic_matches=demographic_matches(provenance),
+                                    provenance=provenance))
+
+
+def get_strength_score(pin, strength, reasons):
+    """Calculate a numerical strength score from the PIN's global guess rank"""
+    return strength_score(pin, strength, reasons)
+
+
+def get_recommendations(strength, reasons):
+    """Get recommendations based on analysis"""
+    recommendations = []
+
+    if "COMMONLY_USED" in reasons:
+        recommendations.append("Avoid commonly used PINs like 1111, 1234, or 0000")
+
+    if "COMMONLY_USED_LEAKED" in reasons:
+        recommendations.append("This PIN appears frequently in leaked PIN lists that attackers try first")
+
+    if "DEMOGRAPHIC_DOB_SELF" in reasons:
+        recommendations.append("Don't use your birth date in your PIN")
+
+    if "DEMOGRAPHIC_DOB_SPOUSE" in reasons:
+        recommendations.append("Don't use your spouse's birth date in your PIN")
+
+    if "DEMOGRAPHIC_ANNIVERSARY" in reasons:
+        recommendations.append("Don't use your wedding/anniversary date in your PIN")
+
+    if strength == "STRONG":
+        recommendations.append("Great choice! This PIN appears to be strong and secure.")
+    else:
+        recommendations.extend([
+            "Use a mix of digits that don't follow obvious patterns",
+            "Avoid personal information like dates",
+            "Consider using a random combination of digits"
+        ])
+
+    return recommendations
+
@@ -1,90 +1,417 @@
-from datetime import datetime
+import sys
+import threading
+import time
+from enum import IntFlag
+
+from leaked import configured_min_count, load_configured_dictionaries
+from metrics import stage
+from patterns import (
+    YEAR, SparsePatternTable, compile_common_patterns, compile_date_layouts, layout_name, pattern_family_names,
+)
+
+# PIN lengths the web entry points accept
+SUPPORTED_DIGIT_LENGTHS = (4, 5, 6, 8)
+
+# Lengths up to this get a dense byte-per-PIN table (1 MB at 6 digits);
+# longer ones use a sparse table holding only the common PINs.
+DENSE_PATTERN_TABLE_MAX_DIGITS = 6
+
+class Reason(IntFlag):
+    # Bit order matches the order check_strength reports the reasons in
+    COMMONLY_USED = 1
+    DEMOGRAPHIC_DOB_SELF = 2
+    DEMOGRAPHIC_DOB_SPOUSE = 4
+    DEMOGRAPHIC_ANNIVERSARY = 8
+    COMMONLY_USED_LEAKED = 16
+
+# Every combination is built once so results never construct new enum values
+# or name lists on the hot path.
+_REASON_MASKS = range(1 << len(Reason))
+_REASON_FLAGS = tuple(Reason(mask) for mask in _REASON_MASKS)
+_REASON_NAMES = tuple(tuple(reason.name for reason in Reason if mask & reason) for mask in _REASON_MASKS)
+
+def reason_flags(mask):
+    return _REASON_FLAGS[mask]
+
+def reason_names(mask):
+    # Compatibility layer: the list of reason strings check_strength has always returned
+    return list(_REASON_NAMES[mask])
+
+# Rule engine. Each rule declares its relative cost, whether its verdict
+# depends on the PIN alone (so it can be precomputed into a table), and
+# which date argument it needs. Rules run cheapest first. mode="strength"
+# stops at the first hit; mode="reasons" collects every hit. A rule returns
+# a falsy value for no match, or a truthy detail of what matched, which
+# check_strength(provenance=True) reports.
+MODE_REASONS = "reasons"
+MODE_STRENGTH = "strength"
+
+# Index into the (birth_date, spouse_birth_date, wedding_date) tuple
+NO_INPUT = None
+BIRTH_DATE = 0
+SPOUSE_BIRTH_DATE = 1
+WEDDING_DATE = 2
+DATE_INPUT_NAMES = ("birth_date", "spouse_birth_date", "wedding_date")
+
+class Rule:
+    # Counters are plain ints bumped without a lock: under heavy contention
+    # they may drop the odd increment, which is fine for latency profiling.
+    __slots__ = ("name", "reason", "cost", "precomputable", "date_input", "evaluate",
+                 "evaluations", "hits", "time_ns")
+
+    def __init__(self, name, reason, cost, precomputable, date_input, evaluate):
+        self.name = name
+        self.reason = reason
+        self.cost = cost
+        self.precomputable = precomputable
+        self.date_input = date_input
+        self.evaluate = evaluate
+        self.reset()
+
+    def reset(self):
+        self.evaluations = 0
+        self.hits = 0
+        self.time_ns = 0
+
+    def stats(self):
+        return {
+            "name": self.name,
+            "cost": self.cost,
+            "precomputable": self.precomputable,
+            "evaluations": self.evaluations,
+            "hits": self.hits,
+            "total_ms": self.time_ns / 1e6,
+            "avg_us": self.time_ns / self.evaluations / 1e3 if self.evaluations else 0.0,
+        }
+
+RULES = []
+
+def register_rule(name, reason, cost, precomputable=False, date_input=NO_INPUT):
+    def decorator(evaluate):
+        RULES.append(Rule(name, int(reason), cost, precomputable, date_input, evaluate))
+        return evaluate
+    return decorator
+
+def ordered_rules():
+    return tuple(sorted(RULES, key=lambda rule: rule.cost))
+
+def rule_stats():
+    # Read by metrics.render for GET /metrics
+    return [rule.stats() for rule in ordered_rules()]
+
+@register_rule("COMMONLY_USED", Reason.COMMONLY_USED, cost=1, precomputable=True)
+def _common_pattern_rule(checker, pin, value):
+    # The PATTERN_* families of the PIN
+    return checker.pattern_bits(pin)
+
+@register_rule("COMMONLY_USED_LEAKED", Reason.COMMONLY_USED_LEAKED, cost=5, precomputable=True)
+def _leaked_pin_rule(checker, pin, value):
+    # How often the PIN was leaked (reported as 1 if a min count of 0 lets in unseen PINs)
+    frequency = checker.leaked_frequency(pin)
+    if frequency < checker.leaked_min_count:
+        return 0
+    return max(frequency, 1)
+
+def _date_rule(checker, pin, date_str):
+    # Bits of the date layouts that render the date as the PIN
+    return checker.match_date_layouts(pin, date_str)
+
+register_rule("DEMOGRAPHIC_DOB_SELF", Reason.DEMOGRAPHIC_DOB_SELF, cost=50, date_input=BIRTH_DATE)(_date_rule)
+register_rule("DEMOGRAPHIC_DOB_SPOUSE", Reason.DEMOGRAPHIC_DOB_SPOUSE, cost=50, date_input=SPOUSE_BIRTH_DATE)(_date_rule)
+register_rule("DEMOGRAPHIC_ANNIVERSARY", Reason.DEMOGRAPHIC_ANNIVERSARY, cost=50, date_input=WEDDING_DATE)(_date_rule)
+
+_DATE_RULES = tuple(rule for rule in RULES if rule.date_input is not None)
+
+_DAYS_IN_MONTH = (0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+# Modulus that leaves a day or month unchanged in MPINChecker.compile_date_scales
+_WHOLE_VALUE = 100
+
+def parse_date_parts(date_str):
+    # (day, month, year) for exactly the strings datetime.strptime(date_str, "%d-%m-%Y")
+    # accepts, else None. Its regexes allow a day of 1-2 digits or a space and a
+    # digit, a month of 1-2 digits and a year of four Unicode decimal digits; the
+    # second digit of a day from 10 to 29 is also any Unicode decimal digit.
+    first = date_str.find("-")
+    second = date_str.find("-", first + 1)
+    if len(date_str) - second != 5:
+        return None
+    if first == 1:
+        digit = date_str[0]
+        if not "1" <= digit <= "9":
+            return None
+        day = ord(digit) - 48
+    elif first == 2:
+        tens = date_str[0]
+        digit = date_str[1]
+        if tens == " " or tens == "0":
+            if not "1" <= digit <= "9":
+                return None
+            day = ord(digit) - 48
+        elif tens == "1" or tens == "2":
+            if "0" <= digit <= "9":
+                day = ord(digit) - 48
+            elif digit.isdecimal():
+                day = int(digit)
+            else:
+                return None
+            day += 10 if tens == "1" else 20
+        elif tens == "3" and (digit == "0" or digit == "1"):
+            day = 30 if digit == "0" else 31
+        else:
+            return None
+    else:
+        return None
+    width = second - first
+    if width == 2:
+        digit = date_str[first + 1]
+        if not "1" <= digit <= "9":
+            return None
+        month = ord(digit) - 48
+    elif width == 3:
+        tens = date_str[first + 1]
+        digit = date_str[first + 2]
+        if tens == "0" and "1" <= digit <= "9":
+            month = ord(digit) - 48
+        elif tens == "1" and "0" <= digit <= "2":
+            month = ord(digit) - 38
+        else:
+            return None
+    else:
+        return None
+    year = 0
+    for digit in date_str[second + 1:]:
+        if "0" <= digit <= "9":
+            year = year * 10 + ord(digit) - 48
+        elif digit.isdecimal():
+            year = year * 10 + int(digit)
+        else:
+            return None
+    if year == 0:
+        return None
+    if day > _DAYS_IN_MONTH[month]:
+        if not (month == 2 and day == 29 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)):
+            return None
+    return day, month, year
+
+_date_parsing_metric = stage('date_parsing')
+_combination_generation_metric = stage('combination_generation')
 
 class MPINChecker:
-    def __init__(self, digit_length=4):
-        self.digit_length = digit_length
-        self.common_pins = self.generate_common_pins()
+    # Checkers are immutable once built so a single instance per digit length
+    # can be shared by every request thread (see get_checker below).
+    __slots__ = ("digit_length", "common_pins", "pattern_table", "date_layouts", "date_scales", "rules",
+                 "leaked", "leaked_min_count")
+
+    def __init__(self, digit_length=4, leaked=None, leaked_min_count=1):
+        # leaked: optional leaked.LeakedPinDictionary for this digit length; PINs
+        # leaked at least leaked_min_count times are COMMONLY_USED_LEAKED.
+        if leaked is not None and leaked.digit_length != digit_length:
+            raise ValueError(f"Leaked-PIN file is for {leaked.digit_length} digits, not {digit_length}")
+        object.__setattr__(self, "digit_length", digit_length)
+        object.__setattr__(self, "leaked", leaked)
+        object.__setattr__(self, "leaked_min_count", leaked_min_count)
+        common_patterns = self.generate_common_patterns()
+        object.__setattr__(self, "common_pins", frozenset(common_patterns))
+        object.__setattr__(self, "pattern_table", self.build_pattern_table(common_patterns))
+        object.__setattr__(self, "date_layouts", compile_date_layouts(digit_length))
+        object.__setattr__(self, "date_scales", tuple(self.compile_date_scales(layout) for layout in self.date_layouts))
+        object.__setattr__(self, "rules", ordered_rules())
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"MPINChecker is immutable; cannot set '{name}'")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"MPINChecker is immutable; cannot delete '{name}'")
+
+    def generate_common_patterns(self):
+        # Maps each common PIN to the OR of the PATTERN_* families it belongs to,
+        # from every generator in patterns.py that supports this length.
+        return compile_common_patterns(self.digit_length)
 
     def generate_common_pins(self):
-        common_pins = set()
-        for digit in range(10):
-            common_pins.add(str(digit) * self.digit_length)
-        
-        for start in range(1, 11 - self.digit_length):
-            sequence = ""
-            for index in range(start, start + self.digit_length):
-                sequence += str(index)
-            common_pins.add(sequence)
-        for start in range(9, self.digit_length - 1, -1):
-            sequence = ""
-            for index in range(start, start - self.digit_length, -1):
-                sequence += str(index)
-            common_pins.add(sequence)
-        if self.digit_length == 4:
-            for digit in range(1, 9):
-                common_pins.add(str(digit) * 2 + str(digit + 1) * 2)
-        elif self.digit_length == 6:
-            for digit in range(1, 8):
-                common_pins.add(str(digit) * 2 + str(digit + 1) * 2 + str(digit + 2) * 2)
-        return common_pins
-
-    def get_date_parts(self, date_str):
-        try:
-            date_obj = datetime.strptime(date_str, "%d-%m-%Y")
-            day = date_obj.strftime("%d")
-            month = date_obj.strftime("%m")
-            year = date_obj.strftime("%y")
-            return day, month, year
-        except ValueError:
-            return None, None, None
+        return set(self.generate_common_patterns())
+
+    def build_pattern_table(self, common_patterns):
+        # One byte per PIN in the whole 10**digit_length space, indexed by the
+        # PIN's integer value (10 KB for 4 digits, 1 MB for 6 digits).
+        if self.digit_length > DENSE_PATTERN_TABLE_MAX_DIGITS:
+            table = SparsePatternTable()
+            for pin, families in common_patterns.items():
+                table[int(pin)] = table[int(pin)] | families
+            return table
+        table = bytearray(10 ** self.digit_length)
+        for pin, families in common_patterns.items():
+            table[int(pin)] |= families
+        return bytes(table)
+
+    def pattern_bits(self, pin):
+        # Non-ASCII digit strings can never equal a generated pattern, and int()
+        # would otherwise map them onto the ASCII PIN with the same value.
+        if not (pin.isdigit() and len(pin) == self.digit_length and pin.isascii()):
+            return 0
+        return self.pattern_table[int(pin)]
+
+    def leaked_frequency(self, pin):
+        if self.leaked is None:
+            return 0
+        return self.leaked.frequency(pin)
 
     def generate_demographic_combinations(self, date_str):
-        day, month, year = self.get_date_parts(date_str)
-        if day is None:
-            return set()
-        parts = [day, month, year]
-        combinations = set()
-        digits_needed = self.digit_length // 2
-        if digits_needed == 2:
-            pairs = [(0, 1), (0, 2), (1, 2)]
-            for i, j in pairs:
-                combinations.add(parts[i] + parts[j])
-                combinations.add(parts[j] + parts[i])
-        elif digits_needed == 3:
-            orders = [
-                (0, 1, 2), (0, 2, 1), (1, 0, 2),
-                (1, 2, 0), (2, 0, 1), (2, 1, 0)
-            ]
-            for order in orders:
-                combination = parts[order[0]] + parts[order[1]] + parts[order[2]]
-                combinations.add(combination)
-        return combinations
+        return {pin for _, pin in self.render_date_layouts(date_str)}
+
+    def compile_date_scales(self, layout):
+        # (component, divisor, 10 ** width, modulus) per component of a layout:
+        # pin_value // divisor % 10 ** width is the component's digits in the PIN,
+        # and the date value % modulus is what they must equal (the year is cut
+        # to its last width digits; a day or month is compared whole).
+        scales = []
+        divisor = 10 ** self.digit_length
+        for component, width in layout:
+            divisor //= 10 ** width
+            modulus = 10 ** width if component == YEAR else _WHOLE_VALUE
+            scales.append((component, divisor, 10 ** width, modulus))
+        return tuple(scales)
+
+    def match_date_layouts(self, pin, date_str):
+        # Bit i is set when date_layouts[i] renders date_str as pin; 0 when none does.
+        # Same answer as pin in generate_demographic_combinations(date_str), but each
+        # layout's digits are read out of the PIN's value and compared with the date
+        # as integers, so no strings or sets are built. Non-ASCII digits never match
+        # a rendered date.
+        parts = parse_date_parts(date_str)
+        if parts is None or not pin.isascii():
+            return 0
+        pin_value = int(pin)
+        mask = 0
+        bit = 1
+        for scales in self.date_scales:
+            for component, divisor, scale, modulus in scales:
+                # A day of 10-31 never equals one digit, so single-digit layouts need no check
+                if pin_value // divisor % scale != parts[component] % modulus:
+                    break
+            else:
+                mask |= bit
+            bit <<= 1
+        return mask
+
+    def render_date_layouts(self, date_str):
+        # (layout, PIN string) for every layout that can hold the date
+        clock = time.perf_counter
+        started = clock()
+        values = parse_date_parts(date_str)
+        parsed = clock()
+        _date_parsing_metric.observe(parsed - started)
+        if values is None:
+            return []
+        renderings = []
+        for layout in self.date_layouts:
+            pieces = []
+            for component, width in layout:
+                value = values[component]
+                if component == YEAR:
+                    value %= 10 ** width
+                elif value >= 10 ** width:
+                    # An unpadded single-digit day or month cannot hold 10-31
+                    break
+                pieces.append(f"{value:0{width}d}")
+            else:
+                renderings.append((layout, "".join(pieces)))
+        _combination_generation_metric.observe(clock() - parsed)
+        return renderings
 
     def is_common(self, pin):
-        if not (pin.isdigit() and len(pin) == self.digit_length):
-            return False
-        return pin in self.common_pins
+        return self.pattern_bits(pin) != 0
 
-    def check_strength(self, pin, birth_date=None, spouse_birth_date=None, wedding_date=None):
+    def check_flags(self, pin, birth_date=None, spouse_birth_date=None, wedding_date=None, mode=MODE_REASONS,
+                    matches=None):
+        # Compact form of check_strength: a Reason mask, or None for an invalid PIN.
+        # In strength mode the mask only holds the first (cheapest) rule that hit.
+        # A matches dict receives rule name -> match detail for every rule that hit.
         if not (pin.isdigit() and len(pin) == self.digit_length):
-            return "INVALID", []
-        reasons = []
-        if pin in self.common_pins:
-            reasons.append("COMMONLY_USED")
-        if birth_date:
-            birth_date_combinations = self.generate_demographic_combinations(birth_date)
-            if pin in birth_date_combinations:
-                reasons.append("DEMOGRAPHIC_DOB_SELF")
-        if spouse_birth_date:
-            spouse_birth_date_combinations = self.generate_demographic_combinations(spouse_birth_date)
-            if pin in spouse_birth_date_combinations:
-                reasons.append("DEMOGRAPHIC_DOB_SPOUSE")
-        if wedding_date:
-            wedding_date_combinations = self.generate_demographic_combinations(wedding_date)
-            if pin in wedding_date_combinations:
-                reasons.append("DEMOGRAPHIC_ANNIVERSARY")
-        strength = "WEAK" if reasons else "STRONG"
-        return strength, reasons
+            return None
+        inputs = (birth_date, spouse_birth_date, wedding_date)
+        stop_at_first_hit = mode == MODE_STRENGTH
+        clock = time.perf_counter_ns
+        mask = 0
+        for rule in self.rules:
+            value = None if rule.date_input is None else inputs[rule.date_input]
+            if rule.date_input is not None and not value:
+                continue
+            started = clock()
+            hit = rule.evaluate(self, pin, value)
+            rule.time_ns += clock() - started
+            rule.evaluations += 1
+            if hit:
+                rule.hits += 1
+                mask |= rule.reason
+                if matches is not None:
+                    matches[rule.name] = hit
+                if stop_at_first_hit:
+                    break
+        return _REASON_FLAGS[mask]
+
+    def check_strength(self, pin, birth_date=None, spouse_birth_date=None, wedding_date=None, mode=MODE_REASONS,
+                       provenance=False):
+        # With provenance=True a third item describes what matched (see describe_matches)
+        if not provenance:
+            flags = self.check_flags(pin, birth_date, spouse_birth_date, wedding_date, mode)
+            return strength_from_flags(flags), reason_names(flags or 0)
+        matches = {}
+        flags = self.check_flags(pin, birth_date, spouse_birth_date, wedding_date, mode, matches)
+        return (strength_from_flags(flags), reason_names(flags or 0),
+                describe_matches(matches, (birth_date, spouse_birth_date, wedding_date), self.date_layouts))
+
+def describe_matches(matches, dates, date_layouts):
+    """JSON-ready provenance from check_flags' matches for the given (birth, spouse, wedding) dates
+
+    patterns:      PATTERN_* family names, e.g. ["ASCENDING"]
+    leaked_count:  times the PIN appears in the leaked lists, or None
+    dates:         one entry per matching date with its field, reason, the
+                   date as given and the orderings it matched, e.g. ["DD+MM"]
+    """
+    provenance = {
+        "patterns": pattern_family_names(matches.get("COMMONLY_USED", 0)),
+        "leaked_count": matches.get("COMMONLY_USED_LEAKED") or None,
+        "dates": [],
+    }
+    for rule in _DATE_RULES:
+        layout_bits = matches.get(rule.name, 0)
+        if layout_bits:
+            provenance["dates"].append({
+                "field": DATE_INPUT_NAMES[rule.date_input],
+                "reason": rule.name,
+                "date": dates[rule.date_input],
+                "orderings": [layout_name(layout) for index, layout in enumerate(date_layouts)
+                              if layout_bits >> index & 1],
+            })
+    return provenance
+
+def strength_from_flags(flags):
+    if flags is None:
+        return "INVALID"
+    return "WEAK" if flags else "STRONG"
+
+_CHECKERS = {}
+_CHECKERS_LOCK = threading.Lock()
+_LEAKED_DICTIONARIES = None
+
+def get_checker(digit_length=4):
+    # Process-wide registry: the common-PIN set for a length is built once and
+    # the same frozen checker is handed to every caller after that. Leaked-PIN
+    # files listed in $MPIN_LEAKED_PINS are memory-mapped on first use.
+    global _LEAKED_DICTIONARIES
+    checker = _CHECKERS.get(digit_length)
+    if checker is None:
+        with _CHECKERS_LOCK:
+            checker = _CHECKERS.get(digit_length)
+            if checker is None:
+                if _LEAKED_DICTIONARIES is None:
+                    _LEAKED_DICTIONARIES = load_configured_dictionaries()
+                checker = MPINChecker(digit_length=digit_length,
+                                      leaked=_LEAKED_DICTIONARIES.get(digit_length),
+                                      leaked_min_count=configured_min_count())
+                _CHECKERS[digit_length] = checker
+    return checker
 
 def run_interactive():
     print("Welcome to MPIN Checker!")
@@ -98,7 +425,7 @@ def run_interactive():
 
     if task == "1":
         pin = input("Enter 4-digit PIN: ").strip()
-        checker = MPINChecker(digit_length=4)
+        checker = get_checker(4)
         result = checker.is_common(pin)
         print(f"Is PIN commonly used? {result}")
     
@@ -110,8 +437,8 @@ def run_interactive():
         birth_date = birth_date if birth_date else None
         spouse_birth_date = spouse_birth_date if spouse_birth_date else None
         wedding_date = wedding_date if wedding_date else None
-        checker = MPINChecker(digit_length=4)
-        strength, _ = checker.check_strength(pin, birth_date, spouse_birth_date, wedding_date)
+        checker = get_checker(4)
+        strength, _ = checker.check_strength(pin, birth_date, spouse_birth_date, wedding_date, mode=MODE_STRENGTH)
         print(f"PIN strength: {strength}")
     
     elif task == "3":
@@ -122,7 +449,7 @@ def run_interactive():
         birth_date = birth_date if birth_date else None
         spouse_birth_date = spouse_birth_date if spouse_birth_date else None
         wedding_date = wedding_date if wedding_date else None
-        checker = MPINChecker(digit_length=4)
+        checker = get_checker(4)
         strength, reasons = checker.check_strength(pin, birth_date, spouse_birth_date, wedding_date)
         print(f"PIN strength: {strength}")
         print(f"Reasons: {reasons}")
@@ -135,7 +462,7 @@ def run_interactive():
         birth_date = birth_date if birth_date else None
         spouse_birth_date = spouse_birth_date if spouse_birth_date else None
         wedding_date = wedding_date if wedding_date else None
-        checker = MPINChecker(digit_length=6)
+        checker = get_checker(6)
         strength, reasons = checker.check_strength(pin, birth_date, spouse_birth_date, wedding_date)
         print(f"PIN strength: {strength}")
         print(f"Reasons: {reasons}")
@@ -174,10 +501,13 @@ def run_tests():
         {"part": "C", "digit_length": 6, "pin": "987654", "birth_date": None, "spouse_birth_date": None, "wedding_date": None, "expected": ("WEAK", ["COMMONLY_USED"])},
         {"part": "C", "digit_length": 6, "pin": "020198", "birth_date": "02-01-1998", "spouse_birth_date": None, "wedding_date": None, "expected": ("WEAK", ["DEMOGRAPHIC_DOB_SELF"])},
         {"part": "C", "digit_length": 6, "pin": "750293", "birth_date": "02-01-1998", "spouse_birth_date": "15-06-1995", "wedding_date": "10-07-2020", "expected": ("STRONG", [])},
+        {"part": "C", "digit_length": 5, "pin": "20198", "birth_date": "02-01-1998", "spouse_birth_date": None, "wedding_date": None, "expected": ("WEAK", ["DEMOGRAPHIC_DOB_SELF"])},
+        {"part": "C", "digit_length": 8, "pin": "11223344", "birth_date": None, "spouse_birth_date": None, "wedding_date": None, "expected": ("WEAK", ["COMMONLY_USED"])},
+        {"part": "C", "digit_length": 8, "pin": "19980102", "birth_date": "02-01-1998", "spouse_birth_date": None, "wedding_date": None, "expected": ("WEAK", ["DEMOGRAPHIC_DOB_SELF"])},
     ]
 
     for test_index, test in enumerate(test_cases, 1):
-        checker = MPINChecker(digit_length=test["digit_length"])
+        checker = get_checker(test["digit_length"])
         pin = test["pin"]
         if test["part"] == "A":
             result = checker.is_common(pin)
@@ -186,7 +516,7 @@ def run_tests():
             birth_date = test.get("birth_date")
             spouse_birth_date = test.get("spouse_birth_date")
             wedding_date = test.get("wedding_date")
-            strength = checker.check_strength(pin, birth_date, spouse_birth_date, wedding_date)[0]
+            strength = checker.check_strength(pin, birth_date, spouse_birth_date, wedding_date, mode=MODE_STRENGTH)[0]
             assert strength == test["expected"], f"Test {test_index} failed: Expected {test['expected']}, got {strength}"
         elif test["part"] == "C":
             birth_date = test.get("birth_date")
@@ -198,6 +528,12 @@ def run_tests():
         print(f"Test {test_index} passed")
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "audit":
+        from audit import main as audit_main
+        sys.exit(audit_main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "conformance":
+        from conformance import main as conformance_main
+        sys.exit(conformance_main(sys.argv[2:]))
     ch= "yes"
     while ch=="yes":
         run_interactive()
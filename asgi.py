@@ -0,0 +1,298 @@
+"""
+ASGI (asyncio) variant of the check API for many concurrent, slow clients.
+
+    pip install uvicorn
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+It serves the same contract as the Flask routes (see analysis.py), with the
+production error style of HTTP 200 and success=false:
+
+    POST /api/check_mpin          one check, run directly on the event loop
+    POST /api/check_mpin/batch    NDJSON in and out; each chunk of lines is
+                                  checked in a thread pool
+    POST /api/profile
+    GET  /api/cache_stats, /metrics, /health, /ready, /ping
+
+With MPIN_PROFILE_SECRET or MPIN_PROFILE_SAMPLE set, profiled requests get
+a Server-Timing header (see request_profiler.py).
+
+A single warm check takes tens of microseconds, so it runs inline. Anything
+that can take longer runs in the executor, so the event loop never blocks:
+batch chunks, and any check that arrives before warm-up has built the
+tables. Warm-up starts at lifespan startup (or on the first request if the
+server does not send lifespan events), and /ready answers 503 until it
+finishes.
+"""
+import asyncio
+import contextvars
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import parse_qs
+
+from factory import StartupReport, run_warm_up
+from logs import configure_logging, get_logger
+from metrics import CONTENT_TYPE, collect_request_timings, observe_request, render, request_timings, stage
+from request_profiler import PROFILE_HEADER, request_profiler, server_timing
+
+MAX_BODY_BYTES = 64 * 1024
+EXECUTOR_WORKERS_ENV = 'MPIN_ASGI_EXECUTOR_WORKERS'
+DEFAULT_EXECUTOR_WORKERS = 4
+
+configure_logging()
+logger = get_logger('asgi')
+_json_parse_metric = stage('json_parse')
+PROFILE_HEADER_KEY = PROFILE_HEADER.lower().encode()
+
+
+def encode_json(body):
+    return json.dumps(body, separators=(',', ':'), sort_keys=True).encode()
+
+
+async def send_response(send, status, payload, content_type=b'application/json'):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', content_type), (b'content-length', str(len(payload)).encode())],
+    })
+    await send({'type': 'http.response.body', 'body': payload})
+
+
+async def send_json(send, body, status=200):
+    await send_response(send, status, encode_json(body))
+
+
+async def read_body(receive, limit=MAX_BODY_BYTES):
+    """The whole request body, or None once it exceeds limit bytes"""
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+def decode_json(body):
+    try:
+        return json.loads(body)
+    except (ValueError, RecursionError):
+        # RecursionError: a deeply nested body such as [[[[...]]]] is rejected like malformed JSON
+        return None
+
+
+class CheckApp:
+    """ASGI application serving the check API on one event loop"""
+
+    def __init__(self, executor_workers=None):
+        self.report = StartupReport()
+        self.executor = ThreadPoolExecutor(
+            max_workers=executor_workers or int(os.environ.get(EXECUTOR_WORKERS_ENV, DEFAULT_EXECUTOR_WORKERS)),
+            thread_name_prefix='mpin-asgi')
+        # Server-Timing only; cProfile would mix in every other request on the loop
+        self.profiler = request_profiler if request_profiler.enabled else None
+        if self.profiler is not None:
+            collect_request_timings()
+        self.routes = {
+            ('POST', '/api/check_mpin'): self.check_mpin,
+            ('POST', '/api/check_mpin/batch'): self.check_mpin_batch,
+            ('POST', '/api/profile'): self.create_profile,
+            ('GET', '/api/cache_stats'): self.cache_stats,
+            ('GET', '/metrics'): self.prometheus_metrics,
+            ('GET', '/health'): self.health,
+            ('GET', '/ready'): self.readiness,
+            ('GET', '/ping'): self.ping,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+        self.start_warm_up()
+        started = time.perf_counter()
+        handler = self.routes.get((scope['method'], scope['path']))
+        if handler is None:
+            await send_json(send, {'success': False, 'error': 'Not found'}, 404)
+            observe_request('unmatched', 404, time.perf_counter() - started)
+            return
+        profiling = None
+        if self.profiler is not None and self.profiler.wants(dict(scope['headers']).get(PROFILE_HEADER_KEY)):
+            profiling = request_timings.set({})
+            send = self.with_server_timing(send)
+        status = []
+
+        async def send_recording_status(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+            await send(message)
+
+        await handler(scope, receive, send_recording_status)
+        observe_request(scope['path'], status[0] if status else 0, time.perf_counter() - started)
+        if profiling is not None:
+            request_timings.reset(profiling)
+        first_response_ms = self.report.record_first_response()
+        if first_response_ms is not None:
+            logger.info("First response after %.1fms", first_response_ms)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self.start_warm_up()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def start_warm_up(self):
+        if self.report.state == 'starting':
+            self.report.state = 'warming'
+            self.executor.submit(run_warm_up, self.report, logger)
+
+    async def run_blocking(self, func, *args):
+        # In this request's context, so stage timings reach its Server-Timing header
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(self.executor, context.run, func, *args)
+
+    def with_server_timing(self, send):
+        """send, adding a Server-Timing header with this request's stage timings"""
+        timings = request_timings.get()
+        started = time.perf_counter()
+
+        async def send_with_server_timing(message):
+            if message['type'] == 'http.response.start':
+                header = server_timing(timings, time.perf_counter() - started).encode()
+                message = dict(message, headers=list(message.get('headers', ())) + [(b'server-timing', header)])
+            await send(message)
+        return send_with_server_timing
+
+    async def check_mpin(self, scope, receive, send):
+        from analysis import check_mpin_request
+
+        body = await read_body(receive)
+        if body is None:
+            await send_json(send, {'success': False, 'error': 'Request body too large'}, 413)
+            return
+        started = time.perf_counter()
+        data = decode_json(body)
+        _json_parse_metric.observe(time.perf_counter() - started)
+        try:
+            if self.report.ready:
+                result, _ = check_mpin_request(data)
+            else:
+                # Cold tables may still be building: keep the loop free
+                result, _ = await self.run_blocking(check_mpin_request, data)
+        except Exception as e:
+            logger.exception("Error in check_mpin")
+            result = {'success': False, 'error': f'An error occurred: {str(e)}'}
+        await send_json(send, result)
+
+    async def check_mpin_batch(self, scope, receive, send):
+        from batch import MAX_LINE_BYTES, NDJSON_MIMETYPE, RECORDS_PER_CHUNK, check_lines, parse_mode
+
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        try:
+            mode = parse_mode(query.get('mode', [None])[0])
+        except ValueError as e:
+            await send_json(send, {'success': False, 'error': str(e)}, 400)
+            return
+
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': [(b'content-type', NDJSON_MIMETYPE.encode())]})
+        pending = []
+        buffer = b''
+        line_number = 0
+        oversized = False
+
+        async def flush():
+            if pending:
+                text = await self.run_blocking(check_lines, list(pending), mode)
+                pending.clear()
+                if text:
+                    await send({'type': 'http.response.body', 'body': text.encode(), 'more_body': True})
+
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            buffer += message.get('body', b'')
+            more_body = message.get('more_body', False)
+            if not more_body and buffer and not buffer.endswith(b'\n'):
+                buffer += b'\n'
+            # Scan with an offset and cut the buffer once per message, not once per line
+            start = 0
+            while True:
+                end = buffer.find(b'\n', start)
+                if end < 0:
+                    if len(buffer) - start > MAX_LINE_BYTES:
+                        # Drop the oversized line as it streams in; report it once it ends
+                        start = len(buffer)
+                        oversized = True
+                    break
+                line = buffer[start:end + 1]
+                length = end - start
+                start = end + 1
+                line_number += 1
+                if oversized or length > MAX_LINE_BYTES:
+                    pending.append((line_number, None, f'Line exceeds {MAX_LINE_BYTES} bytes'))
+                    oversized = False
+                else:
+                    pending.append((line_number, line, None))
+                if len(pending) >= RECORDS_PER_CHUNK:
+                    await flush()
+            buffer = buffer[start:]
+            if not more_body:
+                break
+        await flush()
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def create_profile(self, scope, receive, send):
+        from analysis import create_profile_request
+
+        data = decode_json(await read_body(receive) or b'')
+        try:
+            if self.report.ready:
+                result, _ = create_profile_request(data)
+            else:
+                # Building the forbidden table needs the checkers, which may still be warming up
+                result, _ = await self.run_blocking(create_profile_request, data)
+        except Exception as e:
+            logger.exception("Error in create_profile")
+            result = {'success': False, 'error': f'An error occurred: {str(e)}'}
+        await send_json(send, result)
+
+    async def cache_stats(self, scope, receive, send):
+        from result_cache import result_cache
+        await send_json(send, dict(result_cache.stats(), success=True))
+
+    async def prometheus_metrics(self, scope, receive, send):
+        await send_response(send, 200, render().encode(), CONTENT_TYPE.encode())
+
+    async def health(self, scope, receive, send):
+        await send_json(send, {
+            'status': 'healthy',
+            'timestamp': datetime.now().isoformat(),
+            'service': 'MPIN Analyzer',
+            'environment': 'production'
+        })
+
+    async def readiness(self, scope, receive, send):
+        await send_json(send, dict(self.report.as_dict(), warmup='background'),
+                        200 if self.report.ready else 503)
+
+    async def ping(self, scope, receive, send):
+        await send_response(send, 200, b'pong', b'text/plain; charset=utf-8')
+
+
+app = CheckApp()
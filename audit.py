@@ -0,0 +1,183 @@
+"""
+Population audit over large CSV files of PINs and dates.
+
+Usage:
+    python app.py audit users.csv [--output verdicts.csv] [--summary summary.json]
+                                  [--workers N] [--chunk-size N]
+
+The input CSV needs a header row with a "pin" column. The columns
+"birth_date", "spouse_birth_date", "wedding_date" and "id" are optional.
+Rows are read in chunks and handed to a process pool, where each worker
+keeps its own warm checkers. Workers return one small int mask per row.
+Verdicts are written in input order while at most a few chunks are in
+flight, so memory stays bounded for any file size.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from app import SUPPORTED_DIGIT_LENGTHS, get_checker, reason_names, strength_from_flags
+from batch import DATE_FIELDS, record_flags
+
+OUTPUT_FIELDS = ['row', 'id', 'strength', 'reasons']
+PROGRESS_INTERVAL = 2.0
+
+
+def warm_worker():
+    """Process-pool initializer: build the shared checkers once per worker"""
+    for digit_length in SUPPORTED_DIGIT_LENGTHS:
+        get_checker(digit_length)
+
+
+def check_chunk(rows):
+    """Check a chunk of (pin, birth_date, ...) rows; one int mask per row, -1 if INVALID"""
+    verdicts = []
+    for row in rows:
+        _, flags = record_flags(dict(zip(('pin',) + DATE_FIELDS, row)))
+        verdicts.append(-1 if flags is None else int(flags))
+    return verdicts
+
+
+def verdict_flags(verdict):
+    return None if verdict < 0 else verdict
+
+
+def iter_chunks(reader, chunk_size):
+    """Yield (ids, rows) chunks from a csv.DictReader"""
+    while True:
+        records = list(islice(reader, chunk_size))
+        if not records:
+            return
+        ids = [record.get('id') or '' for record in records]
+        rows = [tuple(record.get(field) or '' for field in ('pin',) + DATE_FIELDS) for record in records]
+        yield ids, rows
+
+
+class AuditProgress:
+    """Running totals and periodic records/sec reports on stderr"""
+
+    def __init__(self, stream=sys.stderr, interval=PROGRESS_INTERVAL):
+        self.stream = stream
+        self.interval = interval
+        self.started = time.perf_counter()
+        self.last_report = self.started
+        self.records = 0
+        self.masks = Counter()
+
+    def add(self, verdicts):
+        self.records += len(verdicts)
+        self.masks.update(verdicts)
+        now = time.perf_counter()
+        if now - self.last_report >= self.interval:
+            self.last_report = now
+            self.report(now)
+
+    def report(self, now=None):
+        elapsed = (now or time.perf_counter()) - self.started
+        rate = self.records / elapsed if elapsed else 0.0
+        print(f"[audit] {self.records:,} records in {elapsed:.1f}s ({rate:,.0f} records/sec)",
+              file=self.stream, flush=True)
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        strengths = Counter()
+        reasons = Counter()
+        for verdict, count in self.masks.items():
+            flags = verdict_flags(verdict)
+            strengths[strength_from_flags(flags)] += count
+            for name in reason_names(flags or 0):
+                reasons[name] += count
+        return {
+            'records': self.records,
+            'elapsed_seconds': round(elapsed, 3),
+            'records_per_second': round(self.records / elapsed, 1) if elapsed else 0.0,
+            'strength': dict(strengths),
+            'reasons': dict(reasons),
+        }
+
+
+def run_audit(input_file, output_file, workers=None, chunk_size=5000, progress=None):
+    """Audit every row of input_file, writing verdict rows to output_file; returns the summary"""
+    reader = csv.DictReader(input_file)
+    if not reader.fieldnames or 'pin' not in reader.fieldnames:
+        raise ValueError("Input CSV must have a header row with a 'pin' column")
+    writer = csv.writer(output_file)
+    writer.writerow(OUTPUT_FIELDS)
+    progress = progress or AuditProgress()
+    row_number = 0
+
+    def write(ids, verdicts):
+        nonlocal row_number
+        for record_id, verdict in zip(ids, verdicts):
+            flags = verdict_flags(verdict)
+            row_number += 1
+            writer.writerow([row_number, record_id, strength_from_flags(flags),
+                             ';'.join(reason_names(flags or 0))])
+        progress.add(verdicts)
+
+    chunks = iter_chunks(reader, chunk_size)
+    if workers == 0:
+        warm_worker()
+        for ids, rows in chunks:
+            write(ids, check_chunk(rows))
+    else:
+        workers = workers or os.cpu_count() or 1
+        max_in_flight = workers * 2
+        with ProcessPoolExecutor(max_workers=workers, initializer=warm_worker) as pool:
+            pending = deque()
+            for ids, rows in chunks:
+                pending.append((ids, pool.submit(check_chunk, rows)))
+                if len(pending) >= max_in_flight:
+                    ids, future = pending.popleft()
+                    write(ids, future.result())
+            while pending:
+                ids, future = pending.popleft()
+                write(ids, future.result())
+
+    progress.report()
+    return progress.summary()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python app.py audit',
+                                     description='Audit a CSV of PINs and dates for weak MPINs')
+    parser.add_argument('input', help="CSV file with a 'pin' column ('-' for stdin)")
+    parser.add_argument('--output', default='-', help="Where to write per-record verdicts (default: stdout)")
+    parser.add_argument('--summary', help="Also write the summary as JSON to this file")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes (default: CPU count, 0 = run in-process)")
+    parser.add_argument('--chunk-size', type=int, default=5000, help="Rows per work unit (default: 5000)")
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1:
+        parser.error('--chunk-size must be at least 1')
+    if args.workers is not None and args.workers < 0:
+        parser.error('--workers must not be negative')
+
+    input_file = sys.stdin if args.input == '-' else open(args.input, newline='', encoding='utf-8')
+    output_file = sys.stdout if args.output == '-' else open(args.output, 'w', newline='', encoding='utf-8')
+    try:
+        summary = run_audit(input_file, output_file, args.workers, args.chunk_size)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+    print(json.dumps(summary, indent=2), file=sys.stderr)
+    if args.summary:
+        with open(args.summary, 'w', encoding='utf-8') as summary_file:
+            json.dump(summary, summary_file, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
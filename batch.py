@@ -0,0 +1,123 @@
+"""
+Streaming NDJSON batch checks for /api/check_mpin/batch.
+
+Each input line is a JSON object with a "pin" and the optional
+"birth_date", "spouse_birth_date" and "wedding_date" fields. Each output
+line is the verdict for the matching input line. The body is read one
+line at a time and the verdicts are written out in small chunks, so
+memory use does not depend on the size of the request. With ?mode=strength
+the checks stop at the first rule that hits, so "reasons" holds at most
+one entry.
+"""
+import json
+
+from app import (
+    MODE_REASONS, MODE_STRENGTH, SUPPORTED_DIGIT_LENGTHS, get_checker, reason_names, strength_from_flags,
+)
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+MAX_LINE_BYTES = 4096
+RECORDS_PER_CHUNK = 64
+DATE_FIELDS = ('birth_date', 'spouse_birth_date', 'wedding_date')
+
+
+def iter_ndjson_lines(stream, max_line_bytes=MAX_LINE_BYTES):
+    """Yield (line_number, line_bytes, error) for each line, reading one bounded line at a time"""
+    line_number = 0
+    while True:
+        line = stream.readline(max_line_bytes + 1)
+        if not line:
+            return
+        line_number += 1
+        if len(line) > max_line_bytes and not line.endswith(b'\n'):
+            # Drain the rest of the oversized line without keeping it
+            while line and not line.endswith(b'\n'):
+                line = stream.readline(max_line_bytes + 1)
+            yield line_number, None, f'Line exceeds {max_line_bytes} bytes'
+            continue
+        yield line_number, line, None
+
+
+def record_flags(record, mode=MODE_REASONS):
+    """Return (pin, Reason flags or None) for one decoded record, as check_flags would"""
+    if not isinstance(record, dict):
+        raise ValueError('Record must be a JSON object')
+    pin = record.get('pin')
+    if not isinstance(pin, str):
+        raise ValueError('Record must contain a string "pin"')
+    pin = pin.strip()
+    dates = []
+    for field in DATE_FIELDS:
+        value = record.get(field) or ''
+        if not isinstance(value, str):
+            raise ValueError(f'"{field}" must be a string')
+        dates.append(value.strip() or None)
+
+    if pin.isdigit() and len(pin) in SUPPORTED_DIGIT_LENGTHS:
+        return pin, get_checker(len(pin)).check_flags(pin, *dates, mode=mode)
+    # check_strength reports any PIN of the wrong shape as INVALID
+    return pin, None
+
+
+def check_record(record, mode=MODE_REASONS):
+    """Check one decoded record with the same semantics as MPINChecker.check_strength"""
+    pin, flags = record_flags(record, mode)
+    return {'success': True, 'pin': pin, 'strength': strength_from_flags(flags),
+            'reasons': reason_names(flags or 0)}
+
+
+def parse_mode(value):
+    """Validate a ?mode= value; strength mode stops at the first rule that hits"""
+    mode = value or MODE_REASONS
+    if mode not in (MODE_REASONS, MODE_STRENGTH):
+        raise ValueError(f'mode must be "{MODE_REASONS}" or "{MODE_STRENGTH}"')
+    return mode
+
+
+def line_verdict(line_number, line, error=None, mode=MODE_REASONS):
+    """Verdict dict for one input line, or None for a blank line; bad records get an error verdict"""
+    if error is None:
+        if not line.strip():
+            return None
+        try:
+            record = json.loads(line)
+            verdict = check_record(record, mode)
+            if 'id' in record:
+                verdict['id'] = record['id']
+        except (ValueError, TypeError, RecursionError) as e:
+            # RecursionError: a deeply nested line such as [[[[...]]]] must not end the stream
+            error = str(e)
+    if error is not None:
+        verdict = {'success': False, 'error': error}
+    verdict['line'] = line_number
+    return verdict
+
+
+def iter_batch_verdicts(stream, mode=MODE_REASONS):
+    """Yield one verdict dict per non-blank input line"""
+    for line_number, line, error in iter_ndjson_lines(stream):
+        verdict = line_verdict(line_number, line, error, mode)
+        if verdict is not None:
+            yield verdict
+
+
+def serialize_verdicts(verdicts):
+    return ''.join(json.dumps(verdict, separators=(',', ':')) + '\n' for verdict in verdicts)
+
+
+def check_lines(lines, mode=MODE_REASONS):
+    """NDJSON verdicts for a list of (line_number, line, error) tuples, as one string"""
+    verdicts = (line_verdict(line_number, line, error, mode) for line_number, line, error in lines)
+    return serialize_verdicts(verdict for verdict in verdicts if verdict is not None)
+
+
+def iter_batch_response(stream, mode=MODE_REASONS, records_per_chunk=RECORDS_PER_CHUNK):
+    """Serialize verdicts as NDJSON, flushing every records_per_chunk lines"""
+    chunk = []
+    for verdict in iter_batch_verdicts(stream, mode):
+        chunk.append(verdict)
+        if len(chunk) >= records_per_chunk:
+            yield serialize_verdicts(chunk)
+            chunk = []
+    if chunk:
+        yield serialize_verdicts(chunk)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ASGI (uvicorn asgi:app) vs WSGI (gunicorn wsgi:app, Werkzeug dev
+server) under many slow clients.
+
+Each simulated mobile client holds one keep-alive connection, sends the
+request headers, waits --trickle-ms before sending the body (a slow uplink),
+then waits --think-ms before its next request. Latency runs from the last
+request byte sent to the last response byte read, so it includes any time
+the request spent queued in the server. Every server runs as one process.
+
+Run from the project root (needs gunicorn and uvicorn installed):
+    python benchmarks/bench_asgi_vs_wsgi.py --concurrency 10 100 500
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from loadgen import REQUEST_BODIES, SERVERS as VARIANTS, percentile, read_response, request_head, start_server, stop_server
+
+SERVERS = {
+    "asgi (uvicorn)": VARIANTS["asgi"],
+    "wsgi (gunicorn 1x4 gthread)": VARIANTS["wsgi"],
+    "wsgi (werkzeug dev)": VARIANTS["simple_run"],
+}
+
+
+async def client(port, index, deadline, trickle, think, latencies, errors):
+    reader = writer = None
+    sent = index
+    while time.perf_counter() < deadline:
+        body = REQUEST_BODIES[sent % len(REQUEST_BODIES)]
+        sent += 1
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(request_head("127.0.0.1", len(body)))
+            await writer.drain()
+            await asyncio.sleep(trickle)
+            writer.write(body)
+            await writer.drain()
+            began = time.perf_counter()
+            status, _, keep_alive = await asyncio.wait_for(read_response(reader), timeout=30)
+            if status != 200:
+                errors.append(status)
+            else:
+                latencies.append(time.perf_counter() - began)
+            if not keep_alive:
+                writer.close()
+                reader = writer = None
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError) as e:
+            errors.append(type(e).__name__)
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+        await asyncio.sleep(think)
+    if writer is not None:
+        writer.close()
+
+
+async def run_level(port, concurrency, duration, trickle, think):
+    latencies = []
+    errors = []
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(client(port, index, deadline, trickle, think, latencies, errors)
+                           for index in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ASGI vs WSGI under many slow clients")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per concurrency level")
+    parser.add_argument("--trickle-ms", type=float, default=50.0, help="delay between headers and body")
+    parser.add_argument("--think-ms", type=float, default=100.0, help="delay between a client's requests")
+    parser.add_argument("--servers", nargs="+", choices=list(SERVERS), default=list(SERVERS))
+    parser.add_argument("--port", type=int, default=5055)
+    args = parser.parse_args(argv)
+
+    results = {}
+    print(f"{'server':<30} {'conns':>6} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for offset, name in enumerate(args.servers):
+        port = args.port + offset
+        process = start_server(SERVERS[name], port, WEB_CONCURRENCY="1", GUNICORN_THREADS="4")
+        try:
+            results[name] = []
+            for concurrency in args.concurrency:
+                level = asyncio.run(run_level(port, concurrency, args.duration,
+                                              args.trickle_ms / 1000, args.think_ms / 1000))
+                results[name].append(level)
+                print(f"{name:<30} {concurrency:>6} {level['requests_per_second']:>8.1f} "
+                      f"{level['p50_ms'] or 0:>9.2f} {level['p99_ms'] or 0:>9.2f} {level['errors']:>7}")
+        finally:
+            stop_server(process)
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-request MPINChecker construction vs the shared registry.
+
+Run from the project root:
+    python benchmarks/bench_checker_registry.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import MPINChecker, get_checker
+
+REQUESTS = [
+    ("1234", None, None, None),
+    ("4839", "02-01-1998", "15-06-1995", "10-07-2020"),
+    ("020198", "02-01-1998", None, None),
+    ("750293", "02-01-1998", "15-06-1995", "10-07-2020"),
+]
+
+
+def per_request_construction():
+    for pin, birth_date, spouse_birth_date, wedding_date in REQUESTS:
+        checker = MPINChecker(digit_length=len(pin))
+        checker.check_strength(pin, birth_date, spouse_birth_date, wedding_date)
+        checker.is_common(pin)
+
+
+def shared_registry():
+    for pin, birth_date, spouse_birth_date, wedding_date in REQUESTS:
+        checker = get_checker(len(pin))
+        checker.check_strength(pin, birth_date, spouse_birth_date, wedding_date)
+        checker.is_common(pin)
+
+
+def main():
+    number = 2000
+    repeat = 5
+    requests_per_call = len(REQUESTS)
+    results = {}
+    for name, func in (("per-request MPINChecker()", per_request_construction),
+                       ("shared get_checker()", shared_registry)):
+        best = min(timeit.repeat(func, number=number, repeat=repeat))
+        results[name] = best / (number * requests_per_call) * 1e6
+        print(f"{name:<28} {results[name]:8.2f} us/request")
+
+    before, after = results.values()
+    print(f"{'saving':<28} {before - after:8.2f} us/request ({before / after:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cost of metrics collection on the request path.
+
+Measures one Histogram.observe() and one counter increment, the number of
+observations a typical /api/check_mpin request makes, and the full request
+through the Flask test client with METRICS on and off (the stage timings
+in the check itself are always recorded). The two apps are run in
+interleaved rounds and the best round of each is kept, since single runs
+of the test client are noisy.
+
+Run from the project root:
+    python benchmarks/bench_metrics.py
+"""
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('MPIN_LOG_LEVEL', 'WARNING')
+# Every request must run the full check rather than hit the result cache
+os.environ['MPIN_RESULT_CACHE_SIZE'] = '0'
+
+import metrics
+from config import DevelopmentConfig
+from factory import create_app
+
+REQUEST = {'pin': '750293', 'birth_date': '02-01-1998', 'spouse_birth_date': '15-06-1995',
+           'wedding_date': '10-07-2020'}
+NUMBER = 100000
+
+
+def per_call_us(func, number=NUMBER):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def observations_per_request(client):
+    def total():
+        return sum(sum(child.counts) for child in metrics.stage_duration._children.values())
+    before = total()
+    client.post('/api/check_mpin', json=REQUEST)
+    return total() - before
+
+
+def main():
+    histogram = metrics.Histogram()
+    results = {
+        'Histogram.observe()': per_call_us(lambda: histogram.observe(0.0002)),
+        'counter inc()': per_call_us(lambda: metrics.check_outcomes.inc('BENCH')),
+    }
+
+    DevelopmentConfig.METRICS = False
+    quiet_app = create_app('development', warmup='eager')
+    DevelopmentConfig.METRICS = True
+    metered_app = create_app('development', warmup='eager')
+    clients = {'/api/check_mpin, METRICS off': quiet_app.test_client(),
+               '/api/check_mpin, METRICS on': metered_app.test_client()}
+    stage_observations = observations_per_request(clients['/api/check_mpin, METRICS on'])
+    for _ in range(5):
+        for name, client in clients.items():
+            us = per_call_us(lambda: client.post('/api/check_mpin', json=REQUEST), number=1000)
+            results[name] = min(results.get(name, us), us)
+            time.sleep(0.2)
+
+    for name, us in results.items():
+        print(f"{name:<40} {us:8.2f} us/call")
+    print(f"{'stage observations per request':<40} {stage_observations:8d}")
+
+
+if __name__ == '__main__':
+    main()
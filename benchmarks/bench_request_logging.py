@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-request logging cost on the request thread.
+
+Compares the ten synchronous print() calls enhanced_run.py used to make per
+/api/check_mpin request with one structured record through logs.py (kept,
+sampled at 1%, or with request logging off). It also measures the full
+request through the Flask test client with LOG_REQUESTS on and off. All
+output goes to os.devnull, so only the caller-side cost is measured.
+
+Run from the project root:
+    python benchmarks/bench_request_logging.py
+"""
+import contextlib
+import logging
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logs
+from logs import configure_logging, get_logger, log_event
+
+DEVNULL = open(os.devnull, 'w', buffering=1)
+configure_logging(level='INFO', sample='', style='json', stream=DEVNULL)
+
+from factory import create_app, install_request_logging
+
+REQUEST = {'pin': '750293', 'birth_date': '02-01-1998', 'spouse_birth_date': '15-06-1995',
+           'wedding_date': '10-07-2020'}
+NUMBER = 20000
+
+
+def old_prints():
+    data = REQUEST
+    pin = data['pin']
+    with contextlib.redirect_stdout(DEVNULL):
+        print("🔍 API Request received: POST http://localhost/api/check_mpin")
+        print(f"📝 Request data: {data}")
+        print(f"🔢 PIN: {pin}, Birth: {data['birth_date']}, Spouse: {data['spouse_birth_date']}, "
+              f"Wedding: {data['wedding_date']}")
+        print("✅ PIN validation passed")
+        print(f"🔧 Using shared MPINChecker for length {len(pin)}")
+        print("🔍 Checking strength...")
+        print("📊 Strength: STRONG, Reasons: []")
+        print("🔍 Checking if common...")
+        print("📊 Is common: False")
+        print("✅ Sending successful response")
+
+
+request_log = get_logger('request')
+
+
+def structured_record():
+    log_event(request_log, logging.INFO, 'request', {
+        'method': 'POST', 'path': '/api/check_mpin', 'status': 200, 'duration_ms': 0.2,
+        'pin_length': 6, 'strength': 'STRONG', 'reasons': [],
+    })
+
+
+def per_call_us(func, number=NUMBER):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    results = {'10 x print() (old enhanced_run)': per_call_us(old_prints),
+               'structured record, kept': per_call_us(structured_record)}
+    logs._sample_rates[logging.INFO] = 0.01
+    results['structured record, INFO sampled 1%'] = per_call_us(structured_record)
+    del logs._sample_rates[logging.INFO]
+    time.sleep(1)  # let the writer thread drain before the end-to-end runs
+
+    # Interleave the two apps and keep the best round of each, as single runs are noisy
+    # Both apps use the development config, so only the request logging hooks differ
+    quiet_app = create_app('development', warmup='eager')
+    logged_app = create_app('development', warmup='eager')
+    install_request_logging(logged_app)
+    clients = {'/api/check_mpin, LOG_REQUESTS off': quiet_app.test_client(),
+               '/api/check_mpin, LOG_REQUESTS on': logged_app.test_client()}
+    for _ in range(5):
+        for name, client in clients.items():
+            us = per_call_us(lambda: client.post('/api/check_mpin', json=REQUEST), number=1000)
+            results[name] = min(results.get(name, us), us)
+            time.sleep(0.2)
+
+    for name, us in results.items():
+        print(f"{name:<40} {us:8.2f} us/request")
+    print(f"{'logs.stats':<40} {logs.stats.as_dict()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Load test for POST /api/check_mpin, closed- or open-loop.
+
+Starts each app variant locally, one at a time, and loads it over a pool
+of asyncio keep-alive connections:
+
+    simple_run       python simple_run.py (Werkzeug, production mode)
+    production_app   python production_app.py (Werkzeug)
+    wsgi             gunicorn -c gunicorn.conf.py wsgi:app
+    asgi             uvicorn asgi:app (needs uvicorn installed)
+
+--arrival picks how requests are sent:
+
+    closed           each connection sends its next request as soon as the
+                     previous response arrives, for --duration seconds
+    uniform/poisson  requests are sent at a fixed target --rate (open loop)
+
+The traffic mix is set with --mix as weights per request kind:
+
+    fixed                    the four requests in loadgen.REQUESTS
+    pin4, pin6               random 4- or 6-digit PIN, no dates
+    pin4_dates, pin6_dates   random PIN plus dates from a pool of --users people
+    invalid                  bad input: letters, wrong length, empty PIN,
+                             malformed JSON or no body
+
+In open-loop mode each request is scheduled at its arrival time. If every
+connection is busy, it waits in a queue, and its latency is measured from
+the scheduled time rather than the time it was sent. A server that falls
+behind therefore shows up in the percentiles instead of quietly slowing the
+load down. In closed-loop mode latency runs from send to response.
+
+A response counts as an error when the transport fails, the status is not
+200 (or 400 for invalid input), a valid request is answered with
+success=false, or an invalid one with success=true. The results are
+printed as JSON, one object per variant.
+
+Run from the project root:
+    python benchmarks/load_check_mpin.py --variants wsgi --rate 300 --duration 30
+    python benchmarks/load_check_mpin.py --variants simple_run wsgi --arrival closed --mix fixed=1
+    python benchmarks/load_check_mpin.py --url http://127.0.0.1:5000 --rate 100
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from urllib.parse import urlsplit
+
+from loadgen import REQUEST_BODIES, SERVERS, percentile, read_response, request_head, start_server, stop_server
+
+DEFAULT_MIX = "pin4=30,pin4_dates=20,pin6=20,pin6_dates=20,invalid=10"
+KINDS = ("fixed", "pin4", "pin4_dates", "pin6", "pin6_dates", "invalid")
+PERCENTILES = (("p50", 0.50), ("p95", 0.95), ("p99", 0.99), ("p99.9", 0.999))
+
+
+def parse_mix(value):
+    """"pin4=30,invalid=10" -> {"pin4": 30.0, "invalid": 10.0}"""
+    mix = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        kind, _, weight = item.partition("=")
+        if kind not in KINDS:
+            raise argparse.ArgumentTypeError(f"unknown request kind {kind!r}; choose from {', '.join(KINDS)}")
+        mix[kind] = float(weight)
+    if not mix or sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError("--mix needs at least one positive weight")
+    return mix
+
+
+def random_date(rng):
+    return f"{rng.randint(1, 28):02d}-{rng.randint(1, 12):02d}-{rng.randint(1950, 2020)}"
+
+
+class TrafficMix:
+    """Builds request bodies for the weighted mix of request kinds"""
+
+    def __init__(self, mix, users, seed):
+        self.rng = random.Random(seed)
+        self.kinds = list(mix)
+        self.weights = list(mix.values())
+        self.people = [{"birth_date": random_date(self.rng),
+                        "spouse_birth_date": random_date(self.rng) if self.rng.random() < 0.6 else "",
+                        "wedding_date": random_date(self.rng) if self.rng.random() < 0.5 else ""}
+                       for _ in range(users)]
+
+    def next_request(self):
+        """(kind, body bytes)"""
+        kind = self.rng.choices(self.kinds, self.weights)[0]
+        if kind == "fixed":
+            return kind, self.rng.choice(REQUEST_BODIES)
+        if kind == "invalid":
+            return kind, self.invalid_body()
+        digits = 4 if kind.startswith("pin4") else 6
+        request = {"pin": f"{self.rng.randrange(10 ** digits):0{digits}d}"}
+        if kind.endswith("_dates"):
+            request.update(self.rng.choice(self.people))
+        return kind, json.dumps(request).encode()
+
+    def invalid_body(self):
+        choice = self.rng.randrange(5)
+        if choice == 0:
+            return json.dumps({"pin": "12a4"}).encode()
+        if choice == 1:
+            return json.dumps({"pin": "123"}).encode()
+        if choice == 2:
+            return json.dumps({"pin": "", "birth_date": "02-01-1998"}).encode()
+        if choice == 3:
+            return b'{"pin": "1234"'
+        return b""
+
+
+def response_error(kind, status, body):
+    """None if the response is what this kind of request should get, else a short error label"""
+    if status not in (200, 400):
+        return f"status {status}"
+    try:
+        success = json.loads(body).get("success")
+    except ValueError:
+        return "bad json"
+    if kind == "invalid":
+        return "accepted invalid input" if success else None
+    return None if success and status == 200 else "rejected valid input"
+
+
+class Results:
+    def __init__(self):
+        self.latencies = []
+        self.by_kind = {kind: {"requests": 0, "errors": 0} for kind in KINDS}
+        self.errors = {}
+
+    def record(self, kind, latency, error=None):
+        self.by_kind[kind]["requests"] += 1
+        if error is None:
+            self.latencies.append(latency)
+            return
+        self.by_kind[kind]["errors"] += 1
+        self.errors[error] = self.errors.get(error, 0) + 1
+
+
+class Connection:
+    """One keep-alive connection, reopened after a failure or a Connection: close"""
+
+    def __init__(self, host, port, timeout):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.reader = self.writer = None
+
+    async def send(self, kind, body, began, results):
+        """Send body and record the response against the began timestamp"""
+        try:
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            self.writer.write(request_head(self.host, len(body)) + body)
+            await self.writer.drain()
+            status, response_body, keep_alive = await asyncio.wait_for(read_response(self.reader), self.timeout)
+            results.record(kind, time.perf_counter() - began, response_error(kind, status, response_body))
+            if not keep_alive:
+                self.close()
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError,
+                ValueError) as e:
+            results.record(kind, time.perf_counter() - began, type(e).__name__)
+            self.close()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+async def open_loop_worker(connection, queue, results):
+    while True:
+        item = await queue.get()
+        if item is None:
+            break
+        scheduled, kind, body = item
+        await connection.send(kind, body, scheduled, results)
+    connection.close()
+
+
+async def closed_loop_worker(connection, traffic, deadline, results):
+    while time.perf_counter() < deadline:
+        kind, body = traffic.next_request()
+        await connection.send(kind, body, time.perf_counter(), results)
+    connection.close()
+
+
+async def run_load(host, port, traffic, rate, duration, connections, arrival, timeout):
+    """Load the server for duration seconds; returns the results summary"""
+    results = Results()
+    started = time.perf_counter()
+    if arrival == "closed":
+        deadline = started + duration
+        await asyncio.gather(*(closed_loop_worker(Connection(host, port, timeout), traffic, deadline, results)
+                               for _ in range(connections)))
+        elapsed = time.perf_counter() - started
+        return summarize(results, len(results.latencies) + sum(results.errors.values()), None, elapsed, None,
+                         connections, 0)
+
+    queue = asyncio.Queue()
+    workers = [asyncio.create_task(open_loop_worker(Connection(host, port, timeout), queue, results))
+               for _ in range(connections)]
+    rng = random.Random(0)
+    total = int(rate * duration)
+    scheduled = started
+    max_backlog = 0
+    for _ in range(total):
+        scheduled += rng.expovariate(rate) if arrival == "poisson" else 1 / rate
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        kind, body = traffic.next_request()
+        queue.put_nowait((scheduled, kind, body))
+        max_backlog = max(max_backlog, queue.qsize())
+    sending_seconds = time.perf_counter() - started
+    for _ in workers:
+        queue.put_nowait(None)
+    await asyncio.gather(*workers)
+    elapsed = time.perf_counter() - started
+    return summarize(results, total, rate, elapsed, sending_seconds, connections, max_backlog)
+
+
+def summarize(results, total, rate, elapsed, sending_seconds, connections, max_backlog):
+    latencies = sorted(results.latencies)
+    errors = sum(results.errors.values())
+    return {
+        "target_rate": rate,
+        "connections": connections,
+        "requests": total,
+        "ok": len(latencies),
+        "errors": errors,
+        "error_rate": round(errors / total, 5) if total else 0.0,
+        "errors_by_type": results.errors,
+        "by_kind": {kind: counts for kind, counts in results.by_kind.items() if counts["requests"]},
+        "elapsed_seconds": round(elapsed, 3),
+        # Below target_rate when the load generator itself could not keep up
+        "offered_rate": round(total / sending_seconds, 1) if sending_seconds else None,
+        "throughput": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "max_queued_requests": max_backlog,
+        "latency_ms": dict({name: round(percentile(latencies, fraction) * 1000, 3) if latencies else None
+                            for name, fraction in PERCENTILES},
+                           max=round(latencies[-1] * 1000, 3) if latencies else None),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Closed- or open-loop load test for /api/check_mpin")
+    parser.add_argument("--variants", nargs="+", choices=list(SERVERS), default=["wsgi"],
+                        help="app variants to start and load, one after another (default: wsgi)")
+    parser.add_argument("--url", help="load an already running server instead of starting variants")
+    parser.add_argument("--arrival", choices=("closed", "uniform", "poisson"), default="poisson",
+                        help="closed loop, or open-loop request arrivals at --rate (default poisson)")
+    parser.add_argument("--rate", type=float, default=200.0,
+                        help="open loop: target requests per second (default 200)")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of load per variant (default 20)")
+    parser.add_argument("--connections", type=int, default=64, help="keep-alive connections (default 64)")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"request kind weights (default {DEFAULT_MIX})")
+    parser.add_argument("--users", type=int, default=200, help="people in the date pool (default 200)")
+    parser.add_argument("--seed", type=int, default=1, help="traffic mix random seed (default 1)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers for the wsgi variant (default 2)")
+    parser.add_argument("--port", type=int, default=5077, help="port for started variants (default 5077)")
+    parser.add_argument("--output", help="also write the JSON results to this file")
+    args = parser.parse_args(argv)
+
+    def load(host, port):
+        traffic = TrafficMix(args.mix, args.users, args.seed)
+        return asyncio.run(run_load(host, port, traffic, args.rate, args.duration, args.connections,
+                                    args.arrival, args.timeout))
+
+    runs = []
+    if args.url:
+        parts = urlsplit(args.url)
+        runs.append(dict(variant=args.url, **load(parts.hostname, parts.port or 80)))
+    else:
+        for name in args.variants:
+            process = start_server(SERVERS[name], args.port, WEB_CONCURRENCY=str(args.workers),
+                                   MPIN_LOG_LEVEL="WARNING")
+            try:
+                runs.append(dict(variant=name, **load("127.0.0.1", args.port)))
+            finally:
+                stop_server(process)
+            print(f"{name}: {runs[-1]['throughput']} req/s, p99 {runs[-1]['latency_ms']['p99']} ms, "
+                  f"error rate {runs[-1]['error_rate']}", file=sys.stderr)
+
+    report = {"mix": args.mix, "arrival": args.arrival, "runs": runs}
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+Helpers shared by the HTTP load tools in this directory: the commands that
+start each app variant, a fixed request mix, and a minimal asyncio HTTP/1.1
+client for POST /api/check_mpin.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# App variants started from the project root; {port} is filled in at start
+SERVERS = {
+    "simple_run": [sys.executable, "simple_run.py"],
+    "production_app": [sys.executable, "production_app.py"],
+    "wsgi": ["gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"],
+    "asgi": ["uvicorn", "asgi:app", "--host", "127.0.0.1", "--port", "{port}", "--log-level", "warning"],
+}
+
+# 4- and 6-digit PINs with and without dates
+REQUESTS = [
+    {"pin": "1234"},
+    {"pin": "4839", "birth_date": "02-01-1998", "spouse_birth_date": "15-06-1995", "wedding_date": "10-07-2020"},
+    {"pin": "020198", "birth_date": "02-01-1998"},
+    {"pin": "750293", "birth_date": "02-01-1998", "spouse_birth_date": "15-06-1995", "wedding_date": "10-07-2020"},
+]
+REQUEST_BODIES = [json.dumps(request).encode() for request in REQUESTS]
+
+
+def start_server(command, port, **env):
+    """Start command with PORT=port (plus env) and return the process once /ready answers 200"""
+    env = dict(os.environ, PORT=str(port), **env)
+    process = subprocess.Popen([part.format(port=port) for part in command], cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{' '.join(command)} exited with status {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=1) as response:
+                if response.status == 200:
+                    return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{' '.join(command)} did not become ready on port {port}")
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def request_head(host, length):
+    """Request line and headers of a POST /api/check_mpin with a length-byte JSON body"""
+    return (b"POST /api/check_mpin HTTP/1.1\r\nHost: %s\r\n"
+            b"Content-Type: application/json\r\nContent-Length: %d\r\n\r\n" % (host.encode(), length))
+
+
+async def read_response(reader):
+    """(status, body, keep_alive) after reading one whole response"""
+    head = await reader.readuntil(b"\r\n\r\n")
+    version, status = head.split(b" ", 2)[:2]
+    keep_alive = version == b"HTTP/1.1"
+    length = 0
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        name = name.strip().lower()
+        if name == b"content-length":
+            length = int(value)
+        elif name == b"connection":
+            keep_alive = value.strip().lower() == b"keep-alive"
+    body = await reader.readexactly(length)
+    return int(status), body, keep_alive
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
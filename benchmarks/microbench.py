@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark suite with JSON baselines and regression gating.
+
+Covers MPINChecker construction, generate_common_pins,
+generate_demographic_combinations, date parsing and date matching (strptime
+and a set of combinations against the arithmetic parse_date_parts and
+match_date_layouts), check_strength (hit and miss, 4 and 6 digits, with
+and without dates) and POST /api/check_mpin through the Flask test client,
+with and without a result-cache hit.
+
+Each benchmark is calibrated to run for about --min-time seconds per
+round. The suite then runs --repeat rounds of every benchmark in turn,
+so a burst of load on the machine affects them all rather than one. The
+best round is reported, since the minimum is the most stable estimate on a
+shared machine.
+
+Save a baseline on a reference build, then compare later runs against it
+on the same machine. Comparisons use the times relative to a fixed
+reference workload measured alongside (see measure), so a machine that is
+briefly slower as a whole does not fail the run. A benchmark slower than its baseline by more than
+--threshold (a fraction, default 0.25) is measured again, up to --retries
+times. The run exits with status 1 if it is still slower after that.
+
+Run from the project root:
+    python benchmarks/microbench.py --save benchmarks/baseline.json
+    python benchmarks/microbench.py --compare benchmarks/baseline.json
+    python benchmarks/microbench.py --filter check_strength --compare benchmarks/baseline.json --threshold 0.1
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MPIN_LOG_LEVEL", "WARNING")
+
+from app import MPINChecker, get_checker, parse_date_parts
+
+DATES = ("02-01-1998", "15-06-1995", "10-07-2020")
+NO_DATES = (None, None, None)
+
+# name -> (pin, dates); hits are WEAK, misses STRONG
+CHECK_STRENGTH_CASES = {
+    "check_strength[4,hit,no_dates]": ("1234", NO_DATES),
+    "check_strength[4,miss,no_dates]": ("4839", NO_DATES),
+    "check_strength[4,hit,dates]": ("0201", DATES),
+    "check_strength[4,miss,dates]": ("4839", DATES),
+    "check_strength[6,hit,no_dates]": ("123456", NO_DATES),
+    "check_strength[6,miss,no_dates]": ("750293", NO_DATES),
+    "check_strength[6,hit,dates]": ("020198", DATES),
+    "check_strength[6,miss,dates]": ("750293", DATES),
+}
+
+CHECK_MPIN_REQUEST = {"pin": "750293", "birth_date": DATES[0], "spouse_birth_date": DATES[1],
+                      "wedding_date": DATES[2]}
+
+
+def checker_benchmarks():
+    benchmarks = {}
+    for digit_length in (4, 6):
+        checker = get_checker(digit_length)
+        benchmarks[f"MPINChecker.__init__[{digit_length}]"] = lambda d=digit_length: MPINChecker(digit_length=d)
+        benchmarks[f"generate_common_pins[{digit_length}]"] = checker.generate_common_pins
+        benchmarks[f"generate_demographic_combinations[{digit_length}]"] = (
+            lambda c=checker: c.generate_demographic_combinations(DATES[0]))
+    benchmarks["parse_date[strptime]"] = lambda: datetime.strptime(DATES[0], "%d-%m-%Y")
+    benchmarks["parse_date[parse_date_parts]"] = lambda: parse_date_parts(DATES[0])
+    for name, (pin, dates) in CHECK_STRENGTH_CASES.items():
+        if dates is NO_DATES:
+            continue
+        checker = get_checker(len(pin))
+        case = name[name.index("[") + 1:name.index(",dates]")]
+        # The date rule's work before and after the arithmetic matcher
+        benchmarks[f"date_match[set,{case}]"] = (
+            lambda c=checker, p=pin: p in c.generate_demographic_combinations(DATES[0]))
+        benchmarks[f"date_match[arithmetic,{case}]"] = lambda c=checker, p=pin: c.match_date_layouts(p, DATES[0])
+    for name, (pin, dates) in CHECK_STRENGTH_CASES.items():
+        checker = get_checker(len(pin))
+        benchmarks[name] = lambda c=checker, p=pin, d=dates: c.check_strength(p, *d)
+    return benchmarks
+
+
+def api_benchmarks():
+    from factory import create_app
+    from result_cache import result_cache
+
+    client = create_app("production", warmup="eager").test_client()
+    max_entries = result_cache.max_entries
+
+    def check_mpin_uncached():
+        result_cache.max_entries = 0
+        try:
+            client.post("/api/check_mpin", json=CHECK_MPIN_REQUEST)
+        finally:
+            result_cache.max_entries = max_entries
+
+    def check_mpin_cached():
+        client.post("/api/check_mpin", json=CHECK_MPIN_REQUEST)
+
+    check_mpin_cached()
+    return {"POST /api/check_mpin[uncached]": check_mpin_uncached,
+            "POST /api/check_mpin[cache_hit]": check_mpin_cached}
+
+
+def calibrate(func, min_time):
+    """Calls per round so that one round takes about min_time seconds"""
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    return max(1, int(number * min_time / max(elapsed, 1e-9)))
+
+
+def reference_workload():
+    """Fixed pure-Python work that tracks how fast the machine is running right now"""
+    total = 0
+    for value in range(1000):
+        total += value % 7
+    return total
+
+
+def measure(benchmarks, min_time, repeat):
+    """Per-call microseconds for each benchmark, with the rounds interleaved
+
+    Every round is paired with a short round of reference_workload, and
+    "relative" is the benchmark time over the reference time. It cancels
+    changes in machine speed (frequency scaling, noisy neighbours), so it is
+    what --compare gates on.
+    """
+    reference = timeit.Timer(reference_workload)
+    reference_number = calibrate(reference_workload, min_time / 4)
+    numbers = {name: calibrate(func, min_time) for name, func in benchmarks.items()}
+    rounds = {name: [] for name in benchmarks}
+    relative = {name: [] for name in benchmarks}
+    for _ in range(repeat):
+        for name, func in benchmarks.items():
+            reference_us = reference.timeit(reference_number) / reference_number * 1e6
+            us = timeit.Timer(func).timeit(numbers[name]) / numbers[name] * 1e6
+            rounds[name].append(us)
+            relative[name].append(us / reference_us)
+    return {name: {"us_per_call": round(min(times), 4),
+                   "median_us_per_call": round(sorted(times)[len(times) // 2], 4),
+                   "relative": round(min(relative[name]), 5),
+                   "calls_per_round": numbers[name]}
+            for name, times in rounds.items()}
+
+
+def environment():
+    return {"python": platform.python_version(), "implementation": platform.python_implementation(),
+            "machine": platform.machine(), "system": platform.system(), "cpus": os.cpu_count()}
+
+
+def compare(results, baseline, threshold):
+    """(rows, regressions) comparing results with a saved baseline"""
+    rows = []
+    regressions = []
+    for name, result in results.items():
+        base = baseline["results"].get(name)
+        if base is None:
+            rows.append((name, result["us_per_call"], None, None, "new"))
+            continue
+        change = result["relative"] / base["relative"] - 1
+        status = "ok"
+        if change > threshold:
+            status = "REGRESSED"
+            regressions.append(name)
+        elif change < -threshold:
+            status = "faster"
+        rows.append((name, result["us_per_call"], base["us_per_call"], change, status))
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmarks with baseline regression gating")
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per round (default 0.2)")
+    parser.add_argument("--repeat", type=int, default=5, help="rounds per benchmark (default 5)")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="fail when a benchmark is this fraction slower than its baseline (default 0.25)")
+    parser.add_argument("--retries", type=int, default=2,
+                        help="times to re-measure a regressed benchmark before failing (default 2)")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("environment") != environment():
+            print(f"warning: baseline was recorded on {baseline.get('environment')}, "
+                  f"not {environment()}", file=sys.stderr)
+
+    benchmarks = dict(checker_benchmarks(), **api_benchmarks())
+    if args.filter:
+        benchmarks = {name: func for name, func in benchmarks.items() if args.filter in name}
+
+    results = measure(benchmarks, args.min_time, args.repeat)
+    if baseline is not None:
+        for _ in range(args.retries):
+            _, regressions = compare(results, baseline, args.threshold)
+            if not regressions:
+                break
+            print(f"re-measuring {', '.join(regressions)}", file=sys.stderr)
+            retried = measure({name: benchmarks[name] for name in regressions}, args.min_time, args.repeat)
+            for name, result in retried.items():
+                # compare() judges "relative", so keep the run that is better on it
+                if result["relative"] < results[name]["relative"]:
+                    results[name] = result
+
+    report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "environment": environment(),
+              "min_time": args.min_time, "repeat": args.repeat, "results": results}
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    if baseline is None:
+        for name, result in results.items():
+            print(f"{name:<48} {result['us_per_call']:12.3f} us")
+        return 0
+
+    rows, regressions = compare(results, baseline, args.threshold)
+    # change compares the machine-speed-normalized times, so it can differ from us/baseline
+    print(f"{'benchmark':<48} {'us':>12} {'baseline':>12} {'change':>8}  status")
+    for name, current, base, change, status in rows:
+        base_text = f"{base:12.3f}" if base is not None else f"{'-':>12}"
+        change_text = f"{change:+8.1%}" if change is not None else f"{'-':>8}"
+        print(f"{name:<48} {current:12.3f} {base_text} {change_text}  {status}")
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}: "
+              f"{', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,16 @@ class Config:
     DEBUG = True
     HOST = '0.0.0.0'
     PORT = 5000
+    # When to build the checker, date-index and guess-rank tables:
+    # 'eager' (inside create_app), 'background' (a thread, /ready reports progress)
+    # or 'lazy' (on first use). $MPIN_WARMUP overrides it.
+    WARMUP = 'background'
+    # Return 4xx/5xx for API errors instead of 200 with success=false
+    API_ERROR_STATUS = False
+    # Log every API request and its verdict
+    LOG_REQUESTS = False
+    # Record per-route request counts and latencies for GET /metrics
+    METRICS = True
 
 class ProductionConfig(Config):
     """Production configuration"""
@@ -18,14 +28,21 @@ class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
 
+class DebugConfig(DevelopmentConfig):
+    """Development configuration with request logging and HTTP error statuses"""
+    API_ERROR_STATUS = True
+    LOG_REQUESTS = True
+
 class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     DEBUG = True
+    WARMUP = 'lazy'
 
 # Configuration dictionary
 config = {
     'development': DevelopmentConfig,
+    'debug': DebugConfig,
     'production': ProductionConfig,
     'testing': TestingConfig,
     'default': DevelopmentConfig
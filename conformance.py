@@ -0,0 +1,591 @@
+"""
+Differential conformance harness: every alternative engine against MPINChecker.
+
+Usage:
+    python app.py conformance [--triples N] [--lengths 4 6] [--seed N]
+                              [--workers N] [--chunk-size N] [--report report.json]
+
+The reference is MPINChecker.check_flags (what check_strength reports).
+These engines are compared with it:
+
+    strength_mode  check_flags(..., mode=MODE_STRENGTH), the early-exit path
+                   behind /api/check_mpin?modes=strength; it must give the
+                   same verdict, and its one reason must be a reference reason
+    profile        profiles.Profile.check_flags and its forbidden-PIN table
+    batch          batch.record_flags, used by the NDJSON endpoint and the audit;
+                   it strips its fields, so the reference gets stripped dates too
+    vectorized     vectorized.VectorizedMPINChecker.score (needs NumPy)
+    date_index     date_index.date_pin_values and DateIndex.dates, for dates
+                   the index covers (1900-2099)
+
+The date parser the checks use (app.parse_date_parts) is also compared
+with datetime.strptime on every sampled date, every day from 1900 to 2099
+in padded and unpadded form, and a grid of malformed day, month and year
+tokens (reported as engine "date_parser").
+
+First every PIN of each length is checked with no dates. Then each sampled
+(birth_date, spouse_birth_date, wedding_date) triple is checked over the
+whole PIN space. In reasons mode the reference mask is the OR of
+independent rules: the PIN-only rules, plus one demographic bit for each
+date whose combinations contain the PIN. So the expected mask for every
+PIN is the no-date mask plus the bits from the reference's
+generate_demographic_combinations. The profile table and the vectorized
+scorer are compared with that on all PINs. The reference itself, and the
+engines that only take one PIN at a time, are run on the date PINs, a random
+sample of other PINs and a few malformed ones. That also checks the
+decomposition itself (reported as engine "reference").
+
+The triples mix random dates with leap days, impossible dates, malformed
+strings, two-digit year collisions (day, month and year sharing digits,
+1905 and 2005), far years and missing fields. They depend only on --seed.
+Work is spread over a process pool in chunks of triples. Each mismatch is
+shrunk by dropping or normalizing dates while it still reproduces, and the
+report lists the minimal (pin, dates) pairs. The exit status is 1 when
+any engine disagrees.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from functools import lru_cache
+
+from app import MODE_STRENGTH, get_checker, parse_date_parts, reason_names, strength_from_flags
+from batch import DATE_FIELDS, record_flags
+from date_index import date_pin_values, get_date_index
+from profiles import DEMOGRAPHIC_REASONS, Profile
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+
+CONFORMANCE_DIGIT_LENGTHS = (4, 6)
+DEFAULT_TRIPLES = 1000
+DEFAULT_CHUNK_SIZE = 25
+RANDOM_PINS_PER_TRIPLE = 48
+MISMATCHES_PER_TRIPLE = 3
+# Shrinking tries this date in place of any other
+SIMPLE_DATE = '01-01-2000'
+# Strings check_flags must treat as INVALID or as plain non-matching PINs
+ODD_PINS = ('', '123', '12a4', '12345', '1234567', '١٢٣٤',
+            '١٢٣٤٥٦', '１２３４')
+
+FIXED_DATES = (
+    '29-02-2000', '29-02-1900', '29-02-2024', '29-02-2023', '28-02-2100', '29-02-2096',
+    '31-04-1990', '31-06-2001', '30-02-2000', '00-01-1990', '32-01-1990', '15-13-1990',
+    '01-00-1990', '1-2-1990', '01/02/1990', '1990-01-02', '01-02-90', '01-02-1990 ',
+    '01-02-19900', '', 'not a date', '١٢-٠٣-١٩٩٠',
+    '01-01-2001', '12-12-2012', '11-11-1911', '05-05-2005', '05-05-1905', '10-10-2010',
+    '19-05-2019', '20-10-2000', '01-01-2000', '31-12-1999', '01-02-0099', '05-06-0001',
+    '31-12-9999', '09-09-0909',
+)
+
+# Day, month and year spellings for the date-parser grid, valid or not
+DAY_TOKENS = ('', '0', '1', '9', ' 1', ' 0', '00', '01', '09', '10', '19', '1١', '2٩', '29', '30', '31',
+              '32', '39', '3', '١', '0١', 'x1', '  ', '001', '+1')
+MONTH_TOKENS = ('', '0', '1', '2', '9', '00', '01', '02', '09', '10', '12', '13', '1١', '١', ' 1', '001')
+YEAR_TOKENS = ('0000', '0001', '0099', '1900', '2000', '1996', '2024', '9999', '١٩٩٠', '199', '19900',
+               ' 199', '+199', '199x', '2٠٠0', '２０２０', '1900 ')
+
+
+def warm_worker():
+    """Process-pool initializer: build the shared checkers once per worker"""
+    for digit_length in CONFORMANCE_DIGIT_LENGTHS:
+        get_checker(digit_length)
+
+
+def parse_date(date_str):
+    """date for date_str the way the reference parses it, or None"""
+    try:
+        return datetime.strptime(date_str, "%d-%m-%Y").date()
+    except (TypeError, ValueError):
+        return None
+
+
+def _random_date(rng, first_year, last_year):
+    start = date(first_year, 1, 1).toordinal()
+    return date.fromordinal(rng.randint(start, date(last_year, 12, 31).toordinal()))
+
+
+def _collision_date(rng):
+    # Day, month and two-digit year share digits, so several orderings coincide
+    short_year = rng.randint(1, 12)
+    century = rng.choice((1900, 2000))
+    value = rng.choice(((short_year, short_year), (short_year, rng.randint(1, 12)),
+                        (rng.randint(1, 28), short_year)))
+    return f"{value[0]:02d}-{value[1]:02d}-{century + short_year}"
+
+
+def random_date_field(rng):
+    """One sampled date field: None, a date string, or a string the reference must reject"""
+    kind = rng.random()
+    if kind < 0.15:
+        return None
+    if kind < 0.50:
+        return _random_date(rng, 1900, 2099).strftime("%d-%m-%Y")
+    if kind < 0.60:
+        return rng.choice(FIXED_DATES)
+    if kind < 0.70:
+        year = rng.randint(1896, 2104)
+        return f"29-02-{year}"
+    if kind < 0.80:
+        return _collision_date(rng)
+    if kind < 0.87:
+        # Unpadded and far-year spellings strptime still accepts
+        day_obj = _random_date(rng, 1, 9999)
+        return f"{day_obj.day}-{day_obj.month}-{day_obj.year}"
+    if kind < 0.94:
+        # Impossible day or month numbers
+        return f"{rng.randint(0, 35):02d}-{rng.randint(0, 14):02d}-{rng.randint(1900, 2099)}"
+    day_obj = _random_date(rng, 1900, 2099)
+    return rng.choice((day_obj.strftime("%d/%m/%Y"), day_obj.strftime("%d-%m-%y"),
+                       day_obj.strftime("%Y-%m-%d"), day_obj.strftime("%d%m%Y")))
+
+
+def generate_triples(count, seed=0):
+    """count (birth_date, spouse_birth_date, wedding_date) triples, deterministic for seed"""
+    rng = random.Random(seed)
+    triples = [(value, None, None) for value in FIXED_DATES]
+    triples += [(None, value, None) for value in FIXED_DATES[:6]]
+    triples += [(None, None, value) for value in FIXED_DATES[:6]]
+    triples.append(('05-05-2005', '05-05-1905', '29-02-2000'))
+    triples = triples[:count]
+    while len(triples) < count:
+        triples.append(tuple(random_date_field(rng) for _ in DATE_FIELDS))
+    return triples
+
+
+def reference_flags(digit_length, pin, dates):
+    return get_checker(digit_length).check_flags(pin, *dates)
+
+
+def _strength_mode(digit_length, pin, dates):
+    return get_checker(digit_length).check_flags(pin, *dates, mode=MODE_STRENGTH)
+
+
+@lru_cache(maxsize=8)
+def build_profile(dates):
+    return Profile(None, *dates)
+
+
+def _profile(digit_length, pin, dates):
+    return build_profile(dates).check_flags(get_checker(digit_length), pin)
+
+
+def _batch(digit_length, pin, dates):
+    return record_flags(dict(zip(('pin',) + DATE_FIELDS, (pin,) + tuple(value or '' for value in dates))))[1]
+
+
+_VECTORIZED = {}
+
+
+def vectorized_checker(digit_length):
+    if digit_length not in _VECTORIZED:
+        from vectorized import VectorizedMPINChecker
+        _VECTORIZED[digit_length] = VectorizedMPINChecker(digit_length)
+    return _VECTORIZED[digit_length]
+
+
+def vectorized_columns(dates, size):
+    """score() arguments for one triple, broadcast to size rows; empty fields are None"""
+    from vectorized import date_columns
+    return [None if not value else tuple(np.broadcast_to(column, (size,)) for column in date_columns([value]))
+            for value in dates]
+
+
+def _vectorized(digit_length, pin, dates):
+    return vectorized_checker(digit_length).score([int(pin)], *vectorized_columns(dates, 1))[0]
+
+
+def _batch_applies(digit_length, pin, dates):
+    # record_flags picks the checker from the PIN's own length
+    return len(pin) == digit_length or not pin.isdigit()
+
+
+def _vectorized_applies(digit_length, pin, dates):
+    return np is not None and pin.isascii() and pin.isdigit() and len(pin) == digit_length
+
+
+def _date_index(digit_length, pin, dates):
+    mask = reference_flags(digit_length, pin, (None, None, None))
+    if mask is None:
+        return None
+    mask = int(mask)
+    for value, (_, bit) in zip(dates, DEMOGRAPHIC_REASONS):
+        day_obj = parse_date(value) if value else None
+        if day_obj is not None and int(pin) in date_pin_values(day_obj.day, day_obj.month,
+                                                               day_obj.year, digit_length):
+            mask |= bit
+    return mask
+
+
+def _date_index_applies(digit_length, pin, dates):
+    index = get_date_index()
+    for value in dates:
+        if not value:
+            continue
+        day_obj = parse_date(value)
+        if day_obj is None or not index.start_year <= day_obj.year <= index.end_year:
+            return False
+    return pin.isascii() and pin.isdigit() and len(pin) == digit_length
+
+
+def _always(digit_length, pin, dates):
+    return True
+
+
+def _as_given(dates):
+    return dates
+
+
+def _stripped(dates):
+    # batch.record_flags strips every field (as the JSON API does) before checking
+    return tuple(value.strip() or None if value else None for value in dates)
+
+
+def _same_flags(expected, got):
+    return (None if expected is None else int(expected)) == (None if got is None else int(got))
+
+
+def _same_strength(expected, got):
+    # Strength mode stops at the first rule that hits, so it reports one reason of the full set
+    if expected is None or got is None or not expected or not got:
+        return _same_flags(expected, got)
+    return int(got) & ~int(expected) == 0 and bin(int(got)).count('1') == 1
+
+
+# name -> (evaluate(digit_length, pin, dates), applies(...), agrees(expected, got),
+#          the dates the reference is given for the same input)
+ENGINES = {
+    'reference': (reference_flags, _always, _same_flags, _as_given),
+    'strength_mode': (_strength_mode, _always, _same_strength, _as_given),
+    'profile': (_profile, _always, _same_flags, _as_given),
+    'batch': (_batch, _batch_applies, _same_flags, _stripped),
+    'vectorized': (_vectorized, _vectorized_applies, _same_flags, _as_given),
+    'date_index': (_date_index, _date_index_applies, _same_flags, _as_given),
+}
+POINT_ENGINES = ('strength_mode', 'profile', 'batch')
+
+
+_BASE_MASKS = {}
+
+
+def base_masks(digit_length):
+    """Reference mask (no dates) for every PIN of digit_length, as bytes indexed by PIN value"""
+    if digit_length not in _BASE_MASKS:
+        checker = get_checker(digit_length)
+        _BASE_MASKS[digit_length] = bytes(int(checker.check_flags(f"{value:0{digit_length}d}"))
+                                          for value in range(10 ** digit_length))
+    return _BASE_MASKS[digit_length]
+
+
+class UnitResult:
+    """Comparison counts and raw (engine, digit_length, pin, dates) mismatches from one work unit"""
+
+    def __init__(self):
+        self.checked = {}
+        self.mismatches = []
+        self.date_mismatches = []
+
+    def count(self, engine, comparisons=1):
+        self.checked[engine] = self.checked.get(engine, 0) + comparisons
+
+    def mismatch(self, engine, digit_length, pin, dates):
+        self.mismatches.append((engine, digit_length, pin, dates))
+
+
+def date_parser_inputs(triples):
+    """Strings to compare parse_date_parts with strptime on"""
+    inputs = {value for dates in triples for value in dates if value}
+    for ordinal in range(date(1900, 1, 1).toordinal(), date(2099, 12, 31).toordinal() + 1):
+        day_obj = date.fromordinal(ordinal)
+        inputs.add(day_obj.strftime("%d-%m-%Y"))
+        inputs.add(f"{day_obj.day}-{day_obj.month}-{day_obj.year}")
+    for day in DAY_TOKENS:
+        for month in MONTH_TOKENS:
+            for year in YEAR_TOKENS:
+                inputs.update((f"{day}-{month}-{year}", f"{day}/{month}-{year}", f"{day}-{month}-{year}-"))
+    return sorted(inputs)
+
+
+def check_date_parser(date_strings):
+    """parse_date_parts against datetime.strptime on each string"""
+    result = UnitResult()
+    for date_str in date_strings:
+        day_obj = parse_date(date_str)
+        wanted = None if day_obj is None else (day_obj.day, day_obj.month, day_obj.year)
+        result.count('date_parser')
+        if parse_date_parts(date_str) != wanted:
+            result.date_mismatches.append(date_str)
+    return result
+
+
+def check_pin_space(digit_length):
+    """Every engine on every PIN of digit_length with no dates"""
+    result = UnitResult()
+    no_dates = (None, None, None)
+    base = base_masks(digit_length)
+    pins = [f"{value:0{digit_length}d}" for value in range(10 ** digit_length)]
+    for engine in POINT_ENGINES:
+        evaluate, _, agrees, _ = ENGINES[engine]
+        misses = [pin for pin in pins if not agrees(base[int(pin)], evaluate(digit_length, pin, no_dates))]
+        result.count(engine, len(pins))
+        for pin in misses[:MISMATCHES_PER_TRIPLE]:
+            result.mismatch(engine, digit_length, pin, no_dates)
+    if np is not None:
+        masks = vectorized_checker(digit_length).score(np.arange(10 ** digit_length))
+        result.count('vectorized', len(pins))
+        for value in np.flatnonzero(masks != np.frombuffer(base, dtype=np.uint8))[:MISMATCHES_PER_TRIPLE]:
+            result.mismatch('vectorized', digit_length, pins[value], no_dates)
+    return result
+
+
+def check_triples(digit_length, first, triples):
+    """Every engine on the whole PIN space of digit_length for each triple"""
+    result = UnitResult()
+    checker = get_checker(digit_length)
+    base = base_masks(digit_length)
+    size = 10 ** digit_length
+    all_pins = np.arange(size) if np is not None else None
+    base_array = np.frombuffer(base, dtype=np.uint8) if np is not None else None
+    index = get_date_index()
+
+    for number, dates in enumerate(triples, first):
+        rng = random.Random(number)
+        date_bits = {}
+        for value, (_, bit) in zip(dates, DEMOGRAPHIC_REASONS):
+            if value:
+                for pin in checker.generate_demographic_combinations(value):
+                    date_bits[pin] = date_bits.get(pin, 0) | bit
+
+        def expected(pin):
+            return base[int(pin)] | date_bits.get(pin, 0)
+
+        suspects = {}
+
+        def report(engine, pins):
+            pins = sorted(pins)
+            for pin in pins[:MISMATCHES_PER_TRIPLE]:
+                suspects.setdefault(pin, set()).add(engine)
+
+        # The profile's table must hold exactly the reference's date PINs, and
+        # the orderings it stored must give the reference's provenance
+        profile = build_profile(dates)
+        forbidden = {pin: entry[0] for pin, entry in profile.forbidden.items() if len(pin) == digit_length}
+        result.count('profile', size)
+        report('profile', {pin for pin in forbidden.keys() | date_bits.keys()
+                           if forbidden.get(pin, 0) != date_bits.get(pin, 0)})
+        report('profile', {pin for pin in forbidden
+                           if profile.check_strength(checker, pin, provenance=True)
+                           != checker.check_strength(pin, *dates, provenance=True)})
+
+        if np is not None:
+            masks = vectorized_checker(digit_length).score(all_pins, *vectorized_columns(dates, size))
+            wanted = base_array.copy()
+            for pin, bits in date_bits.items():
+                wanted[int(pin)] |= bits
+            result.count('vectorized', size)
+            report('vectorized', (f"{value:0{digit_length}d}" for value in np.flatnonzero(masks != wanted)))
+
+        if _date_index_applies(digit_length, '0' * digit_length, dates):
+            for value, (_, bit) in zip(dates, DEMOGRAPHIC_REASONS):
+                day_obj = parse_date(value) if value else None
+                if day_obj is None:
+                    continue
+                combinations = {pin for pin, bits in date_bits.items() if bits & bit}
+                encoded = {f"{pin:0{digit_length}d}" for pin in
+                           date_pin_values(day_obj.day, day_obj.month, day_obj.year, digit_length)}
+                canonical = day_obj.strftime("%d-%m-%Y")
+                result.count('date_index', len(combinations | encoded))
+                report('date_index', (combinations ^ encoded)
+                       | {pin for pin in combinations if canonical not in index.dates(pin)})
+
+        # Date PINs of the stripped fields too, where batch may add bits the reference does not
+        candidates = set(date_bits) | set(suspects) | set(ODD_PINS)
+        for value in _stripped(dates):
+            if value:
+                candidates.update(checker.generate_demographic_combinations(value))
+        candidates.update(f"{rng.randrange(size):0{digit_length}d}" for _ in range(RANDOM_PINS_PER_TRIPLE))
+        for pin in sorted(candidates):
+            reference = reference_flags(digit_length, pin, dates)
+            result.count('reference')
+            valid = pin.isascii() and pin.isdigit() and len(pin) == digit_length
+            if valid and not _same_flags(expected(pin), reference):
+                suspects.setdefault(pin, set()).add('reference')
+            for engine in POINT_ENGINES:
+                evaluate, applies, agrees, reference_input = ENGINES[engine]
+                if not applies(digit_length, pin, dates):
+                    continue
+                result.count(engine)
+                given = reference_input(dates)
+                wanted = reference if given == dates else reference_flags(digit_length, pin, given)
+                if not agrees(wanted, evaluate(digit_length, pin, dates)):
+                    suspects.setdefault(pin, set()).add(engine)
+
+        per_engine = {}
+        for pin in sorted(suspects):
+            for engine in sorted(suspects[pin]):
+                if per_engine.get(engine, 0) < MISMATCHES_PER_TRIPLE:
+                    per_engine[engine] = per_engine.get(engine, 0) + 1
+                    result.mismatch(engine, digit_length, pin, dates)
+    return result
+
+
+def _reproduces(engine, digit_length, pin, dates):
+    evaluate, applies, agrees, reference_input = ENGINES[engine]
+    if engine == 'reference':
+        # The decomposition against the literal reference call
+        no_dates = reference_flags(digit_length, pin, (None, None, None))
+        bits = 0
+        for value, (_, bit) in zip(dates, DEMOGRAPHIC_REASONS):
+            if value and pin in get_checker(digit_length).generate_demographic_combinations(value):
+                bits |= bit
+        return not _same_flags(int(no_dates) | bits, reference_flags(digit_length, pin, dates))
+    if not applies(digit_length, pin, dates):
+        return False
+    return not agrees(reference_flags(digit_length, pin, reference_input(dates)), evaluate(digit_length, pin, dates))
+
+
+def _simpler_dates(value):
+    if value is None:
+        return []
+    options = [None]
+    if value != SIMPLE_DATE:
+        options.append(SIMPLE_DATE)
+    day_obj = parse_date(value)
+    if day_obj is not None and day_obj.strftime("%d-%m-%Y") != value:
+        options.append(day_obj.strftime("%d-%m-%Y"))
+    return options
+
+
+def shrink(engine, digit_length, pin, dates):
+    """Smallest dates (fewest fields, canonical spellings) for which the mismatch still reproduces"""
+    dates = tuple(dates)
+    changed = True
+    while changed:
+        changed = False
+        for position in range(len(dates)):
+            for simpler in _simpler_dates(dates[position]):
+                candidate = dates[:position] + (simpler,) + dates[position + 1:]
+                if _reproduces(engine, digit_length, pin, candidate):
+                    dates = candidate
+                    changed = True
+                    break
+    return dates
+
+
+def _verdict(flags):
+    return [strength_from_flags(flags), reason_names(flags or 0)]
+
+
+def describe_mismatch(engine, digit_length, pin, dates):
+    evaluate, _, _, reference_input = ENGINES[engine]
+    arguments = ', '.join(repr(value) for value in (pin,) + tuple(dates))
+    entry = {'engine': engine, 'digit_length': digit_length, 'pin': pin,
+             'dates': dict(zip(DATE_FIELDS, dates)),
+             'reproduce': f"get_checker({digit_length}).check_flags({arguments})",
+             'expected': _verdict(reference_flags(digit_length, pin, reference_input(dates)))}
+    if engine == 'reference':
+        entry['got'] = 'no-date mask plus date combinations differs from the literal check'
+    else:
+        entry['got'] = _verdict(evaluate(digit_length, pin, dates))
+    return entry
+
+
+def run_conformance(lengths=CONFORMANCE_DIGIT_LENGTHS, triple_count=DEFAULT_TRIPLES, seed=0, workers=None,
+                    chunk_size=DEFAULT_CHUNK_SIZE, max_reports=20, stream=sys.stderr):
+    """Run every unit and return the report dict (see main)"""
+    started = time.perf_counter()
+    triples = generate_triples(triple_count, seed)
+    date_strings = date_parser_inputs(triples)
+    units = [(check_date_parser, (date_strings[first:first + 20000],))
+             for first in range(0, len(date_strings), 20000)]
+    for digit_length in lengths:
+        units.append((check_pin_space, (digit_length,)))
+        for first in range(0, len(triples), chunk_size):
+            units.append((check_triples, (digit_length, first, triples[first:first + chunk_size])))
+
+    checked = {}
+    raw = []
+    date_mismatches = []
+
+    def merge(unit_result, done):
+        for engine, comparisons in unit_result.checked.items():
+            checked[engine] = checked.get(engine, 0) + comparisons
+        raw.extend(unit_result.mismatches)
+        date_mismatches.extend(unit_result.date_mismatches)
+        print(f"[conformance] {done}/{len(units)} units, {len(raw)} mismatches, "
+              f"{time.perf_counter() - started:.1f}s", file=stream, flush=True)
+
+    if workers == 0:
+        warm_worker()
+        for done, (function, arguments) in enumerate(units, 1):
+            merge(function(*arguments), done)
+    else:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, initializer=warm_worker) as pool:
+            futures = [pool.submit(function, *arguments) for function, arguments in units]
+            for done, future in enumerate(futures, 1):
+                merge(future.result(), done)
+
+    minimal = {}
+    for engine, digit_length, pin, dates in raw:
+        if not _reproduces(engine, digit_length, pin, dates):
+            continue
+        key = (engine, digit_length, pin, shrink(engine, digit_length, pin, dates))
+        minimal[key] = minimal.get(key, 0) + 1
+        if len(minimal) >= max_reports:
+            break
+
+    engines = {engine: {'comparisons': count, 'mismatches': sum(1 for item in raw if item[0] == engine)}
+               for engine, count in sorted(checked.items())}
+    engines['date_parser']['mismatches'] = len(date_mismatches)
+    return {
+        'lengths': list(lengths),
+        'triples': len(triples),
+        'seed': seed,
+        'numpy': np is not None,
+        'elapsed_seconds': round(time.perf_counter() - started, 3),
+        'engines': engines,
+        'mismatches': [describe_mismatch(engine, digit_length, pin, dates)
+                       for engine, digit_length, pin, dates in minimal],
+        'date_parser_mismatches': [{'date': date_str, 'strptime': str(parse_date(date_str)),
+                                    'parse_date_parts': parse_date_parts(date_str)}
+                                   for date_str in date_mismatches[:max_reports]],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python app.py conformance',
+                                     description='Compare every alternative engine with MPINChecker.check_strength')
+    parser.add_argument('--triples', type=int, default=DEFAULT_TRIPLES,
+                        help=f"Sampled date triples (default: {DEFAULT_TRIPLES})")
+    parser.add_argument('--lengths', type=int, nargs='+', default=list(CONFORMANCE_DIGIT_LENGTHS),
+                        choices=CONFORMANCE_DIGIT_LENGTHS, help="PIN lengths to cover (default: 4 6)")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for the sampled triples (default: 0)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes (default: CPU count, 0 = run in-process)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"Triples per work unit (default: {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument('--max-reports', type=int, default=20, help="Minimal mismatches to report (default: 20)")
+    parser.add_argument('--report', help="Also write the report as JSON to this file")
+    args = parser.parse_args(argv)
+    if args.triples < 1 or args.chunk_size < 1:
+        parser.error('--triples and --chunk-size must be at least 1')
+    if args.workers is not None and args.workers < 0:
+        parser.error('--workers must not be negative')
+
+    report = run_conformance(tuple(args.lengths), args.triples, args.seed, args.workers,
+                             args.chunk_size, args.max_reports)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as report_file:
+            json.dump(report, report_file, indent=2, ensure_ascii=False)
+    return 1 if report['mismatches'] or report['date_parser_mismatches'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
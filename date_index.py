@@ -0,0 +1,150 @@
+"""
+Calendar reverse index: which dates produce a given PIN.
+
+MPINChecker.generate_demographic_combinations maps one date to its PINs.
+This module precomputes the reverse mapping for every valid calendar date
+in a year range. Each PIN maps to the dates that one of the length's date
+layouts (patterns.compile_date_layouts) renders as it. The index is stored
+CSR-style: one offsets array of 10**digit_length + 1 entries and one flat
+array of date ordinals per PIN length. Looking up how many days encode a
+PIN is then O(1), even when the user supplied no dates at all.
+
+Lengths above MAX_INDEX_DIGITS are not indexed: a dense offsets array for
+8-digit PINs would take 400 MB. covers() tells which lengths are.
+
+The index only answers the date question. The PIN-only reasons
+(COMMONLY_USED and COMMONLY_USED_LEAKED) still come from MPINChecker.
+"""
+import threading
+from array import array
+from datetime import date
+from functools import lru_cache
+from itertools import accumulate
+
+from app import SUPPORTED_DIGIT_LENGTHS
+from patterns import YEAR, compile_date_layouts
+
+DEFAULT_START_YEAR = 1900
+DEFAULT_END_YEAR = 2099
+MAX_INDEX_DIGITS = 6
+INDEX_DIGIT_LENGTHS = tuple(length for length in SUPPORTED_DIGIT_LENGTHS if length <= MAX_INDEX_DIGITS)
+
+
+@lru_cache(maxsize=None)
+def _layout_scales(digit_length):
+    # (component, 10 ** width, place value in the PIN) per component of each layout
+    scales = []
+    for layout in compile_date_layouts(digit_length):
+        place = 10 ** digit_length
+        components = []
+        for component, width in layout:
+            place //= 10 ** width
+            components.append((component, 10 ** width, place))
+        scales.append(tuple(components))
+    return tuple(scales)
+
+
+def date_pin_values(day, month, year, digit_length):
+    """Distinct integer PIN values the date layouts of digit_length render a date as
+
+    Same rules as MPINChecker.render_date_layouts: the year keeps its last
+    width digits, and a day or month too wide for its slot is skipped.
+    """
+    parts = (day, month, year)
+    values = set()
+    for components in _layout_scales(digit_length):
+        value = 0
+        for component, limit, place in components:
+            part = parts[component]
+            if component == YEAR:
+                part %= limit
+            elif part >= limit:
+                break
+            value += part * place
+        else:
+            values.add(value)
+    return values
+
+
+def _format_date(day_obj):
+    return f"{day_obj.day:02d}-{day_obj.month:02d}-{day_obj.year:04d}"
+
+
+class DateIndex:
+    """CSR reverse index from PIN value to the calendar dates encoding it"""
+
+    def __init__(self, start_year=DEFAULT_START_YEAR, end_year=DEFAULT_END_YEAR):
+        if not 1 <= start_year <= end_year <= 9999:
+            raise ValueError("Year range must satisfy 1 <= start_year <= end_year <= 9999")
+        self.start_year = start_year
+        self.end_year = end_year
+        first = date(start_year, 1, 1).toordinal()
+        last = date(end_year, 12, 31).toordinal()
+        self.offsets = {}
+        self.ordinals = {}
+        for digit_length in INDEX_DIGIT_LENGTHS:
+            self.offsets[digit_length], self.ordinals[digit_length] = self._build(first, last, digit_length)
+
+    @staticmethod
+    def _build(first, last, digit_length):
+        size = 10 ** digit_length
+        per_date = []
+        counts = array('I', bytes(4 * (size + 1)))
+        for ordinal in range(first, last + 1):
+            day_obj = date.fromordinal(ordinal)
+            values = date_pin_values(day_obj.day, day_obj.month, day_obj.year, digit_length)
+            per_date.append(values)
+            for value in values:
+                counts[value + 1] += 1
+
+        # Prefix sums turn the counts into CSR offsets
+        offsets = array('I', accumulate(counts))
+        ordinals = array('I', bytes(4 * offsets[size]))
+        cursor = array('I', offsets[:size])
+        for ordinal, values in zip(range(first, last + 1), per_date):
+            for value in values:
+                ordinals[cursor[value]] = ordinal
+                cursor[value] += 1
+        return offsets, ordinals
+
+    def covers(self, digit_length):
+        """Whether PINs of digit_length are indexed"""
+        return digit_length in self.offsets
+
+    def _slot(self, pin):
+        if not (pin.isdigit() and pin.isascii() and len(pin) in self.offsets):
+            return None, None
+        return self.offsets[len(pin)], int(pin)
+
+    def count(self, pin):
+        """Number of calendar days in the range whose digits encode pin (0 if not date-like)"""
+        offsets, value = self._slot(pin)
+        if offsets is None:
+            return 0
+        return offsets[value + 1] - offsets[value]
+
+    def dates(self, pin):
+        """The dates encoding pin, as DD-MM-YYYY strings in calendar order"""
+        offsets, value = self._slot(pin)
+        if offsets is None:
+            return []
+        ordinals = self.ordinals[len(pin)][offsets[value]:offsets[value + 1]]
+        return [_format_date(date.fromordinal(ordinal)) for ordinal in ordinals]
+
+    @property
+    def memory_bytes(self):
+        return sum(a.itemsize * len(a) for a in list(self.offsets.values()) + list(self.ordinals.values()))
+
+
+_DATE_INDEX = None
+_DATE_INDEX_LOCK = threading.Lock()
+
+
+def get_date_index():
+    """Process-wide DateIndex for the default year range, built on first use"""
+    global _DATE_INDEX
+    if _DATE_INDEX is None:
+        with _DATE_INDEX_LOCK:
+            if _DATE_INDEX is None:
+                _DATE_INDEX = DateIndex()
+    return _DATE_INDEX
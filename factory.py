@@ -0,0 +1,246 @@
+"""
+Application factory shared by every launcher.
+
+web_app.py, simple_run.py, enhanced_run.py, production_app.py and wsgi.py
+all build their Flask app with create_app(config_name). Only Flask is
+imported when the app is created. The checker modules are imported and
+their tables (shared checkers, calendar date index, guess-rank tables) are
+built by warm_up(), which runs according to the WARMUP setting:
+
+    eager       inside create_app, before the first request
+    background  in a daemon thread; GET /ready answers 503 until it finishes
+    lazy        not at all; each table is built on first use
+
+Every phase is timed. The breakdown is logged once warm-up finishes, along
+with the time to the first response, and /ready returns it as JSON.
+
+Per-request hooks (metrics, request logging and profiling) are only
+installed when their setting is on.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from config import config
+from logs import configure_logging, get_logger, log_event
+
+WARMUP_ENV = 'MPIN_WARMUP'
+WARMUP_MODES = ('eager', 'background', 'lazy')
+
+# The launchers import this module first, so this is close to process start
+STARTED = time.perf_counter()
+
+
+class StartupReport:
+    """Startup-phase timings and readiness for one app"""
+
+    def __init__(self, started=STARTED):
+        self.started = started
+        self.phases = []
+        self.state = 'starting'
+        self.error = None
+        self.first_response_ms = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases.append((name, (time.perf_counter() - began) * 1000))
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def record_first_response(self):
+        with self._lock:
+            if self.first_response_ms is not None:
+                return None
+            self.first_response_ms = self.elapsed_ms()
+            return self.first_response_ms
+
+    @property
+    def ready(self):
+        return self.state == 'ready'
+
+    def as_dict(self):
+        with self._lock:
+            report = {
+                'state': self.state,
+                'phases_ms': {name: round(ms, 1) for name, ms in self.phases},
+                'first_response_ms': None if self.first_response_ms is None else round(self.first_response_ms, 1),
+            }
+        if self.error:
+            report['error'] = self.error
+        return report
+
+
+def warm_up(report):
+    """Import the checker modules and build every shared table, timing each phase"""
+    with report.phase('import checker modules'):
+        from app import SUPPORTED_DIGIT_LENGTHS, get_checker
+        from date_index import get_date_index
+        from guess_rank import RANK_DIGIT_LENGTHS, get_guess_rank_table
+    with report.phase('checkers'):
+        for digit_length in SUPPORTED_DIGIT_LENGTHS:
+            get_checker(digit_length)
+    with report.phase('date index'):
+        get_date_index()
+    with report.phase('guess-rank tables'):
+        for digit_length in RANK_DIGIT_LENGTHS:
+            get_guess_rank_table(digit_length)
+
+
+def run_warm_up(report, logger):
+    """warm_up() that records the outcome on report and logs the breakdown"""
+    try:
+        warm_up(report)
+    except Exception as e:
+        report.state = 'failed'
+        report.error = str(e)
+        logger.exception("Warm-up failed")
+        return
+    report.state = 'ready'
+    logger.info("Startup ready after %.1fms", report.elapsed_ms(),
+                extra={'fields': {'phases_ms': report.as_dict()['phases_ms']}})
+
+
+def install_request_timer(app):
+    """Store the request start time in g.request_started for the metrics and logging hooks"""
+    from flask import g
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+
+def install_request_metrics(app):
+    """Request counts and latency histograms per route rule for /metrics"""
+    from flask import g, request
+    from metrics import observe_request
+
+    @app.after_request
+    def observe_request_metrics(response):
+        # The rule, not the raw path, so unknown URLs cannot add new series
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        observe_request(route, response.status_code, time.perf_counter() - g.request_started)
+        return response
+
+
+def install_request_logging(app):
+    """One structured, redacted log record per request, with fields the route put in g.log_fields"""
+    from flask import g, request
+    request_log = get_logger('request')
+
+    @app.after_request
+    def log_request(response):
+        fields = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - g.request_started) * 1000, 3),
+        }
+        fields.update(g.get('log_fields', ()))
+        log_event(request_log, logging.INFO, 'request', fields)
+        return response
+
+
+def install_request_profiling(app, profiler):
+    """Server-Timing headers, and cProfile dumps with a dump directory, for requests the profiler picks"""
+    from flask import before_render_template, g, request, template_rendered
+    from metrics import collect_request_timings, request_timings
+    from request_profiler import PROFILE_HEADER, server_timing
+    collect_request_timings()
+
+    @app.before_request
+    def start_profiling():
+        if profiler.wants(request.headers.get(PROFILE_HEADER)):
+            request_timings.set({})
+            g.profile_started = time.perf_counter()
+            g.cprofile = profiler.start()
+
+    def start_render(sender, **extra):
+        timings = request_timings.get()
+        if timings is not None:
+            timings['_render_started'] = time.perf_counter()
+
+    def finish_render(sender, **extra):
+        timings = request_timings.get()
+        if timings is not None and '_render_started' in timings:
+            elapsed = time.perf_counter() - timings.pop('_render_started')
+            timings['render_template'] = timings.get('render_template', 0.0) + elapsed
+
+    # Strong references: these closures are not held anywhere else
+    before_render_template.connect(start_render, app, weak=False)
+    template_rendered.connect(finish_render, app, weak=False)
+
+    @app.after_request
+    def add_server_timing(response):
+        timings = request_timings.get()
+        if timings is not None:
+            response.headers['Server-Timing'] = server_timing(timings, time.perf_counter() - g.profile_started)
+        return response
+
+    @app.teardown_request
+    def finish_profiling(error):
+        # Runs even when a view raised, so the cProfile slot is always released
+        profile = g.pop('cprofile', None)
+        if profile is not None:
+            profiler.finish(profile, request.path)
+        request_timings.set(None)
+
+
+def create_app(config_name=None, warmup=None):
+    """Build the Flask app for config_name ('development', 'debug', 'production' or 'testing')"""
+    report = StartupReport()
+    with report.phase('import flask'):
+        from flask import Flask
+
+    with report.phase('create app'):
+        configure_logging()
+        startup_log = get_logger('startup')
+        settings = config[config_name or 'default']
+        app = Flask(__name__)
+        app.config.from_object(settings)
+        warmup = warmup or os.environ.get(WARMUP_ENV) or app.config['WARMUP']
+        if warmup not in WARMUP_MODES:
+            raise ValueError(f"{WARMUP_ENV} must be one of {', '.join(WARMUP_MODES)}, got {warmup!r}")
+        app.config['WARMUP'] = warmup
+        app.extensions['mpin_startup'] = report
+
+    with report.phase('register routes'):
+        from routes import api
+        app.register_blueprint(api)
+
+    if app.config['METRICS'] or app.config['LOG_REQUESTS']:
+        install_request_timer(app)
+    if app.config['METRICS']:
+        install_request_metrics(app)
+    if app.config['LOG_REQUESTS']:
+        install_request_logging(app)
+    from request_profiler import request_profiler
+    if request_profiler.enabled:
+        install_request_profiling(app, request_profiler)
+
+    @app.after_request
+    def log_first_response(response):
+        first_response_ms = report.record_first_response()
+        if first_response_ms is not None:
+            startup_log.info("First response after %.1fms", first_response_ms)
+        return response
+
+    if warmup == 'eager':
+        run_warm_up(report, startup_log)
+    elif warmup == 'background':
+        report.state = 'warming'
+        threading.Thread(target=run_warm_up, args=(report, startup_log),
+                         name='mpin-warmup', daemon=True).start()
+    else:
+        report.state = 'ready'
+        startup_log.info("Startup ready after %.1fms (lazy tables)", report.elapsed_ms(),
+                         extra={'fields': {'phases_ms': report.as_dict()['phases_ms']}})
+    return app
@@ -0,0 +1,191 @@
+"""
+Global guess-rank tables and continuous strength scores.
+
+For every 4- and 6-digit PIN we precompute the position at which an
+attacker working through likely PINs would try it:
+
+    1. common patterns (repeated, ascending, descending, paired digits),
+    2. PINs that encode calendar dates, most calendar days first,
+    3. everything else, fewest distinct digits first,
+
+with ties broken by numeric value, so the ordering is fully deterministic.
+The ranks are stored as a flat uint32 array file, one entry per PIN value
+after a small header, and memory-mapped on first use. A strength score is
+then the PIN's O(1) rank percentile.
+
+Build the tables offline (and confirm a rebuild is byte-identical):
+
+    python guess_rank.py build --check
+    python guess_rank.py verify
+"""
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+
+from app import get_checker
+from date_index import get_date_index
+
+MAGIC = b"MPINRANK"
+VERSION = 1
+HEADER = struct.Struct("<8sBBHI")
+RANK_DIGIT_LENGTHS = (4, 6)
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+GUESS_RANK_DIR_ENV = "MPIN_GUESS_RANK_DIR"
+
+# Any reason (a pattern, a leaked-list hit or the user's own dates) puts the PIN
+# among an attacker's first guesses, whatever its global rank: the global order
+# knows neither the leaked lists nor this user's dates.
+WEAK_SCORE_CAP = 20
+
+
+def table_path(digit_length, data_dir=None):
+    data_dir = data_dir or os.environ.get(GUESS_RANK_DIR_ENV) or DEFAULT_DATA_DIR
+    return os.path.join(data_dir, f"guess_rank_{digit_length}.bin")
+
+
+def attacker_order(digit_length):
+    """Every PIN value of digit_length, in the order an attacker would try them"""
+    checker = get_checker(digit_length)
+    date_index = get_date_index()
+    table = checker.pattern_table
+    offsets = date_index.offsets[digit_length]
+
+    def key(value):
+        families = table[value]
+        if families:
+            # Lowest family bit first: repeated, ascending, descending, paired
+            return (0, families & -families, value)
+        date_days = offsets[value + 1] - offsets[value]
+        if date_days:
+            return (1, -date_days, value)
+        return (2, len(set(f"{value:0{digit_length}d}")), value)
+
+    return sorted(range(10 ** digit_length), key=key)
+
+
+def build_rank_bytes(digit_length):
+    """Serialized table: header plus rank[value] as little-endian uint32"""
+    ranks = array("I", bytes(4 * 10 ** digit_length))
+    for position, value in enumerate(attacker_order(digit_length)):
+        ranks[value] = position
+    if sys.byteorder != "little":
+        ranks.byteswap()
+    return HEADER.pack(MAGIC, VERSION, digit_length, 0, len(ranks)) + ranks.tobytes()
+
+
+class GuessRankTable:
+    """O(1) rank and percentile lookups over one serialized table"""
+
+    def __init__(self, data, digit_length):
+        magic, version, stored_length, _, size = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION or stored_length != digit_length:
+            raise ValueError(f"Not a version {VERSION} guess-rank table for {digit_length} digits")
+        if size != 10 ** digit_length or len(data) != HEADER.size + 4 * size:
+            raise ValueError("Guess-rank table has the wrong size")
+        self.digit_length = digit_length
+        self.size = size
+        self._data = data
+        if sys.byteorder == "little":
+            self._ranks = memoryview(data)[HEADER.size:].cast("I")
+        else:
+            self._ranks = array("I", bytes(data[HEADER.size:]))
+            self._ranks.byteswap()
+
+    @classmethod
+    def load(cls, path, digit_length):
+        with open(path, "rb") as handle:
+            data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(data, digit_length)
+
+    def rank(self, pin):
+        """0-based position in the attacker ordering, or None for a PIN of the wrong shape"""
+        if not (pin.isdigit() and pin.isascii() and len(pin) == self.digit_length):
+            return None
+        return self._ranks[int(pin)]
+
+    def percentile(self, pin):
+        """0.0 for the first PIN an attacker tries, 100.0 for the last"""
+        rank = self.rank(pin)
+        if rank is None:
+            return None
+        return round(100.0 * rank / (self.size - 1), 1)
+
+
+_TABLES = {}
+_TABLES_LOCK = threading.Lock()
+
+
+def get_guess_rank_table(digit_length):
+    """Shared table for digit_length: mapped from disk, or built in memory if no file exists"""
+    if digit_length not in RANK_DIGIT_LENGTHS:
+        return None
+    table = _TABLES.get(digit_length)
+    if table is None:
+        with _TABLES_LOCK:
+            table = _TABLES.get(digit_length)
+            if table is None:
+                path = table_path(digit_length)
+                if os.path.exists(path):
+                    table = GuessRankTable.load(path, digit_length)
+                else:
+                    table = GuessRankTable(build_rank_bytes(digit_length), digit_length)
+                _TABLES[digit_length] = table
+    return table
+
+
+def strength_score(pin, strength, reasons):
+    """0-100 score: the PIN's guess-rank percentile, capped for any WEAK reason"""
+    if strength == "INVALID":
+        return 0
+    table = get_guess_rank_table(len(pin))
+    score = table.percentile(pin) if table is not None else None
+    if score is None:
+        # Lengths without a table, and PINs it cannot index (non-ASCII digits such
+        # as '١٢٣٤'), keep the coarse WEAK/STRONG score
+        return 100 if strength == "STRONG" else max(20, 80 - len(reasons) * 20)
+    if reasons:
+        score = min(score, WEAK_SCORE_CAP)
+    return score
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or verify the guess-rank tables")
+    parser.add_argument("command", choices=("build", "verify"))
+    parser.add_argument("--data-dir", default=None, help="directory for guess_rank_<n>.bin files")
+    parser.add_argument("--check", action="store_true", help="after building, rebuild and compare bytes")
+    args = parser.parse_args(argv)
+
+    status = 0
+    for digit_length in RANK_DIGIT_LENGTHS:
+        path = table_path(digit_length, args.data_dir)
+        data = build_rank_bytes(digit_length)
+        digest = hashlib.sha256(data).hexdigest()
+        if args.command == "build":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(f"{path}.tmp", "wb") as out:
+                out.write(data)
+            os.replace(f"{path}.tmp", path)
+            print(f"Wrote {path} ({len(data):,} bytes, sha256 {digest})")
+            if args.check and build_rank_bytes(digit_length) != data:
+                print(f"Error: {digit_length}-digit table is not deterministic", file=sys.stderr)
+                status = 1
+        else:
+            if not os.path.exists(path):
+                print(f"{path}: MISSING (expected sha256 {digest})")
+                status = 1
+                continue
+            with open(path, "rb") as existing:
+                matches = existing.read() == data
+            print(f"{path}: {'OK' if matches else 'MISMATCH'} (sha256 {digest})")
+            if not matches:
+                status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
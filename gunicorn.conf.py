@@ -0,0 +1,60 @@
+"""
+Gunicorn settings for production serving (the Render start command):
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The app is preloaded in the master with eager warm-up, so the checker,
+date-index and guess-rank tables are built once before the fork. Workers
+then share those pages copy-on-write. The tables are flat bytes/array
+buffers (or mmaps), so refcount updates only touch their object headers.
+gc.freeze() runs just before the workers are spawned, so the collector in
+each worker does not write to the preloaded objects either.
+
+Profiles (/api/profile), the result cache and the /metrics counters all
+live in each worker's memory. A profile_id sent to a worker that did not
+register it is unknown there. The page therefore sends the dates along
+with the profile_id, and that worker checks the dates directly. A request
+that sends only a profile_id can get profile_expired on another worker.
+Each scrape of /metrics reports only the worker that answered it.
+
+Environment overrides: PORT, WEB_CONCURRENCY (workers), GUNICORN_THREADS,
+GUNICORN_KEEPALIVE, GUNICORN_TIMEOUT.
+"""
+import gc
+import multiprocessing
+import os
+
+# Build every table in the master; a background warm-up thread would not survive the fork
+os.environ.setdefault('MPIN_WARMUP', 'eager')
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+preload_app = True
+
+# Checks are CPU-bound, so processes do the work; threads keep slow and idle
+# keep-alive clients from tying up a whole worker. Inside a container the CPU
+# count is the host's, not the container's quota, so the 2 x CPUs + 1 default
+# is capped; set WEB_CONCURRENCY to size it for the real CPU allowance.
+MAX_DEFAULT_WORKERS = 4
+_cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else multiprocessing.cpu_count()
+workers = int(os.environ.get('WEB_CONCURRENCY', min(_cpus * 2 + 1, MAX_DEFAULT_WORKERS)))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Render's proxy reuses upstream connections; keep them open past its idle gap
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+
+# Heartbeat files on tmpfs, so a slow disk cannot stall workers
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = None
+errorlog = '-'
+loglevel = 'info'
+
+
+def when_ready(server):
+    """Runs in the master after preload and before any worker is forked"""
+    gc.freeze()
+    server.log.info("Preloaded tables frozen for copy-on-write sharing (%d objects)", gc.get_freeze_count())
@@ -0,0 +1,181 @@
+"""
+Memory-mapped leaked-PIN frequency dictionaries.
+
+Attackers try PINs in the order they appear in leaked PIN lists. This
+module reads such a list from a fixed-width binary file through mmap, so
+nothing is loaded into Python objects. Every worker process that opens the
+same file shares its pages through the OS page cache.
+
+File layout (little-endian):
+    header  8s magic "MPINLEAK", B version, B digit_length, H layout, I records
+    dense   layout 0: one uint32 count per PIN value, 10**digit_length entries
+    sparse  layout 1: `records` (uint32 pin, uint32 count) pairs sorted by pin
+
+Dense files are read by direct indexing and sparse files by binary search.
+Build one from a text file of "pin,count" lines:
+
+    python leaked.py build leaked_6.txt leaked_6.bin --digits 6
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+
+MAGIC = b"MPINLEAK"
+VERSION = 1
+HEADER = struct.Struct("<8sBBHI")
+COUNT = struct.Struct("<I")
+RECORD = struct.Struct("<II")
+LAYOUT_DENSE = 0
+LAYOUT_SPARSE = 1
+
+# Dense files are smaller once more than half of the PIN space is present
+DENSE_MIN_FILL = 0.5
+
+LEAKED_PINS_ENV = "MPIN_LEAKED_PINS"
+LEAKED_MIN_COUNT_ENV = "MPIN_LEAKED_MIN_COUNT"
+DEFAULT_MIN_COUNT = 100
+
+
+class LeakedPinDictionary:
+    """Read-only view over one leaked-PIN frequency file"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER.size:
+            raise ValueError(f"{path}: file too short for a leaked-PIN header")
+        magic, version, digit_length, layout, records = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a version {VERSION} leaked-PIN file")
+        if layout == LAYOUT_DENSE:
+            expected = HEADER.size + COUNT.size * 10 ** digit_length
+        elif layout == LAYOUT_SPARSE:
+            expected = HEADER.size + RECORD.size * records
+        else:
+            raise ValueError(f"{path}: unknown layout {layout}")
+        if len(self._map) != expected:
+            raise ValueError(f"{path}: expected {expected} bytes, found {len(self._map)}")
+        self.digit_length = digit_length
+        self.layout = layout
+        self.records = records
+
+    def close(self):
+        self._map.close()
+
+    def entries(self):
+        """Memoryview of the file after the header, for bulk readers such as vectorized.py
+
+        Dense files hold one uint32 count per PIN value, sparse files
+        (uint32 pin, uint32 count) pairs; see the module docstring.
+        """
+        return memoryview(self._map)[HEADER.size:]
+
+    def frequency(self, pin):
+        """Leak count for pin, or 0 if absent or of the wrong shape"""
+        if not (pin.isdigit() and pin.isascii() and len(pin) == self.digit_length):
+            return 0
+        value = int(pin)
+        if self.layout == LAYOUT_DENSE:
+            return COUNT.unpack_from(self._map, HEADER.size + COUNT.size * value)[0]
+        low, high = 0, self.records
+        while low < high:
+            middle = (low + high) // 2
+            key, count = RECORD.unpack_from(self._map, HEADER.size + RECORD.size * middle)
+            if key == value:
+                return count
+            if key < value:
+                low = middle + 1
+            else:
+                high = middle
+        return 0
+
+
+def write_leaked_dictionary(path, counts, digit_length, layout=None):
+    """Write {pin_value: count} to path, choosing the smaller layout unless one is given"""
+    size = 10 ** digit_length
+    for value in counts:
+        if not 0 <= value < size:
+            raise ValueError(f"PIN value {value} is outside the {digit_length}-digit space")
+    if layout is None:
+        layout = LAYOUT_DENSE if len(counts) >= size * DENSE_MIN_FILL else LAYOUT_SPARSE
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as out:
+        out.write(HEADER.pack(MAGIC, VERSION, digit_length, layout, len(counts)))
+        if layout == LAYOUT_DENSE:
+            table = bytearray(COUNT.size * size)
+            for value, count in counts.items():
+                COUNT.pack_into(table, COUNT.size * value, count)
+            out.write(table)
+        else:
+            for value in sorted(counts):
+                out.write(RECORD.pack(value, counts[value]))
+    os.replace(tmp_path, path)
+
+
+def read_leaked_text(lines, digit_length):
+    """Parse "pin,count" lines (or bare PINs, counted once each) into {pin_value: count}"""
+    counts = {}
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        pin, _, count = line.partition(",")
+        pin = pin.strip()
+        if not (pin.isdigit() and pin.isascii() and len(pin) == digit_length):
+            raise ValueError(f"line {line_number}: expected a {digit_length}-digit PIN, got {pin!r}")
+        value = int(pin)
+        counts[value] = min(counts.get(value, 0) + (int(count) if count.strip() else 1), 0xFFFFFFFF)
+    return counts
+
+
+def load_configured_dictionaries():
+    """Open every file listed in $MPIN_LEAKED_PINS (os.pathsep-separated), keyed by digit length
+
+    Two files for the same digit length are an error rather than one
+    silently replacing the other.
+    """
+    dictionaries = {}
+    for path in filter(None, os.environ.get(LEAKED_PINS_ENV, "").split(os.pathsep)):
+        dictionary = LeakedPinDictionary(path)
+        existing = dictionaries.get(dictionary.digit_length)
+        if existing is not None:
+            dictionary.close()
+            for opened in dictionaries.values():
+                opened.close()
+            raise ValueError(f"{path}: {LEAKED_PINS_ENV} already lists {existing.path} "
+                             f"for {dictionary.digit_length}-digit PINs")
+        dictionaries[dictionary.digit_length] = dictionary
+    return dictionaries
+
+
+def configured_min_count():
+    return int(os.environ.get(LEAKED_MIN_COUNT_ENV, DEFAULT_MIN_COUNT))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a memory-mappable leaked-PIN frequency file")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help='convert "pin,count" text into the binary format')
+    build.add_argument("source", help="text file with one 'pin,count' (or bare pin) per line")
+    build.add_argument("output", help="binary file to write")
+    build.add_argument("--digits", type=int, required=True, help="PIN length of every entry")
+    build.add_argument("--layout", choices=("dense", "sparse"), help="force a layout (default: smallest)")
+    args = parser.parse_args(argv)
+
+    layout = {"dense": LAYOUT_DENSE, "sparse": LAYOUT_SPARSE, None: None}[args.layout]
+    try:
+        with open(args.source, encoding="utf-8") as source:
+            counts = read_leaked_text(source, args.digits)
+        write_leaked_dictionary(args.output, counts, args.digits, layout)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"Wrote {len(counts):,} PINs to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""
+Non-blocking structured logging for the web apps.
+
+Request threads only decide whether to keep an event (per-level sampling in
+log_event, before any LogRecord is built) and put it on a bounded queue. A
+background QueueListener thread redacts, formats and writes it, so no
+request waits on stderr. If the queue is full,
+records are dropped and counted rather than blocking a request.
+
+Records are JSON lines, or `[time] LEVEL logger: event key=value` text with
+MPIN_LOG_FORMAT=text. Before anything is written, fields named pin,
+birth_date, spouse_birth_date, wedding_date, profile_id, data or body are
+replaced with "[redacted]". PIN-like digit runs and date-like strings in
+string arguments, field values and exception text are masked as well.
+
+Environment:
+    MPIN_LOG_LEVEL    minimum level (default INFO)
+    MPIN_LOG_SAMPLE   per-level keep rates for log_event, e.g. "DEBUG=0,INFO=0.1"
+                      (default: keep all; startup and error records are never sampled)
+    MPIN_LOG_FORMAT   json (default) or text
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+
+ROOT_LOGGER = 'mpin'
+QUEUE_SIZE = 10000
+REDACTED = '[redacted]'
+SENSITIVE_FIELDS = frozenset(('pin', 'birth_date', 'spouse_birth_date', 'wedding_date', 'profile_id', 'data', 'body'))
+
+LOG_LEVEL_ENV = 'MPIN_LOG_LEVEL'
+LOG_SAMPLE_ENV = 'MPIN_LOG_SAMPLE'
+LOG_FORMAT_ENV = 'MPIN_LOG_FORMAT'
+
+_DATE_PATTERN = re.compile(r'\b\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}\b')
+_PIN_PATTERN = re.compile(r'\b\d{4,8}\b')
+
+
+def redact_text(text):
+    """Mask date-like strings and 4-8 digit runs in free text"""
+    return _PIN_PATTERN.sub('[pin]', _DATE_PATTERN.sub('[date]', text))
+
+
+def redact_value(key, value):
+    if key in SENSITIVE_FIELDS:
+        return REDACTED
+    if isinstance(value, str):
+        return redact_text(value)
+    if isinstance(value, (list, tuple)):
+        return [redact_text(item) if isinstance(item, str) else item for item in value]
+    return value
+
+
+class LogStats:
+    """Counters for records written, sampled out and dropped on a full queue"""
+
+    def __init__(self):
+        self.written = 0
+        self.sampled_out = 0
+        self.dropped = 0
+
+    def as_dict(self):
+        return {'written': self.written, 'sampled_out': self.sampled_out, 'dropped': self.dropped}
+
+
+stats = LogStats()
+
+
+def parse_sample_rates(value):
+    """"DEBUG=0,INFO=0.1" -> {logging.DEBUG: 0.0, logging.INFO: 0.1}"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in (value or '').split(','))):
+        level, _, rate = item.partition('=')
+        levelno = logging.getLevelName(level.strip().upper())
+        if not isinstance(levelno, int):
+            raise ValueError(f"{LOG_SAMPLE_ENV}: unknown level {level!r}")
+        rate = float(rate)
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError(f"{LOG_SAMPLE_ENV}: rate for {level} must be between 0 and 1")
+        rates[levelno] = rate
+    return rates
+
+
+_sample_rates = {}
+
+
+def log_event(logger, levelno, event, fields):
+    """Log one structured event, sampled per level before any LogRecord is built"""
+    if not logger.isEnabledFor(levelno):
+        return
+    rate = _sample_rates.get(levelno)
+    if rate is not None:
+        if random.random() >= rate:
+            stats.sampled_out += 1
+            return
+        # Kept records note the rate so counts can be scaled back up
+        fields['sample_rate'] = rate
+    logger.log(levelno, event, extra={'fields': fields})
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records as they are, leaving formatting to the listener thread"""
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            stats.dropped += 1
+
+
+class RedactingFormatter(logging.Formatter):
+    """Formats records as redacted JSON lines or key=value text (runs on the listener thread)"""
+
+    def __init__(self, style='json'):
+        super().__init__()
+        self.style = style
+
+    def format(self, record):
+        args = record.args
+        if isinstance(args, tuple):
+            args = tuple(redact_text(arg) if isinstance(arg, str) else arg for arg in args)
+        message = record.msg % args if args else str(record.msg)
+        fields = {key: redact_value(key, value) for key, value in getattr(record, 'fields', {}).items()}
+        if record.exc_info:
+            fields['exc'] = redact_text(self.formatException(record.exc_info))
+        stats.written += 1
+
+        timestamp = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(record.created))
+        timestamp = f"{timestamp}.{int(record.msecs):03d}"
+        if self.style == 'text':
+            pairs = ' '.join(f"{key}={value}" for key, value in fields.items())
+            return f"[{timestamp}] {record.levelname} {record.name}: {message}" + (f" {pairs}" if pairs else '')
+        entry = {'ts': timestamp, 'level': record.levelname, 'logger': record.name, 'event': message}
+        entry.update(fields)
+        return json.dumps(entry, default=str, separators=(',', ':'))
+
+
+_listener = None
+_handler = None
+_configure_lock = threading.Lock()
+
+
+def _start_listener(writer):
+    global _listener
+    records = queue.Queue(QUEUE_SIZE)
+    _handler.queue = records
+    _listener = logging.handlers.QueueListener(records, writer)
+    _listener.start()
+
+
+def _restart_after_fork():
+    # The writer thread does not survive fork (e.g. gunicorn preload), and the
+    # old queue's lock may have been held by it; give the child fresh ones.
+    if _listener is not None:
+        _start_listener(_listener.handlers[0])
+
+
+def _stop_listener():
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+def configure_logging(level=None, sample=None, style=None, stream=None):
+    """Route the 'mpin' logger tree through the queue and start the writer thread (once per process)"""
+    global _handler, _sample_rates
+    with _configure_lock:
+        if _listener is not None:
+            return
+        level = level or os.environ.get(LOG_LEVEL_ENV, 'INFO')
+        rates = parse_sample_rates(sample if sample is not None else os.environ.get(LOG_SAMPLE_ENV))
+        style = style or os.environ.get(LOG_FORMAT_ENV, 'json')
+        if style not in ('json', 'text'):
+            raise ValueError(f"{LOG_FORMAT_ENV} must be json or text, got {style!r}")
+
+        writer = logging.StreamHandler(stream or sys.stderr)
+        writer.setFormatter(RedactingFormatter(style))
+        _sample_rates = {levelno: rate for levelno, rate in rates.items() if rate < 1.0}
+        _handler = NonBlockingQueueHandler(None)
+        _start_listener(writer)
+
+        root = logging.getLogger(ROOT_LOGGER)
+        root.handlers[:] = [_handler]
+        root.setLevel(level.upper() if isinstance(level, str) else level)
+        root.propagate = False
+        os.register_at_fork(after_in_child=_restart_after_fork)
+        # Flush whatever is still queued when the process exits
+        atexit.register(_stop_listener)
+
+
+def get_logger(name):
+    """Logger under the structured 'mpin' tree; pass fields with log_event or extra={'fields': {...}}"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
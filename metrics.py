@@ -0,0 +1,205 @@
+"""
+Dependency-free Prometheus metrics for the web apps.
+
+GET /metrics (Flask and ASGI) returns the Prometheus text format:
+
+    mpin_requests_total{route,status}          requests per route and status
+    mpin_request_duration_seconds{route}       request latency histogram
+    mpin_check_stage_duration_seconds{stage}   json_parse, checker_lookup, check_strength,
+                                               detailed_analysis, and date_parsing and
+                                               combination_generation when a profile's
+                                               date combinations are built
+    mpin_check_outcomes_total{outcome}         WEAK, STRONG or INVALID verdicts, and ERROR
+                                               for requests rejected before a check
+    mpin_check_reasons_total{reason}           one per reason reported
+    mpin_rule_evaluations_total{rule}          checker rule runs, hits and time (the
+    mpin_rule_hits_total{rule}                 per-rule counters in app.py, kept since
+    mpin_rule_seconds_total{rule}              process start)
+    mpin_result_cache_*, mpin_log_records_*    result_cache and logs counters
+
+Like the rule stats in app.py, updates are plain unlocked increments, so
+recording costs a bisect and a few additions. Under heavy thread contention
+an increment can occasionally be lost, which is fine for monitoring. A lock
+is only taken the first time a label value is seen, and routes are labelled
+by their rule rather than the raw path, so the number of series stays fixed.
+"""
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Upper bounds in seconds; a warm check takes tens of microseconds
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _label_text(names, values):
+    return ','.join(f'{name}="{value}"' for name, value in zip(names, values))
+
+
+class Histogram:
+    """Bucket counts for one label set (non-cumulative until rendered)"""
+    __slots__ = ('bounds', 'counts', 'sum')
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.sum += seconds
+
+
+class StageHistogram(Histogram):
+    """Histogram for one check stage"""
+    __slots__ = ('stage',)
+
+    def __init__(self, stage, bounds=LATENCY_BUCKETS):
+        super().__init__(bounds)
+        self.stage = stage
+
+
+# Per-request stage totals for Server-Timing; None outside a profiled request
+request_timings = ContextVar('mpin_request_timings', default=None)
+
+
+def _observe_and_collect(self, seconds):
+    Histogram.observe(self, seconds)
+    timings = request_timings.get()
+    if timings is not None:
+        timings[self.stage] = timings.get(self.stage, 0.0) + seconds
+
+
+def collect_request_timings():
+    """Make stage observations also add to request_timings (see request_profiler)
+
+    Until this is called, stage histograms skip the context lookup entirely.
+    """
+    StageHistogram.observe = _observe_and_collect
+
+
+class Family:
+    """A named metric with one child (a Histogram or a counter) per label set"""
+
+    def __init__(self, name, help_text, kind, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.kind = kind
+        self.label_names = label_names
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """The Histogram for these label values (histogram families only)"""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, Histogram())
+        return child
+
+    def inc(self, *values, amount=1):
+        """Add amount to the counter for these label values (counter families only)"""
+        children = self._children
+        if values in children:
+            children[values] += amount
+        else:
+            with self._lock:
+                children[values] = children.get(values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(list(self._children.items())):
+            labels = _label_text(self.label_names, values)
+            if self.kind == 'counter':
+                lines.append(f"{self.name}{{{labels}}} {child}")
+                continue
+            prefix = labels + ',' if labels else ''
+            cumulative = 0
+            for bound, count in zip(child.bounds + (float('inf'),), list(child.counts)):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{self.name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {child.sum}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+requests_total = Family('mpin_requests_total', 'HTTP requests by route and status.',
+                        'counter', ('route', 'status'))
+request_duration = Family('mpin_request_duration_seconds', 'HTTP request latency by route.',
+                          'histogram', ('route',))
+stage_duration = Family('mpin_check_stage_duration_seconds', 'Time spent in each stage of a PIN check.',
+                        'histogram', ('stage',))
+check_outcomes = Family('mpin_check_outcomes_total',
+                        '/api/check_mpin verdicts (WEAK, STRONG or INVALID) and rejected requests (ERROR).',
+                        'counter', ('outcome',))
+check_reasons = Family('mpin_check_reasons_total', 'Reasons reported by /api/check_mpin.',
+                       'counter', ('reason',))
+FAMILIES = (requests_total, request_duration, stage_duration, check_outcomes, check_reasons)
+
+
+def stage(name):
+    """Histogram for one check stage; bind it once at import time and call observe(seconds)"""
+    with stage_duration._lock:
+        return stage_duration._children.setdefault((name,), StageHistogram(name))
+
+
+def observe_request(route, status, seconds):
+    requests_total.inc(route, status)
+    request_duration.labels(route).observe(seconds)
+
+
+def record_outcome(body):
+    """Count the verdict and reasons of one check_mpin_request response body"""
+    if not body['success']:
+        # Bad input, an invalid modes list or an expired profile: no verdict was reached
+        check_outcomes.inc('ERROR')
+        return
+    # Requests for the common mode only have no verdict
+    if 'strength' in body:
+        check_outcomes.inc(body['strength'])
+    for reason in body.get('reasons', ()):
+        check_reasons.inc(reason)
+
+
+def _stats_lines(prefix, help_text, stats, gauges=()):
+    lines = []
+    for key, value in stats.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        kind = 'gauge' if key in gauges else 'counter'
+        name = f"{prefix}_{key}" if kind == 'gauge' else f"{prefix}_{key}_total"
+        lines += [f"# HELP {name} {help_text} ({key}).", f"# TYPE {name} {kind}", f"{name} {value}"]
+    return lines
+
+
+def _rule_lines(rules):
+    lines = []
+    for name, key, help_text, scale in (
+            ('mpin_rule_evaluations_total', 'evaluations', 'Checker rule evaluations by rule.', None),
+            ('mpin_rule_hits_total', 'hits', 'Checker rule evaluations that matched, by rule.', None),
+            ('mpin_rule_seconds_total', 'total_ms', 'Time spent evaluating each checker rule.', 1e-3)):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for rule in rules:
+            value = rule[key] * scale if scale else rule[key]
+            lines.append(f'{name}{{rule="{rule["name"]}"}} {value}')
+    return lines
+
+
+def render():
+    """Every metric in the Prometheus text exposition format"""
+    import logs
+    from app import rule_stats
+    from result_cache import result_cache
+
+    lines = []
+    for family in FAMILIES:
+        lines += family.render()
+    lines += _rule_lines(rule_stats())
+    cache_stats = result_cache.stats()
+    lines += _stats_lines('mpin_result_cache', 'Result cache', cache_stats,
+                          gauges=('entries', 'max_entries', 'ttl_seconds', 'hit_rate'))
+    lines += _stats_lines('mpin_log_records', 'Structured log records', logs.stats.as_dict())
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,152 @@
+"""
+Pluggable pattern generators for MPINChecker.
+
+There are two registries, and every entry declares which PIN lengths it
+supports:
+
+* common-PIN patterns (repeated, ascending, descending, paired digits),
+  each tagged with a PATTERN_* family bit;
+* date layouts: the orderings of day, month and year components that
+  generate_demographic_combinations renders a date into.
+
+MPINChecker compiles both registries once per length, the patterns into a
+lookup table and the layouts into a tuple. Adding a length or a pattern
+therefore adds no per-check cost.
+"""
+from itertools import permutations
+
+# Pattern-family bits stored per PIN in MPINChecker.pattern_table
+PATTERN_REPEATED = 1
+PATTERN_ASCENDING = 2
+PATTERN_DESCENDING = 4
+PATTERN_PAIRED = 8
+
+PATTERN_FAMILY_NAMES = (
+    (PATTERN_REPEATED, "REPEATED"),
+    (PATTERN_ASCENDING, "ASCENDING"),
+    (PATTERN_DESCENDING, "DESCENDING"),
+    (PATTERN_PAIRED, "PAIRED"),
+)
+
+# Date components; a layout entry is (component, width). Width 1 means an
+# unpadded single-digit day or month, and the year is taken modulo 10**width.
+DAY = 0
+MONTH = 1
+YEAR = 2
+_COMPONENT_LETTERS = "DMY"
+
+
+class SparsePatternTable(dict):
+    """PIN value -> PATTERN_* bits for lengths too long for a dense table; misses read as 0"""
+
+    def __missing__(self, key):
+        return 0
+
+
+PATTERN_GENERATORS = []
+DATE_LAYOUT_GENERATORS = []
+
+
+def register_pattern(family, supports):
+    """Register a generator yielding common PINs of one family for a length"""
+    def decorator(generate):
+        PATTERN_GENERATORS.append((family, supports, generate))
+        return generate
+    return decorator
+
+
+def register_date_layout(supports):
+    """Register a generator returning the (component, width) orderings for a length"""
+    def decorator(generate):
+        DATE_LAYOUT_GENERATORS.append((supports, generate))
+        return generate
+    return decorator
+
+
+def compile_common_patterns(digit_length):
+    """Map each common PIN of digit_length to the OR of its PATTERN_* families"""
+    patterns = {}
+    for family, supports, generate in PATTERN_GENERATORS:
+        if not supports(digit_length):
+            continue
+        for pin in generate(digit_length):
+            patterns[pin] = patterns.get(pin, 0) | family
+    return patterns
+
+
+def compile_date_layouts(digit_length):
+    """All distinct date layouts for digit_length, in registration order"""
+    layouts = []
+    for supports, generate in DATE_LAYOUT_GENERATORS:
+        if not supports(digit_length):
+            continue
+        for layout in generate(digit_length):
+            if layout not in layouts:
+                layouts.append(layout)
+    return tuple(layouts)
+
+
+def pattern_family_names(families):
+    """Names of the PATTERN_* bits set in families, in declaration order"""
+    return [name for family, name in PATTERN_FAMILY_NAMES if families & family]
+
+
+def layout_name(layout):
+    """Readable form of a date layout, e.g. ((DAY, 2), (YEAR, 2)) -> 'DD+YY'"""
+    return "+".join(_COMPONENT_LETTERS[component] * width for component, width in layout)
+
+
+def orderings(parts, digit_length):
+    """Every ordering of distinct components from parts whose widths add up to digit_length"""
+    layouts = []
+    for size in range(1, len(parts) + 1):
+        for layout in permutations(parts, size):
+            if sum(width for _, width in layout) == digit_length:
+                layouts.append(layout)
+    return layouts
+
+
+@register_pattern(PATTERN_REPEATED, supports=lambda length: length >= 1)
+def repeated_digits(length):
+    for digit in range(10):
+        yield str(digit) * length
+
+
+@register_pattern(PATTERN_ASCENDING, supports=lambda length: 1 <= length <= 9)
+def ascending_digits(length):
+    for start in range(1, 11 - length):
+        yield "".join(str(index) for index in range(start, start + length))
+
+
+@register_pattern(PATTERN_DESCENDING, supports=lambda length: 1 <= length <= 9)
+def descending_digits(length):
+    for start in range(9, length - 1, -1):
+        yield "".join(str(index) for index in range(start, start - length, -1))
+
+
+@register_pattern(PATTERN_PAIRED, supports=lambda length: length >= 4 and length % 2 == 0 and length // 2 <= 9)
+def paired_digits(length):
+    # Runs of doubled consecutive digits: 1122, 112233, 11223344, ...
+    pairs = length // 2
+    for digit in range(1, 11 - pairs):
+        yield "".join(str(digit + offset) * 2 for offset in range(pairs))
+
+
+@register_date_layout(supports=lambda length: length in (4, 6))
+def two_digit_parts(length):
+    # DD, MM and YY: any two of them for 4 digits, all three for 6 digits
+    return orderings(((DAY, 2), (MONTH, 2), (YEAR, 2)), length)
+
+
+@register_date_layout(supports=lambda length: length == 8)
+def full_year_parts(length):
+    # DD, MM and YYYY in any order, e.g. DDMMYYYY or YYYYMMDD
+    return orderings(((DAY, 2), (MONTH, 2), (YEAR, 4)), length)
+
+
+@register_date_layout(supports=lambda length: length in (5, 7))
+def single_digit_parts(length):
+    # One unpadded day or month (2-1-98 -> 20198), with YY for 5 and YYYY for 7 digits
+    year_width = 2 if length == 5 else 4
+    return (orderings(((DAY, 1), (MONTH, 2), (YEAR, year_width)), length)
+            + orderings(((DAY, 2), (MONTH, 1), (YEAR, year_width)), length))
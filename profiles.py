@@ -0,0 +1,165 @@
+"""
+Short-lived demographic profiles for repeated MPIN checks.
+
+A client posts its dates once and receives an opaque profile id. The
+forbidden PINs for those dates (every supported PIN length) are computed up front,
+together with the date orderings that produce each one, so each later check
+(provenance included) is a dictionary lookup instead of re-parsing the dates
+and regenerating the combinations.
+"""
+import secrets
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from app import (SUPPORTED_DIGIT_LENGTHS, Reason, describe_matches, get_checker, reason_flags, reason_names,
+                 strength_from_flags)
+
+# Date fields and the Reason bit each one contributes
+DEMOGRAPHIC_REASONS = (
+    ("birth_date", Reason.DEMOGRAPHIC_DOB_SELF.value),
+    ("spouse_birth_date", Reason.DEMOGRAPHIC_DOB_SPOUSE.value),
+    ("wedding_date", Reason.DEMOGRAPHIC_ANNIVERSARY.value),
+)
+
+PROFILE_DIGIT_LENGTHS = SUPPORTED_DIGIT_LENGTHS
+
+
+class Profile:
+    """Demographic dates plus the precomputed forbidden-PIN table"""
+    __slots__ = ("profile_id", "birth_date", "spouse_birth_date", "wedding_date",
+                 "forbidden", "expires_at", "size")
+
+    def __init__(self, profile_id, birth_date=None, spouse_birth_date=None, wedding_date=None):
+        self.profile_id = profile_id
+        self.birth_date = birth_date
+        self.spouse_birth_date = spouse_birth_date
+        self.wedding_date = wedding_date
+        self.forbidden = self.build_forbidden()
+        self.expires_at = 0.0
+        self.size = self.estimate_size()
+
+    def build_forbidden(self):
+        """Map every forbidden PIN to (Reason bits, {rule name: date layout bits})"""
+        forbidden = {}
+        for digit_length in PROFILE_DIGIT_LENGTHS:
+            checker = get_checker(digit_length)
+            # Same bit per layout as checker.match_date_layouts
+            layout_bits = {layout: 1 << index for index, layout in enumerate(checker.date_layouts)}
+            for field, reason in DEMOGRAPHIC_REASONS:
+                date_str = getattr(self, field)
+                if not date_str:
+                    continue
+                rule_name = Reason(reason).name
+                for layout, pin in checker.render_date_layouts(date_str):
+                    mask, matches = forbidden.setdefault(pin, (0, {}))
+                    matches[rule_name] = matches.get(rule_name, 0) | layout_bits[layout]
+                    forbidden[pin] = (mask | reason, matches)
+        return forbidden
+
+    def estimate_size(self):
+        """Approximate memory footprint in bytes, used for the store's hard cap"""
+        size = sys.getsizeof(self.forbidden) + sys.getsizeof(self.profile_id)
+        for pin, entry in self.forbidden.items():
+            mask, matches = entry
+            size += sys.getsizeof(pin) + sys.getsizeof(entry) + sys.getsizeof(mask) + sys.getsizeof(matches)
+            size += sum(sys.getsizeof(bits) for bits in matches.values())
+        for field, _ in DEMOGRAPHIC_REASONS:
+            size += sys.getsizeof(getattr(self, field))
+        return size
+
+    def check_flags(self, checker, pin):
+        """Same result as checker.check_flags(pin, <profile dates>)"""
+        if not (pin.isdigit() and len(pin) == checker.digit_length):
+            return None
+        # The PIN-only rules (common patterns, leaked lists) run on the checker
+        return reason_flags(int(checker.check_flags(pin)) | self.forbidden.get(pin, (0, None))[0])
+
+    def check_strength(self, checker, pin, provenance=False):
+        """Same result as checker.check_strength(pin, <profile dates>)"""
+        if not provenance:
+            flags = self.check_flags(checker, pin)
+            return strength_from_flags(flags), reason_names(flags or 0)
+        if not (pin.isdigit() and len(pin) == checker.digit_length):
+            return "INVALID", [], describe_matches({}, (None, None, None), checker.date_layouts)
+        # PIN-only rules on the checker, date orderings from the forbidden table
+        matches = {}
+        mask = int(checker.check_flags(pin, matches=matches))
+        date_mask, date_matches = self.forbidden.get(pin, (0, {}))
+        matches.update(date_matches)
+        flags = reason_flags(mask | date_mask)
+        dates = (self.birth_date, self.spouse_birth_date, self.wedding_date)
+        return strength_from_flags(flags), reason_names(flags), describe_matches(matches, dates, checker.date_layouts)
+
+
+class ProfileStore:
+    """Thread-safe profile store with sliding TTL expiry, LRU eviction and a memory cap"""
+
+    def __init__(self, ttl_seconds=900, max_profiles=10000, max_bytes=16 * 1024 * 1024, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_profiles = max_profiles
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._profiles = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._profiles)
+
+    @property
+    def memory_bytes(self):
+        return self._bytes
+
+    def create(self, birth_date=None, spouse_birth_date=None, wedding_date=None):
+        """Precompute a profile for the given dates and return it"""
+        profile = Profile(secrets.token_urlsafe(16), birth_date, spouse_birth_date, wedding_date)
+        if profile.size > self.max_bytes:
+            raise ValueError("Profile exceeds the store memory limit")
+        with self._lock:
+            now = self._clock()
+            profile.expires_at = now + self.ttl_seconds
+            self._profiles[profile.profile_id] = profile
+            self._bytes += profile.size
+            self._evict(now)
+        return profile
+
+    def get(self, profile_id):
+        """Return the live profile for profile_id, or None if unknown or expired"""
+        with self._lock:
+            profile = self._profiles.get(profile_id)
+            if profile is None:
+                return None
+            now = self._clock()
+            if profile.expires_at <= now:
+                self._remove(profile_id)
+                return None
+            # Sliding expiry keeps the dict ordered by expires_at as well as recency
+            profile.expires_at = now + self.ttl_seconds
+            self._profiles.move_to_end(profile_id)
+            return profile
+
+    def delete(self, profile_id):
+        with self._lock:
+            return self._remove(profile_id) is not None
+
+    def _remove(self, profile_id):
+        profile = self._profiles.pop(profile_id, None)
+        if profile is not None:
+            self._bytes -= profile.size
+        return profile
+
+    def _evict(self, now):
+        # Oldest entries sit at the front, so expired ones are popped from there
+        # first, then least recently used ones until both caps are satisfied.
+        while self._profiles:
+            profile = next(iter(self._profiles.values()))
+            if profile.expires_at > now:
+                break
+            self._remove(profile.profile_id)
+        while self._profiles and (len(self._profiles) > self.max_profiles or self._bytes > self.max_bytes):
+            self._remove(next(iter(self._profiles)))
+
+
+profile_store = ProfileStore()
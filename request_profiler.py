@@ -0,0 +1,126 @@
+"""
+Opt-in per-request profiling for slow requests in production.
+
+A profiled request gets a Server-Timing header with the time spent in each
+check stage (json_parse, checker_lookup, check_strength, detailed_analysis,
+and date_parsing and combination_generation when /api/profile builds a
+profile), template rendering on the Flask pages, and the whole request
+("app"), all in milliseconds. Browser dev
+tools show it in the network timing panel. With MPIN_PROFILE_DIR set, the
+Flask app also saves a cProfile dump of the request (load it with pstats or
+snakeviz). The directory is a ring buffer: once it holds MPIN_PROFILE_KEEP
+dumps, the oldest is removed for each new one.
+
+A request is profiled when it sends the header X-MPIN-Profile with the
+value of MPIN_PROFILE_SECRET, or at random with probability
+MPIN_PROFILE_SAMPLE. With neither set, factory.create_app installs no hooks
+and the stage metrics never look for per-request timings, so a disabled
+profiler costs nothing. Only one request per process is under cProfile at
+a time; others picked meanwhile still get Server-Timing.
+"""
+import glob
+import hmac
+import os
+import random
+import re
+import threading
+import time
+
+from logs import get_logger
+
+PROFILE_HEADER = 'X-MPIN-Profile'
+PROFILE_SECRET_ENV = 'MPIN_PROFILE_SECRET'
+PROFILE_SAMPLE_ENV = 'MPIN_PROFILE_SAMPLE'
+PROFILE_DIR_ENV = 'MPIN_PROFILE_DIR'
+PROFILE_KEEP_ENV = 'MPIN_PROFILE_KEEP'
+DEFAULT_KEEP = 50
+DUMP_PREFIX = 'mpin-'
+
+logger = get_logger('profiler')
+
+
+class RequestProfiler:
+    """Decides which requests to profile and keeps their cProfile dumps in a ring buffer"""
+
+    def __init__(self, secret=None, sample_rate=0.0, dump_dir=None, keep=DEFAULT_KEEP):
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError(f"{PROFILE_SAMPLE_ENV} must be between 0 and 1, got {sample_rate}")
+        self.secret = secret.encode() if secret else None
+        self.sample_rate = sample_rate
+        self.dump_dir = dump_dir
+        self.keep = keep
+        self.dumps = 0
+        self._cprofile_lock = threading.Lock()
+        self._dump_lock = threading.Lock()
+        self._sequence = 0
+
+    @classmethod
+    def from_environ(cls):
+        return cls(secret=os.environ.get(PROFILE_SECRET_ENV) or None,
+                   sample_rate=float(os.environ.get(PROFILE_SAMPLE_ENV) or 0.0),
+                   dump_dir=os.environ.get(PROFILE_DIR_ENV) or None,
+                   keep=int(os.environ.get(PROFILE_KEEP_ENV) or DEFAULT_KEEP))
+
+    @property
+    def enabled(self):
+        return self.secret is not None or self.sample_rate > 0.0
+
+    def wants(self, header_value):
+        """Whether to profile a request that sent header_value (None if absent) in PROFILE_HEADER"""
+        if header_value is not None and self.secret is not None:
+            if isinstance(header_value, str):
+                header_value = header_value.encode('latin-1')
+            if hmac.compare_digest(header_value, self.secret):
+                return True
+        return self.sample_rate > 0.0 and random.random() < self.sample_rate
+
+    def start(self):
+        """A running cProfile.Profile, or None without a dump directory or while another request holds it"""
+        if self.dump_dir is None or not self._cprofile_lock.acquire(blocking=False):
+            return None
+        import cProfile
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def finish(self, profile, label):
+        """Stop profile (from start) and save it to the ring buffer; returns the dump's path or None"""
+        profile.disable()
+        self._cprofile_lock.release()
+        with self._dump_lock:
+            self._sequence += 1
+            name = re.sub(r'[^A-Za-z0-9]+', '_', label).strip('_') or 'root'
+            path = os.path.join(self.dump_dir, f"{DUMP_PREFIX}{time.strftime('%Y%m%dT%H%M%S')}"
+                                               f"-{os.getpid()}-{self._sequence:06d}-{name}.prof")
+            try:
+                os.makedirs(self.dump_dir, exist_ok=True)
+                self._evict()
+                profile.dump_stats(path)
+            except OSError:
+                logger.exception("Could not save profile dump")
+                return None
+            self.dumps += 1
+        return path
+
+    def _evict(self):
+        # Names start with a timestamp, so they sort oldest first. Several
+        # worker processes may share the directory and remove the same file.
+        paths = sorted(glob.glob(os.path.join(self.dump_dir, f"{DUMP_PREFIX}*.prof")))
+        if len(paths) < self.keep:
+            return
+        for path in paths[:len(paths) - self.keep + 1]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def server_timing(timings, total_seconds):
+    """Server-Timing header value for per-stage seconds plus the whole request"""
+    entries = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in timings.items()
+               if not name.startswith('_')]
+    entries.append(f"app;dur={total_seconds * 1000:.3f}")
+    return ', '.join(entries)
+
+
+request_profiler = RequestProfiler.from_environ()
@@ -0,0 +1,124 @@
+"""
+In-process cache of full /api/check_mpin response bodies.
+
+Users resubmit the form after small edits, so the same (PIN, dates) inputs
+recur. Cache keys are an HMAC-SHA256 of the normalized inputs under a
+random per-process secret. The cache therefore never holds raw PINs or
+dates as keys, and the keys are useless outside the process. The PIN is
+also left out of the stored body and added back on each hit.
+
+Entries expire ttl_seconds after their last use and the least recently
+used ones are evicted beyond max_entries. Hit, miss, eviction and
+expiration counters are available from stats().
+
+Environment: MPIN_RESULT_CACHE_SIZE (entries, 0 disables the cache) and
+MPIN_RESULT_CACHE_TTL (seconds).
+"""
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+RESULT_CACHE_SIZE_ENV = 'MPIN_RESULT_CACHE_SIZE'
+RESULT_CACHE_TTL_ENV = 'MPIN_RESULT_CACHE_TTL'
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_TTL_SECONDS = 300
+
+
+class ResultCache:
+    """Thread-safe LRU cache with sliding TTL expiry, keyed by HMAC digests"""
+
+    def __init__(self, ttl_seconds=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES, secret=None,
+                 clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._secret = secret or secrets.token_bytes(32)
+        # key -> [expires_at, body]
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def key(self, *inputs):
+        """HMAC digest of the normalized inputs (strings or None)"""
+        message = json.dumps(inputs, separators=(',', ':')).encode()
+        return hmac.new(self._secret, message, hashlib.sha256).digest()
+
+    def get(self, key):
+        """Cached body for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            now = self._clock()
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            # Sliding expiry keeps the dict ordered by expires_at as well as recency
+            entry[0] = now + self.ttl_seconds
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, body):
+        """Store body (which must not be modified afterwards) under key"""
+        if not self.enabled:
+            return
+        with self._lock:
+            now = self._clock()
+            self._entries[key] = [now + self.ttl_seconds, body]
+            self._entries.move_to_end(key)
+            self._evict(now)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _evict(self, now):
+        # Expired entries sit at the front, then least recently used ones
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry[0] > now:
+                break
+            del self._entries[key]
+            self.expirations += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+result_cache = ResultCache(
+    ttl_seconds=float(os.environ.get(RESULT_CACHE_TTL_ENV, DEFAULT_TTL_SECONDS)),
+    max_entries=int(os.environ.get(RESULT_CACHE_SIZE_ENV, DEFAULT_MAX_ENTRIES)),
+)
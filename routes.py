@@ -0,0 +1,207 @@
+"""
+Routes shared by every launcher, registered by factory.create_app.
+
+The checker modules are imported inside the handlers that use them, so
+importing this module (and creating the app) costs no more than Flask
+itself. After warm-up, or after the first request, those imports are
+already cached in sys.modules.
+"""
+import time
+
+from flask import Blueprint, Response, current_app, g, jsonify, render_template, request, stream_with_context
+
+from logs import get_logger
+from metrics import stage
+
+api = Blueprint('api', __name__)
+request_log = get_logger('request')
+_json_parse_metric = stage('json_parse')
+
+
+def api_response(body, status):
+    """JSON response; error statuses are only sent when API_ERROR_STATUS is set"""
+    if current_app.config['API_ERROR_STATUS']:
+        return jsonify(body), status
+    return jsonify(body)
+
+
+def error_response(message, status, **extra):
+    return api_response(dict({'success': False, 'error': message}, **extra), status)
+
+
+@api.route('/')
+def index():
+    """Main page with MPIN strength checker interface"""
+    return render_template('index.html')
+
+@api.route('/debug')
+def debug():
+    """Debug test page for MPIN analysis"""
+    return render_template('simple_debug.html')
+
+@api.route('/simple-debug')
+def simple_debug():
+    """Simple debug page for testing"""
+    return render_template('simple_debug.html')
+
+# Health check endpoint for Render: the process is up, whether or not it is warm
+@api.route('/health')
+def health_check():
+    """Health check endpoint for Render monitoring"""
+    from datetime import datetime
+    return jsonify({
+        'status': 'healthy',
+        'timestamp': datetime.now().isoformat(),
+        'service': 'MPIN Analyzer',
+        'environment': 'development' if current_app.debug else 'production'
+    })
+
+@api.route('/ready')
+def readiness():
+    """Readiness endpoint: 200 once the shared tables are built, 503 while warming up"""
+    report = current_app.extensions['mpin_startup']
+    return jsonify(dict(report.as_dict(), warmup=current_app.config['WARMUP'])), 200 if report.ready else 503
+
+@api.route('/ping')
+def ping():
+    """Simple ping endpoint"""
+    return 'pong'
+
+@api.route('/metrics')
+def prometheus_metrics():
+    """Request, check-stage, verdict and cache metrics in the Prometheus text format"""
+    from metrics import CONTENT_TYPE, render
+    return Response(render(), content_type=CONTENT_TYPE)
+
+@api.route('/api/check_mpin', methods=['POST'])
+def check_mpin():
+    """API endpoint to check MPIN strength"""
+    try:
+        from analysis import check_mpin_request
+
+        started = time.perf_counter()
+        data = request.get_json(silent=True)
+        _json_parse_metric.observe(time.perf_counter() - started)
+        body, status = check_mpin_request(data)
+        if not body['success']:
+            g.log_fields = {'error': body['error']}
+            return api_response(body, status)
+        # Picked up by the request log (LOG_REQUESTS); never the PIN or dates themselves
+        g.log_fields = {'pin_length': len(body['pin']), 'strength': body.get('strength'),
+                        'reasons': body.get('reasons')}
+        return jsonify(body)
+
+    except Exception as e:
+        request_log.exception("Error in check_mpin")
+        return error_response(f'An error occurred: {str(e)}', 500)
+
+@api.route('/api/cache_stats')
+def cache_stats():
+    """Hit, miss, eviction and expiration counters of the /api/check_mpin result cache"""
+    from result_cache import result_cache
+    return jsonify(dict(result_cache.stats(), success=True))
+
+@api.route('/api/check_mpin/batch', methods=['POST'])
+def check_mpin_batch():
+    """API endpoint to check many PINs sent as NDJSON, streaming NDJSON verdicts back"""
+    from batch import NDJSON_MIMETYPE, iter_batch_response, parse_mode
+    try:
+        mode = parse_mode(request.args.get('mode'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return Response(stream_with_context(iter_batch_response(request.stream, mode)),
+                    mimetype=NDJSON_MIMETYPE)
+
+@api.route('/api/profile', methods=['POST'])
+def create_profile():
+    """API endpoint to register demographic dates once for repeated PIN checks"""
+    try:
+        from analysis import create_profile_request
+
+        body, status = create_profile_request(request.get_json(silent=True))
+        if not body['success']:
+            return api_response(body, status)
+        return jsonify(body)
+    except Exception as e:
+        request_log.exception("Error in create_profile")
+        return error_response(f'An error occurred: {str(e)}', 500)
+
+@api.route('/api/test_cases')
+def run_test_cases():
+    """API endpoint to run all test cases"""
+    try:
+        from app import get_checker
+
+        # Capture test results
+        test_results = []
+
+        # Sample test cases from app.py
+        test_cases = [
+            {"part": "A", "digit_length": 4, "pin": "1111", "expected": True},
+            {"part": "A", "digit_length": 4, "pin": "1234", "expected": True},
+            {"part": "A", "digit_length": 4, "pin": "9876", "expected": True},
+            {"part": "A", "digit_length": 4, "pin": "1122", "expected": True},
+            {"part": "A", "digit_length": 4, "pin": "4839", "expected": False},
+            {"part": "B", "digit_length": 4, "pin": "1111", "birth_date": None, "spouse_birth_date": None, "wedding_date": None, "expected": "WEAK"},
+            {"part": "B", "digit_length": 4, "pin": "0201", "birth_date": "02-01-1998", "spouse_birth_date": None, "wedding_date": None, "expected": "WEAK"},
+            {"part": "B", "digit_length": 4, "pin": "4839", "birth_date": "02-01-1998", "spouse_birth_date": "15-06-1995", "wedding_date": "10-07-2020", "expected": "STRONG"},
+            {"part": "C", "digit_length": 4, "pin": "1111", "birth_date": None, "spouse_birth_date": None, "wedding_date": None, "expected": ("WEAK", ["COMMONLY_USED"])},
+            {"part": "C", "digit_length": 4, "pin": "0201", "birth_date": "02-01-1998", "spouse_birth_date": None, "wedding_date": None, "expected": ("WEAK", ["DEMOGRAPHIC_DOB_SELF"])},
+            {"part": "C", "digit_length": 6, "pin": "111111", "birth_date": None, "spouse_birth_date": None, "wedding_date": None, "expected": ("WEAK", ["COMMONLY_USED"])},
+            {"part": "C", "digit_length": 6, "pin": "020198", "birth_date": "02-01-1998", "spouse_birth_date": None, "wedding_date": None, "expected": ("WEAK", ["DEMOGRAPHIC_DOB_SELF"])},
+        ]
+
+        for test_index, test in enumerate(test_cases, 1):
+            checker = get_checker(test["digit_length"])
+            pin = test["pin"]
+            result = {"test_number": test_index, "pin": pin, "part": test["part"]}
+
+            try:
+                if test["part"] == "A":
+                    actual = checker.is_common(pin)
+                    expected = test["expected"]
+                    result["expected"] = expected
+                    result["actual"] = actual
+                    result["passed"] = actual == expected
+                elif test["part"] == "B":
+                    birth_date = test.get("birth_date")
+                    spouse_birth_date = test.get("spouse_birth_date")
+                    wedding_date = test.get("wedding_date")
+                    actual = checker.check_strength(pin, birth_date, spouse_birth_date, wedding_date)[0]
+                    expected = test["expected"]
+                    result["expected"] = expected
+                    result["actual"] = actual
+                    result["passed"] = actual == expected
+                elif test["part"] == "C":
+                    birth_date = test.get("birth_date")
+                    spouse_birth_date = test.get("spouse_birth_date")
+                    wedding_date = test.get("wedding_date")
+                    actual = checker.check_strength(pin, birth_date, spouse_birth_date, wedding_date)
+                    expected = test["expected"]
+                    result["expected"] = expected
+                    result["actual"] = actual
+                    result["passed"] = actual == expected
+
+                test_results.append(result)
+            except Exception as e:
+                result["error"] = str(e)
+                result["passed"] = False
+                test_results.append(result)
+
+        passed_count = sum(1 for test in test_results if test.get("passed", False))
+        total_count = len(test_results)
+
+        return jsonify({
+            'success': True,
+            'results': test_results,
+            'summary': {
+                'total': total_count,
+                'passed': passed_count,
+                'failed': total_count - passed_count,
+                'success_rate': f"{(passed_count/total_count)*100:.1f}%"
+            }
+        })
+
+    except Exception as e:
+        request_log.exception("Error running test cases")
+        return error_response(f'Error running test cases: {str(e)}', 500)
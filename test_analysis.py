@@ -0,0 +1,69 @@
+"""
+Tests for the "modes" field of /api/check_mpin in analysis.py (run with python -m pytest test_analysis.py).
+"""
+import pytest
+
+from analysis import check_mpin_request, parse_modes, select_modes
+from result_cache import result_cache
+
+DATES = {'birth_date': '02-01-1998', 'wedding_date': '20-01-2020'}
+
+
+def test_parse_modes():
+    assert parse_modes(None) is None
+    assert parse_modes(['detailed']) == ('detailed',)
+    # Duplicates collapse, first occurrence keeps its place
+    assert parse_modes(['strength', 'common', 'strength']) == ('strength', 'common')
+
+
+@pytest.mark.parametrize('value', [
+    [], ['fast'], ['common', 'bogus'], ['Common'], [None], [1],
+    'common', {'common': True}, 1, True,
+])
+def test_parse_modes_rejects(value):
+    with pytest.raises(ValueError, match='non-empty list of: common, strength, detailed'):
+        parse_modes(value)
+
+
+def test_select_modes():
+    body = {'success': True, 'strength': 'WEAK', 'reasons': ['COMMONLY_USED'], 'is_common': True,
+            'analysis': {}}
+    assert select_modes(body, ('common',), '1234') == {'success': True, 'modes': ['common'],
+                                                       'is_common': True, 'pin': '1234'}
+    assert select_modes(body, ('detailed', 'common'), '1234') == dict(body, modes=['detailed', 'common'],
+                                                                     pin='1234')
+
+
+@pytest.mark.parametrize('modes', [[], ['fast'], 'strength', {'strength': True}, [['common']]])
+def test_invalid_modes_are_request_errors(modes):
+    body, status = check_mpin_request({'pin': '1234', 'modes': modes})
+    assert status == 400 and body['success'] is False
+    assert 'modes must be a non-empty list' in body['error']
+
+
+@pytest.mark.parametrize('modes, fields', [
+    (['common'], {'is_common'}),
+    (['strength'], {'strength'}),
+    (['strength', 'common'], {'strength', 'is_common'}),
+])
+def test_cheap_modes_response_shape(modes, fields):
+    # check_modes_only answers without the reasons list or the detailed analysis
+    for pin, dates in (('1234', {}), ('0201', DATES), ('4839', DATES)):
+        result_cache.clear()
+        body, status = check_mpin_request(dict(dates, pin=pin, modes=modes))
+        assert status == 200
+        assert set(body) == {'success', 'modes', 'pin'} | fields
+        assert body['modes'] == modes and body['pin'] == pin
+        full, _ = check_mpin_request(dict(dates, pin=pin))
+        assert {field: body[field] for field in fields} == {field: full[field] for field in fields}
+
+
+def test_detailed_mode_response_shape():
+    # The detailed mode runs the full check, and a cache hit gives the same fields
+    result_cache.clear()
+    request = dict(DATES, pin='0201', modes=['detailed', 'common'])
+    body, status = check_mpin_request(request)
+    assert status == 200
+    assert set(body) == {'success', 'modes', 'pin', 'strength', 'reasons', 'analysis', 'is_common'}
+    assert body['reasons'] == ['DEMOGRAPHIC_DOB_SELF']
+    assert check_mpin_request(request) == (body, 200)
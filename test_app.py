@@ -0,0 +1,176 @@
+"""
+Regression tests for the web entry points (run with python -m pytest test_app.py).
+
+The checker's own cases live in app.run_tests.
+"""
+import asyncio
+import json
+
+NESTED_BATCH_BODY = (b'{"pin": "1234"}\n'
+                     + b'[' * 2000 + b']' * 2000 + b'\n'
+                     + b'{"pin": "4839", "id": "last"}\n')
+NESTED_JSON_BODY = b'[' * 20000 + b']' * 20000
+
+
+def assert_nested_line_verdicts(body):
+    verdicts = [json.loads(line) for line in body.decode().splitlines()]
+    assert [verdict['line'] for verdict in verdicts] == [1, 2, 3]
+    assert verdicts[0]['strength'] == 'WEAK'
+    assert verdicts[1]['success'] is False and 'recursion' in verdicts[1]['error']
+    assert verdicts[2]['strength'] == 'STRONG' and verdicts[2]['id'] == 'last'
+
+
+def test_batch_nested_line_flask():
+    from factory import create_app
+
+    client = create_app('production', warmup='eager').test_client()
+    response = client.post('/api/check_mpin/batch', data=NESTED_BATCH_BODY,
+                           content_type='application/x-ndjson')
+    assert response.status_code == 200
+    assert_nested_line_verdicts(response.data)
+
+
+def asgi_post(path, body, content_type=b'application/json', app=None, chunk_size=None):
+    """(status, response body) of one POST to a CheckApp (a fresh one by default)
+
+    The body is sent as one message, or in chunk_size-byte messages.
+    """
+    from asgi import CheckApp
+
+    app = app or CheckApp(executor_workers=1)
+    chunk_size = chunk_size or max(len(body), 1)
+    chunks = [body[start:start + chunk_size] for start in range(0, len(body), chunk_size)] or [b'']
+    messages = [{'type': 'http.request', 'body': chunk, 'more_body': index < len(chunks) - 1}
+                for index, chunk in enumerate(chunks)]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    path, _, query = path.partition('?')
+    scope = {'type': 'http', 'method': 'POST', 'path': path, 'query_string': query.encode(),
+             'headers': [(b'content-type', content_type)]}
+    asyncio.run(app(scope, receive, send))
+    return sent[0]['status'], b''.join(message.get('body', b'') for message in sent[1:])
+
+
+def test_batch_nested_line_asgi():
+    status, body = asgi_post('/api/check_mpin/batch', NESTED_BATCH_BODY, b'application/x-ndjson')
+    assert status == 200
+    assert_nested_line_verdicts(body)
+
+
+def test_batch_chunked_body_asgi():
+    # Lines split across messages and an oversized line give the same verdicts in any chunking
+    from batch import MAX_LINE_BYTES
+
+    body = (b'{"pin": "1234"}\n' + b'{"pin": "' + b'1' * (MAX_LINE_BYTES + 10) + b'"}\n'
+            + b''.join(b'{"pin": "%04d", "id": %d}\n' % (value * 37 % 10000, value) for value in range(300))
+            + b'{"pin": "4839"}')
+    _, whole = asgi_post('/api/check_mpin/batch', body, b'application/x-ndjson')
+    verdicts = [json.loads(line) for line in whole.decode().splitlines()]
+    assert len(verdicts) == 303 and 'exceeds' in verdicts[1]['error']
+    assert verdicts[-1]['strength'] == 'STRONG'
+    for chunk_size in (1000, 7):
+        _, chunked = asgi_post('/api/check_mpin/batch', body, b'application/x-ndjson', chunk_size=chunk_size)
+        assert chunked == whole
+
+
+def test_nested_json_body_asgi():
+    # A body nested deeper than the recursion limit is answered like malformed JSON
+    for path in ('/api/check_mpin', '/api/profile'):
+        status, body = asgi_post(path, NESTED_JSON_BODY)
+        assert status == 200
+        assert json.loads(body)['success'] is False
+
+
+def test_nested_json_body_flask():
+    from factory import create_app
+
+    client = create_app('production', warmup='eager').test_client()
+    for path in ('/api/check_mpin', '/api/profile'):
+        response = client.post(path, data=NESTED_JSON_BODY, content_type='application/json')
+        assert response.get_json()['success'] is False
+
+
+def test_unknown_profile_falls_back_to_sent_dates():
+    # Profiles are per worker: another worker must still answer from the dates sent with the id
+    from factory import create_app
+
+    client = create_app('production', warmup='eager').test_client()
+    response = client.post('/api/check_mpin', json={'pin': '0201', 'profile_id': 'other-worker',
+                                                    'birth_date': '02-01-1998'})
+    assert response.status_code == 200
+    assert response.get_json()['reasons'] == ['DEMOGRAPHIC_DOB_SELF']
+    response = client.post('/api/check_mpin', json={'pin': '0201', 'profile_id': 'other-worker'})
+    assert response.get_json()['profile_expired'] is True
+
+
+def test_profile_check_matches_dates_check():
+    # The profile's provenance comes from its own table and must equal the checker's
+    from factory import create_app
+    from result_cache import result_cache
+
+    client = create_app('production', warmup='eager').test_client()
+    dates = {'birth_date': '02-01-1998', 'wedding_date': '20-01-2020'}
+    profile_id = client.post('/api/profile', json=dates).get_json()['profile_id']
+    for pin in ('0201', '2001', '020198', '1234'):
+        result_cache.clear()
+        with_profile = client.post('/api/check_mpin', json={'pin': pin, 'profile_id': profile_id}).get_json()
+        result_cache.clear()
+        with_dates = client.post('/api/check_mpin', json=dict(dates, pin=pin)).get_json()
+        assert with_profile == with_dates
+
+
+def test_result_cache_keeps_no_dates():
+    # The cached body masks the dates; a hit rebuilds them from the request
+    from factory import create_app
+    from result_cache import result_cache
+
+    client = create_app('production', warmup='eager').test_client()
+    result_cache.clear()
+    request_body = {'pin': '0201', 'birth_date': '02-01-1998', 'wedding_date': '01-02-2010'}
+    first = client.post('/api/check_mpin', json=request_body).get_json()
+    assert '02-01-1998' in json.dumps(first) and '01-02-2010' in json.dumps(first)
+    assert all('1998' not in json.dumps(body) and '2010' not in json.dumps(body)
+               for _, body in result_cache._entries.values())
+    assert client.post('/api/check_mpin', json=request_body).get_json() == first
+    assert result_cache.hits >= 1
+
+
+def test_asgi_profile_built_off_loop_during_warm_up(monkeypatch):
+    import threading
+
+    import profiles
+    from asgi import CheckApp
+
+    threads = []
+    create = profiles.profile_store.create
+
+    def recording_create(*dates):
+        threads.append(threading.current_thread().name)
+        return create(*dates)
+
+    monkeypatch.setattr(profiles.profile_store, 'create', recording_create)
+    app = CheckApp(executor_workers=1)
+    for state in ('warming', 'ready'):
+        app.report.state = state
+        status, body = asgi_post('/api/profile', b'{"birth_date": "02-01-1998"}', app=app)
+        assert json.loads(body)['success'] is True
+    assert threads[0].startswith('mpin-asgi') and not threads[1].startswith('mpin-asgi')
+
+
+def test_strength_score_for_non_ascii_digits():
+    # The guess-rank table only indexes ASCII digits; other valid digits get the coarse score
+    from factory import create_app
+    from guess_rank import strength_score
+
+    assert strength_score('١٢٣٤', 'STRONG', []) == 100
+    assert strength_score('²²²²', 'WEAK', ['COMMONLY_USED']) == 60
+    assert strength_score('1234', 'WEAK', ['COMMONLY_USED']) <= 20
+    client = create_app('production', warmup='eager').test_client()
+    body = client.post('/api/check_mpin', json={'pin': '١٢٣٤'}).get_json()
+    assert body['success'] is True and body['analysis']['strength_score'] == 100
@@ -0,0 +1,100 @@
+"""
+Round-trip tests for the leaked-PIN file format in leaked.py (run with python -m pytest test_leaked.py).
+"""
+import os
+
+import pytest
+
+from leaked import (LAYOUT_DENSE, LAYOUT_SPARSE, LEAKED_PINS_ENV, LeakedPinDictionary, load_configured_dictionaries,
+                    read_leaked_text, write_leaked_dictionary)
+
+# Both ends of the PIN space, neighbours of hits, and the largest count the format holds
+COUNTS = {0: 7, 1: 1, 4999: 250, 5001: 3, 9998: 0xFFFFFFFF, 9999: 12}
+MISSES = ('0002', '5000', '4998', '9997')
+
+
+def write(tmp_path, name, counts, layout=None, digit_length=4):
+    path = os.path.join(tmp_path, name)
+    write_leaked_dictionary(path, counts, digit_length, layout)
+    return path
+
+
+def build(tmp_path, name, counts, layout=None):
+    return LeakedPinDictionary(write(tmp_path, name, counts, layout))
+
+
+@pytest.mark.parametrize('layout', [LAYOUT_DENSE, LAYOUT_SPARSE])
+def test_round_trip(tmp_path, layout):
+    dictionary = build(tmp_path, 'leaked.bin', COUNTS, layout)
+    try:
+        assert (dictionary.digit_length, dictionary.layout, dictionary.records) == (4, layout, len(COUNTS))
+        for value, count in COUNTS.items():
+            assert dictionary.frequency(f"{value:04d}") == count
+        for pin in MISSES:
+            assert dictionary.frequency(pin) == 0
+        # Wrong shapes are misses, not errors
+        for pin in ('123', '12345', '12a4', '١٢٣٤', ''):
+            assert dictionary.frequency(pin) == 0
+    finally:
+        dictionary.close()
+
+
+def test_sparse_binary_search_single_record(tmp_path):
+    dictionary = build(tmp_path, 'one.bin', {5000: 9}, LAYOUT_SPARSE)
+    try:
+        assert [dictionary.frequency(pin) for pin in ('4999', '5000', '5001')] == [0, 9, 0]
+    finally:
+        dictionary.close()
+
+
+def test_layout_chosen_by_fill(tmp_path):
+    sparse = build(tmp_path, 'sparse.bin', {value: 1 for value in range(10)})
+    dense = build(tmp_path, 'dense.bin', {value: 1 for value in range(6000)})
+    try:
+        assert (sparse.layout, dense.layout) == (LAYOUT_SPARSE, LAYOUT_DENSE)
+        assert os.path.getsize(sparse.path) < os.path.getsize(dense.path)
+    finally:
+        sparse.close()
+        dense.close()
+
+
+def test_rejects_corrupt_files(tmp_path):
+    path = write(tmp_path, 'leaked.bin', COUNTS, LAYOUT_SPARSE)
+    with open(path, 'ab') as handle:
+        handle.write(b'\0')
+    with pytest.raises(ValueError, match='expected'):
+        LeakedPinDictionary(path)
+    with open(path, 'wb') as handle:
+        handle.write(b'NOTLEAKED' * 4)
+    with pytest.raises(ValueError, match='not a version'):
+        LeakedPinDictionary(path)
+    with pytest.raises(ValueError, match='outside'):
+        write_leaked_dictionary(path, {10000: 1}, 4)
+
+
+def test_read_leaked_text():
+    counts = read_leaked_text(['# header', '1234,5', '1234,2', '0000', '', '9999, 3'], 4)
+    assert counts == {1234: 7, 0: 1, 9999: 3}
+    with pytest.raises(ValueError, match='line 1'):
+        read_leaked_text(['123,4'], 4)
+
+
+def test_configured_dictionaries(tmp_path, monkeypatch):
+    four = write(tmp_path, 'leaked_4.bin', COUNTS)
+    six = write(tmp_path, 'leaked_6.bin', {123456: 4}, digit_length=6)
+    monkeypatch.setenv(LEAKED_PINS_ENV, os.pathsep.join((four, six)))
+    dictionaries = load_configured_dictionaries()
+    try:
+        assert sorted(dictionaries) == [4, 6]
+        assert dictionaries[6].frequency('123456') == 4
+    finally:
+        for dictionary in dictionaries.values():
+            dictionary.close()
+
+
+def test_duplicate_digit_length_rejected(tmp_path, monkeypatch):
+    first = write(tmp_path, 'first.bin', COUNTS)
+    second = write(tmp_path, 'second.bin', {1234: 1})
+    monkeypatch.setenv(LEAKED_PINS_ENV, os.pathsep.join((first, second)))
+    with pytest.raises(ValueError, match='already lists .*first.bin for 4-digit PINs'):
+        load_configured_dictionaries()
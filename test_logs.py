@@ -0,0 +1,63 @@
+"""
+Tests for the log redaction in logs.py (run with python -m pytest test_logs.py).
+
+No PIN or date may reach the log output, whatever part of the record carries it.
+"""
+import io
+import json
+import logging
+
+import pytest
+
+from logs import REDACTED, RedactingFormatter
+
+PIN = '482913'
+DOB = '02-01-1998'
+UNPADDED_DOB = '2-1-1998'
+
+
+def log_output(style):
+    """Everything one record written through RedactingFormatter(style) puts on the stream"""
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(RedactingFormatter(style))
+    logger = logging.getLogger(f'mpin.test.redaction.{style}')
+    logger.handlers[:] = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    try:
+        raise ValueError(f"Bad input: pin {PIN}, birth date {DOB}")
+    except ValueError:
+        logger.exception("Checking %s for %s (%s)", PIN, DOB, UNPADDED_DOB, extra={'fields': {
+            'pin': PIN,
+            'birth_date': DOB,
+            'note': f"user typed {PIN} and {DOB}",
+            'inputs': [PIN, UNPADDED_DOB],
+            'pin_length': len(PIN),
+        }})
+    return stream.getvalue()
+
+
+@pytest.mark.parametrize('style', ['json', 'text'])
+def test_pin_and_dates_never_logged(style):
+    output = log_output(style)
+    for value in (PIN, DOB, UNPADDED_DOB, '1998'):
+        assert value not in output
+    # The record is still written, with the sensitive parts masked
+    assert 'Checking [pin] for [date] ([date])' in output
+    assert 'ValueError' in output
+
+
+def test_json_fields_redacted():
+    entry = json.loads(log_output('json'))
+    assert entry['pin'] == REDACTED and entry['birth_date'] == REDACTED
+    assert entry['note'] == 'user typed [pin] and [date]'
+    assert entry['inputs'] == ['[pin]', '[date]']
+    assert entry['pin_length'] == 6
+    assert 'Bad input: pin [pin], birth date [date]' in entry['exc']
+
+
+def test_text_fields_redacted():
+    output = log_output('text')
+    assert f'pin={REDACTED}' in output and f'birth_date={REDACTED}' in output
+    assert 'pin_length=6' in output
@@ -0,0 +1,108 @@
+"""
+Tests for the Prometheus output of metrics.py (run with python -m pytest test_metrics.py).
+
+GET /metrics is scraped after a few requests and parsed back into families.
+"""
+import re
+
+from metrics import check_outcomes
+
+SAMPLE = re.compile(r'^([a-z_]+)(?:\{(.*)\})? (\S+)$')
+LABEL = re.compile(r'([a-z_]+)="([^"]*)"')
+
+# Family name -> (type, label names of its samples, histogram le aside)
+EXPECTED_FAMILIES = {
+    'mpin_requests_total': ('counter', {'route', 'status'}),
+    'mpin_request_duration_seconds': ('histogram', {'route'}),
+    'mpin_check_stage_duration_seconds': ('histogram', {'stage'}),
+    'mpin_check_outcomes_total': ('counter', {'outcome'}),
+    'mpin_check_reasons_total': ('counter', {'reason'}),
+    'mpin_rule_evaluations_total': ('counter', {'rule'}),
+    'mpin_rule_hits_total': ('counter', {'rule'}),
+    'mpin_rule_seconds_total': ('counter', {'rule'}),
+    'mpin_result_cache_entries': ('gauge', set()),
+    'mpin_result_cache_hits_total': ('counter', set()),
+    'mpin_log_records_dropped_total': ('counter', set()),
+}
+
+
+def parse(text):
+    """({family: type}, {family: [(sample name, labels dict, value)]}) from Prometheus text"""
+    types, samples = {}, {}
+    for line in text.splitlines():
+        if line.startswith('# TYPE '):
+            _, _, name, kind = line.split(' ')
+            assert name not in types, f"{name} declared twice"
+            types[name] = kind
+            samples[name] = []
+            continue
+        if line.startswith('#'):
+            continue
+        match = SAMPLE.match(line)
+        assert match, f"malformed sample line {line!r}"
+        name, labels, value = match.groups()
+        family = re.sub(r'_(bucket|sum|count)$', '', name) if name not in types else name
+        assert family in types, f"{name} has no # TYPE line"
+        samples[family].append((name, dict(LABEL.findall(labels or '')), float(value)))
+    return types, samples
+
+
+def scrape():
+    from factory import create_app
+
+    client = create_app('production', warmup='eager').test_client()
+    for body in ({'pin': '1234'}, {'pin': '4839'}, {'pin': '0201', 'birth_date': '02-01-1998'},
+                 {'pin': '12a4'}, {'pin': '1234', 'modes': ['fast']}, {'pin': '1234', 'profile_id': 'gone'}):
+        client.post('/api/check_mpin', json=body)
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    return parse(response.get_data(as_text=True))
+
+
+def outcome_counts():
+    return {values[0]: count for values, count in check_outcomes._children.items()}
+
+
+def test_families_types_and_labels():
+    types, samples = scrape()
+    for family, (kind, label_names) in EXPECTED_FAMILIES.items():
+        assert types.get(family) == kind, family
+        assert samples[family], f"{family} has no samples"
+        for name, labels, _ in samples[family]:
+            extra = {'le'} if name.endswith('_bucket') else set()
+            assert set(labels) == label_names | extra, name
+    rules = {labels['rule'] for _, labels, _ in samples['mpin_rule_evaluations_total']}
+    assert {'COMMONLY_USED', 'DEMOGRAPHIC_DOB_SELF'} <= rules
+    for family in ('mpin_rule_hits_total', 'mpin_rule_seconds_total'):
+        assert {labels['rule'] for _, labels, _ in samples[family]} == rules
+
+
+def test_histograms_are_cumulative():
+    _, samples = scrape()
+    for family in ('mpin_request_duration_seconds', 'mpin_check_stage_duration_seconds'):
+        buckets = {}
+        counts = {}
+        for name, labels, value in samples[family]:
+            key = tuple(sorted((k, v) for k, v in labels.items() if k != 'le'))
+            if name.endswith('_bucket'):
+                buckets.setdefault(key, []).append((labels['le'], value))
+            elif name.endswith('_count'):
+                counts[key] = value
+        for key, series in buckets.items():
+            values = [value for _, value in series]
+            assert values == sorted(values) and series[-1][0] == '+Inf'
+            assert values[-1] == counts[key]
+
+
+def test_request_errors_are_not_verdicts():
+    # Rejected requests count as ERROR; INVALID is left for check_strength's own verdict
+    before = outcome_counts()
+    _, samples = scrape()
+    after = outcome_counts()
+    assert after.get('ERROR', 0) - before.get('ERROR', 0) == 3
+    assert after.get('INVALID', 0) == before.get('INVALID', 0)
+    assert after['STRONG'] - before.get('STRONG', 0) == 1
+    assert after['WEAK'] - before.get('WEAK', 0) == 2
+    outcomes = {labels['outcome'] for _, labels, _ in samples['mpin_check_outcomes_total']}
+    assert {'ERROR', 'STRONG', 'WEAK'} <= outcomes
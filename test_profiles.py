@@ -0,0 +1,107 @@
+"""
+Tests for the profile store in profiles.py (run with python -m pytest test_profiles.py).
+
+A fake clock drives expiry, so nothing sleeps.
+"""
+import json
+
+import pytest
+
+from profiles import Profile, ProfileStore
+
+DATES = ('02-01-1998', '15-06-1995', '10-07-2020', '29-02-2000')
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_store(**limits):
+    clock = FakeClock()
+    return ProfileStore(clock=clock, **dict({'ttl_seconds': 10}, **limits)), clock
+
+
+def test_create_and_get():
+    store, _ = make_store()
+    profile = store.create('02-01-1998', None, '10-07-2020')
+    assert store.get(profile.profile_id) is profile
+    assert store.get('unknown') is None
+    assert store.memory_bytes == profile.size > 0
+    assert store.delete(profile.profile_id) and not store.delete(profile.profile_id)
+    assert len(store) == 0 and store.memory_bytes == 0
+
+
+def test_sliding_ttl_expiry():
+    store, clock = make_store(ttl_seconds=10)
+    kept = store.create(DATES[0])
+    dropped = store.create(DATES[1])
+    clock.now += 8
+    # Using a profile extends its life by another ttl_seconds
+    assert store.get(kept.profile_id) is kept
+    clock.now += 5
+    assert store.get(dropped.profile_id) is None
+    assert store.get(kept.profile_id) is kept
+    clock.now += 10
+    assert store.get(kept.profile_id) is None
+    assert len(store) == 0 and store.memory_bytes == 0
+
+
+def test_lru_eviction_by_count():
+    store, _ = make_store(max_profiles=2)
+    first, second = store.create(DATES[0]), store.create(DATES[1])
+    # first is now the most recently used, so second goes when a third arrives
+    store.get(first.profile_id)
+    third = store.create(DATES[2])
+    assert store.get(second.profile_id) is None
+    assert store.get(first.profile_id) is first and store.get(third.profile_id) is third
+    assert store.memory_bytes == first.size + third.size
+
+
+def test_expired_profiles_go_before_live_ones():
+    store, clock = make_store(max_profiles=2, ttl_seconds=10)
+    expired = store.create(DATES[0])
+    clock.now += 11
+    live = store.create(DATES[1])
+    newest = store.create(DATES[2])
+    assert store.get(expired.profile_id) is None
+    assert store.get(live.profile_id) is live and store.get(newest.profile_id) is newest
+
+
+def test_memory_cap():
+    size = Profile(None, DATES[0]).size
+    store, _ = make_store(max_bytes=int(size * 2.5))
+    profiles = [store.create(date) for date in DATES[:3]]
+    # Only two profiles fit under the byte cap; the least recently used one is dropped
+    assert store.get(profiles[0].profile_id) is None
+    assert len(store) == 2 and store.memory_bytes <= store.max_bytes
+    with pytest.raises(ValueError, match='memory limit'):
+        ProfileStore(max_bytes=size // 2).create(DATES[0])
+
+
+def test_profile_endpoint_accepts_null_and_rejects_non_objects():
+    from factory import create_app
+
+    client = create_app('debug', warmup='eager').test_client()
+    response = client.post('/api/profile', json={'birth_date': '02-01-1998', 'spouse_birth_date': None,
+                                                 'wedding_date': None})
+    assert response.status_code == 200 and response.get_json()['success'] is True
+    for body in ([1, 2], 'dates', None):
+        response = client.post('/api/profile', data=json.dumps(body), content_type='application/json')
+        assert response.status_code == 400 and response.get_json()['success'] is False
+    response = client.post('/api/profile', json={'birth_date': 19980102})
+    assert response.status_code == 400 and response.get_json()['error'] == '"birth_date" must be a string'
+
+
+def test_check_endpoint_accepts_null_dates():
+    from factory import create_app
+
+    client = create_app('debug', warmup='eager').test_client()
+    response = client.post('/api/check_mpin', json={'pin': '0201', 'birth_date': '02-01-1998',
+                                                    'spouse_birth_date': None, 'wedding_date': None})
+    assert response.status_code == 200 and response.get_json()['reasons'] == ['DEMOGRAPHIC_DOB_SELF']
+    response = client.post('/api/check_mpin', json={'pin': 1234})
+    assert response.status_code == 400 and response.get_json()['success'] is False
@@ -0,0 +1,119 @@
+"""
+Tests for the opt-in request profiler in request_profiler.py (run with python -m pytest test_request_profiler.py).
+"""
+import asyncio
+import os
+import re
+
+import pytest
+
+import request_profiler
+from request_profiler import DUMP_PREFIX, PROFILE_HEADER, RequestProfiler, server_timing
+from result_cache import result_cache
+
+SECRET = 's3cret'
+ENTRY = r'[a-z_]+;dur=\d+\.\d{3}'
+SERVER_TIMING = re.compile(rf'^(?:{ENTRY}, )*app;dur=\d+\.\d{{3}}$')
+
+
+def timing_names(header):
+    assert SERVER_TIMING.match(header), header
+    return [entry.split(';')[0] for entry in header.split(', ')]
+
+
+def dumps(directory):
+    return sorted(name for name in os.listdir(directory) if name.startswith(DUMP_PREFIX))
+
+
+def test_server_timing_format():
+    header = server_timing({'check_strength': 0.0012, '_render_started': 5.0}, 0.002)
+    assert header == 'check_strength;dur=1.200, app;dur=2.000'
+    assert server_timing({}, 0.0005) == 'app;dur=0.500'
+
+
+def test_wants():
+    profiler = RequestProfiler(secret=SECRET)
+    assert profiler.enabled
+    assert profiler.wants(SECRET) and profiler.wants(SECRET.encode())
+    assert not profiler.wants('wrong') and not profiler.wants(None)
+    assert RequestProfiler(sample_rate=1.0).wants(None)
+    assert not RequestProfiler().enabled
+    with pytest.raises(ValueError, match='between 0 and 1'):
+        RequestProfiler(sample_rate=1.5)
+
+
+def test_ring_buffer_drops_oldest(tmp_path):
+    # Dumps another worker left behind sort first and go first; other files are left alone
+    stale = [f"{DUMP_PREFIX}20000101T000000-1-{index:06d}-old.prof" for index in range(2)]
+    for name in stale + ['notes.txt']:
+        (tmp_path / name).write_bytes(b'')
+    profiler = RequestProfiler(secret=SECRET, dump_dir=str(tmp_path), keep=3)
+    paths = []
+    for index in range(5):
+        profile = profiler.start()
+        assert profile is not None
+        paths.append(profiler.finish(profile, f'/api/check_mpin/{index}'))
+    assert profiler.dumps == 5
+    assert dumps(tmp_path) == [os.path.basename(path) for path in paths[-3:]]
+    assert paths[-1].endswith('-000005-api_check_mpin_4.prof')
+    assert (tmp_path / 'notes.txt').exists()
+
+
+def test_one_cprofile_at_a_time(tmp_path):
+    profiler = RequestProfiler(secret=SECRET, dump_dir=str(tmp_path))
+    assert RequestProfiler(secret=SECRET).start() is None
+    first = profiler.start()
+    assert first is not None and profiler.start() is None
+    profiler.finish(first, '/')
+    profile = profiler.start()
+    assert profile is not None
+    profiler.finish(profile, '/')
+
+
+def test_flask_server_timing(tmp_path, monkeypatch):
+    from factory import create_app
+
+    monkeypatch.setattr(request_profiler, 'request_profiler',
+                        RequestProfiler(secret=SECRET, dump_dir=str(tmp_path)))
+    client = create_app('production', warmup='eager').test_client()
+    # A result cache hit would skip the check stages
+    result_cache.clear()
+    response = client.post('/api/check_mpin', json={'pin': '0201', 'birth_date': '02-01-1998'},
+                           headers={PROFILE_HEADER: SECRET})
+    names = timing_names(response.headers['Server-Timing'])
+    assert {'checker_lookup', 'check_strength', 'app'} <= set(names) and names[-1] == 'app'
+    assert len(dumps(tmp_path)) == 1
+    page = client.get('/', headers={PROFILE_HEADER: SECRET})
+    assert 'render_template' in timing_names(page.headers['Server-Timing'])
+    for headers in ({}, {PROFILE_HEADER: 'wrong'}):
+        response = client.post('/api/check_mpin', json={'pin': '1234'}, headers=headers)
+        assert 'Server-Timing' not in response.headers
+    assert len(dumps(tmp_path)) == 2
+
+
+def test_asgi_server_timing(monkeypatch):
+    import asgi
+
+    monkeypatch.setattr(asgi, 'request_profiler', RequestProfiler(secret=SECRET))
+    app = asgi.CheckApp(executor_workers=1)
+    result_cache.clear()
+
+    def post(headers):
+        sent = []
+        messages = [{'type': 'http.request', 'body': b'{"pin": "4839"}', 'more_body': False}]
+
+        async def receive():
+            return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {'type': 'http', 'method': 'POST', 'path': '/api/check_mpin', 'query_string': b'',
+                 'headers': [(b'content-type', b'application/json')] + headers}
+        asyncio.run(app(scope, receive, send))
+        return dict(sent[0]['headers'])
+
+    headers = post([(PROFILE_HEADER.lower().encode(), SECRET.encode())])
+    names = timing_names(headers[b'server-timing'].decode())
+    assert {'json_parse', 'check_strength', 'app'} <= set(names)
+    assert b'server-timing' not in post([])
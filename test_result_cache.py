@@ -0,0 +1,117 @@
+"""
+Tests for the LRU/TTL result cache in result_cache.py (run with python -m pytest test_result_cache.py).
+
+A fake clock drives expiry, so nothing sleeps.
+"""
+from result_cache import ResultCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(max_entries=3, ttl_seconds=10):
+    clock = FakeClock()
+    return ResultCache(ttl_seconds=ttl_seconds, max_entries=max_entries, clock=clock), clock
+
+
+def counters(cache):
+    stats = cache.stats()
+    return {name: stats[name] for name in ('entries', 'hits', 'misses', 'evictions', 'expirations')}
+
+
+def test_keys_are_hmacs_of_the_inputs():
+    cache, _ = make_cache()
+    assert cache.key('1234', None) == cache.key('1234', None)
+    assert cache.key('1234', None) != cache.key('1234', '02-01-1998')
+    assert b'1234' not in cache.key('1234', None)
+    assert ResultCache(secret=b'a').key('1234') != ResultCache(secret=b'b').key('1234')
+
+
+def test_lru_eviction_order():
+    cache, _ = make_cache(max_entries=3)
+    for name in 'abc':
+        cache.put(name, {'body': name})
+    # Using a makes b the least recently used entry
+    assert cache.get('a') == {'body': 'a'}
+    cache.put('d', {'body': 'd'})
+    assert list(cache._entries) == ['c', 'a', 'd']
+    assert cache.get('b') is None
+    cache.put('e', {'body': 'e'})
+    assert list(cache._entries) == ['a', 'd', 'e']
+    assert counters(cache) == {'entries': 3, 'hits': 1, 'misses': 1, 'evictions': 2, 'expirations': 0}
+
+
+def test_put_replaces_and_refreshes():
+    cache, _ = make_cache(max_entries=2)
+    cache.put('a', {'body': 1})
+    cache.put('b', {'body': 2})
+    cache.put('a', {'body': 3})
+    cache.put('c', {'body': 4})
+    assert cache.get('a') == {'body': 3} and cache.get('b') is None
+    assert counters(cache)['evictions'] == 1
+
+
+def test_sliding_ttl_expiry():
+    cache, clock = make_cache(ttl_seconds=10)
+    cache.put('a', {'body': 'a'})
+    cache.put('b', {'body': 'b'})
+    clock.now += 8
+    # A hit extends a's life by another ttl_seconds; b keeps its original deadline
+    assert cache.get('a') is not None
+    clock.now += 5
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    clock.now += 10
+    assert cache.get('a') is None
+    assert counters(cache) == {'entries': 0, 'hits': 2, 'misses': 2, 'evictions': 0, 'expirations': 2}
+
+
+def test_put_drops_expired_entries_first():
+    cache, clock = make_cache(max_entries=2, ttl_seconds=10)
+    cache.put('a', {'body': 'a'})
+    clock.now += 11
+    cache.put('b', {'body': 'b'})
+    cache.put('c', {'body': 'c'})
+    # a expired rather than being evicted, so b and c both fit
+    assert list(cache._entries) == ['b', 'c']
+    assert counters(cache)['expirations'] == 1 and counters(cache)['evictions'] == 0
+
+
+def test_disabled_cache_stores_nothing():
+    cache, _ = make_cache(max_entries=0)
+    assert not cache.enabled
+    cache.put('a', {'body': 'a'})
+    assert cache.get('a') is None and len(cache) == 0
+
+
+def test_stats_hit_rate_and_clear():
+    cache, _ = make_cache()
+    assert cache.stats()['hit_rate'] == 0.0
+    cache.put('a', {'body': 'a'})
+    cache.get('a')
+    cache.get('a')
+    cache.get('missing')
+    stats = cache.stats()
+    assert (stats['hit_rate'], stats['max_entries'], stats['ttl_seconds']) == (0.6667, 3, 10)
+    cache.clear()
+    assert len(cache) == 0 and cache.stats()['hits'] == 2
+
+
+def test_cache_stats_endpoint_reports_counters():
+    from factory import create_app
+    from result_cache import result_cache
+
+    client = create_app('production', warmup='eager').test_client()
+    result_cache.clear()
+    before = result_cache.stats()
+    for _ in range(2):
+        client.post('/api/check_mpin', json={'pin': '7391'})
+    stats = client.get('/api/cache_stats').get_json()
+    assert stats['success'] is True
+    assert (stats['hits'] - before['hits'], stats['misses'] - before['misses']) == (1, 1)
+    assert {'entries', 'evictions', 'expirations', 'hit_rate'} <= stats.keys()
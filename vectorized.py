@@ -0,0 +1,145 @@
+"""
+NumPy-vectorized bulk scorer that runs beside MPINChecker.
+
+The input is PINs as integers plus (day, month, year) integer columns for
+the user's DOB, the spouse's DOB and the anniversary. The output is one
+reasons bitmask per row. It gives the same verdicts as
+MPINChecker.check_strength for 4- and 6-digit PINs, but each rule runs as
+a whole-array operation. When the checker has a leaked-PIN list, its
+COMMONLY_USED_LEAKED bit is read from the same memory-mapped file.
+
+NumPy is optional for the rest of the project; install it with
+`pip install numpy` to use this module.
+"""
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+
+from app import Reason, get_checker, parse_date_parts, reason_names
+from leaked import LAYOUT_DENSE
+
+# Reason bits as plain ints for array arithmetic (same values as app.Reason)
+REASON_COMMONLY_USED = Reason.COMMONLY_USED.value
+REASON_DOB_SELF = Reason.DEMOGRAPHIC_DOB_SELF.value
+REASON_DOB_SPOUSE = Reason.DEMOGRAPHIC_DOB_SPOUSE.value
+REASON_ANNIVERSARY = Reason.DEMOGRAPHIC_ANNIVERSARY.value
+REASON_LEAKED = Reason.COMMONLY_USED_LEAKED.value
+
+# Rows are processed in blocks so temporaries stay small for huge inputs
+DEFAULT_CHUNK_ROWS = 1 << 20
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("NumPy is required for vectorized scoring: pip install numpy")
+
+
+def reasons_from_mask(mask):
+    """Convert one bitmask into the reasons list check_strength would return"""
+    return reason_names(int(mask))
+
+
+def date_columns(date_strings):
+    """Parse DD-MM-YYYY strings into (day, month, year) int32 arrays; unparsable -> zeros"""
+    _require_numpy()
+    count = len(date_strings)
+    day = np.zeros(count, dtype=np.int32)
+    month = np.zeros(count, dtype=np.int32)
+    year = np.zeros(count, dtype=np.int32)
+    for row, date_str in enumerate(date_strings):
+        if not date_str:
+            continue
+        parts = parse_date_parts(date_str)
+        if parts is None:
+            continue
+        day[row], month[row], year[row] = parts
+    return day, month, year
+
+
+class VectorizedMPINChecker:
+    """Array counterpart of MPINChecker for one digit length"""
+
+    _DAYS_IN_MONTH = (0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+    def __init__(self, digit_length=4):
+        _require_numpy()
+        if digit_length not in (4, 6):
+            raise ValueError("Vectorized scoring supports 4 and 6 digit PINs")
+        self.digit_length = digit_length
+        checker = get_checker(digit_length)
+        self.pattern_table = np.frombuffer(checker.pattern_table, dtype=np.uint8)
+        # PIN-only reasons per PIN value: COMMONLY_USED plus COMMONLY_USED_LEAKED
+        self.pin_table = (self.pattern_table != 0).astype(np.uint8)
+        if checker.leaked is not None:
+            counts = self.leaked_counts(checker.leaked)
+            self.pin_table |= (counts >= checker.leaked_min_count).astype(np.uint8) * np.uint8(REASON_LEAKED)
+        self.days_in_month = np.array(self._DAYS_IN_MONTH, dtype=np.int32)
+
+    def leaked_counts(self, leaked):
+        """Leak count per PIN value, as an array over the whole PIN space"""
+        entries = np.frombuffer(leaked.entries(), dtype="<u4")
+        if leaked.layout == LAYOUT_DENSE:
+            # A view on the mapped file, so worker processes share its pages
+            return entries
+        records = entries.reshape(-1, 2)
+        counts = np.zeros(10 ** self.digit_length, dtype=np.uint32)
+        counts[records[:, 0]] = records[:, 1]
+        return counts
+
+    def valid_dates(self, day, month, year):
+        """Rows holding a real calendar date that strptime('%d-%m-%Y') would accept"""
+        leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+        month_index = np.clip(month, 0, 12)
+        month_days = self.days_in_month[month_index] + (leap & (month_index == 2))
+        return ((year >= 1) & (year <= 9999) & (month >= 1) & (month <= 12)
+                & (day >= 1) & (day <= month_days))
+
+    def date_matches(self, pins, day, month, year):
+        """Rows whose PIN is one of the date's component orderings (DD, MM, YY)"""
+        short_year = year % 100
+        parts = (day, month, short_year)
+        matched = np.zeros(len(pins), dtype=bool)
+        if self.digit_length == 4:
+            for first, second in ((0, 1), (0, 2), (1, 2)):
+                matched |= pins == parts[first] * 100 + parts[second]
+                matched |= pins == parts[second] * 100 + parts[first]
+        else:
+            for first, second, third in ((0, 1, 2), (0, 2, 1), (1, 0, 2),
+                                         (1, 2, 0), (2, 0, 1), (2, 1, 0)):
+                matched |= pins == parts[first] * 10000 + parts[second] * 100 + parts[third]
+        return matched & self.valid_dates(day, month, year)
+
+    def score(self, pins, dob=None, spouse_dob=None, anniversary=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+        """Return a uint8 reasons bitmask per row.
+
+        pins must be integers in [0, 10**digit_length). Each of dob,
+        spouse_dob and anniversary is None or a (day, month, year) tuple of
+        arrays with the same length as pins. Rows that are not a valid
+        calendar date never produce a demographic match.
+        """
+        pins = np.asarray(pins, dtype=np.int64)
+        if pins.size and (pins.min() < 0 or pins.max() >= 10 ** self.digit_length):
+            raise ValueError(f"PIN values must be in [0, {10 ** self.digit_length})")
+        # Every PIN and date component fits in 32 bits, which halves memory traffic
+        pins = pins.astype(np.int32)
+        dates = []
+        for bit, columns in ((REASON_DOB_SELF, dob), (REASON_DOB_SPOUSE, spouse_dob),
+                             (REASON_ANNIVERSARY, anniversary)):
+            if columns is not None:
+                day, month, year = (np.asarray(column, dtype=np.int32) for column in columns)
+                if not (len(day) == len(month) == len(year) == len(pins)):
+                    raise ValueError("Date columns must have the same length as pins")
+                dates.append((bit, day, month, year))
+
+        masks = np.empty(len(pins), dtype=np.uint8)
+        for start in range(0, len(pins), chunk_rows):
+            stop = start + chunk_rows
+            block = pins[start:stop]
+            mask = self.pin_table[block]
+            for bit, day, month, year in dates:
+                matched = self.date_matches(block, day[start:stop], month[start:stop], year[start:stop])
+                mask |= matched.astype(np.uint8) * np.uint8(bit)
+            masks[start:stop] = mask
+        return masks
@@ -1,15 +1,16 @@
 #!/usr/bin/env python3
 """
 Production WSGI entry point for Render deployment
+
+    gunicorn -c gunicorn.conf.py wsgi:app
 """
 import os
-from simple_run import app
+from factory import create_app
 
 # Production configuration
+app = create_app('production')
 app.config.update(
-    DEBUG=False,
     SECRET_KEY=os.environ.get('SECRET_KEY', 'render-production-secret-key-change-this'),
-    ENV='production'
 )
 
 if __name__ == "__main__":